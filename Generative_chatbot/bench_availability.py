@@ -0,0 +1,92 @@
+"""Availability lookup latency with 100k stored bookings.
+
+Fills a scratch database with bookings of every service over past and
+upcoming days, then times SlotFinder.free_slots (as /chat/message calls it)
+for random services, days and time windows: with the per-day cache cold
+(ttl=0, one indexed query per service and day) and warm, and cold again
+with the start_time indexes dropped, so every query scans the table.
+
+    python bench_availability.py [bookings] [lookups]
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+import database
+from free_slots import SlotFinder
+from salon_calendar import BusinessCalendar
+from time_window import parse_time_window
+
+SERVICE_MINUTES = {"haircut": 60, "hair_wash": 30, "facial": 45}
+TIMES = [None, "morning", "afternoon", "3pm", "evening"]
+
+
+def fill(path: str, business: BusinessCalendar, bookings: int, rng: random.Random) -> None:
+    conn = sqlite3.connect(path)
+    database.create_schema(conn)
+    rows = []
+    day = date.today() + timedelta(days=business.horizon_days)
+    while len(rows) < bookings:
+        for service, minutes in SERVICE_MINUTES.items():
+            free_from = datetime.combine(day, datetime.min.time())
+            for start in business.slots(day):
+                if start >= free_from and rng.random() < 0.6:
+                    rows.append((f"user{len(rows) % 5000}", service, start.isoformat()))
+                    free_from = start + timedelta(minutes=minutes)
+        day -= timedelta(days=1)
+    conn.executemany('INSERT INTO bookings (user_id, service, start_time) VALUES (?, ?, ?)', rows[:bookings])
+    conn.commit()
+    conn.close()
+
+
+async def lookups(finder: SlotFinder, count: int, rng: random.Random) -> list:
+    latencies = []
+    today = date.today()
+    for _ in range(count):
+        service = rng.choice([None, *SERVICE_MINUTES])
+        when = rng.choice(TIMES)
+        day = today + timedelta(days=rng.randrange(1, 14))
+        window = parse_time_window(f"{day} {when}" if when else None)
+        start = time.perf_counter()
+        await finder.free_slots(service, window)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list) -> None:
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"{label:<26} p50 {cuts[49]:6.2f} ms   p95 {cuts[94]:6.2f} ms   p99 {cuts[98]:6.2f} ms")
+
+
+def main():
+    bookings = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    path = os.path.join(tempfile.mkdtemp(), "bookings.db")
+    business = BusinessCalendar()
+    fill(path, business, bookings, random.Random(1))
+    print(f"{bookings:,} bookings, {count} lookups per run")
+
+    db = database.Database(path)
+    runs = [("cold cache", 0.0), ("warm cache", 3600.0)]
+    for label, ttl in runs:
+        finder = SlotFinder(db, business, SERVICE_MINUTES, ttl=ttl)
+        report(label, asyncio.run(lookups(finder, count, random.Random(2))))
+    db.close()
+
+    conn = sqlite3.connect(path)
+    conn.execute("DROP INDEX ux_bookings_start_time_service")
+    conn.execute("DROP INDEX ix_bookings_start_time")
+    conn.close()
+    db = database.Database(path)
+    finder = SlotFinder(db, business, SERVICE_MINUTES, ttl=0.0)
+    report("cold, no start_time index", asyncio.run(lookups(finder, count, random.Random(2))))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
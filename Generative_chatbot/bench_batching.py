@@ -0,0 +1,79 @@
+"""Throughput vs tail latency of micro-batched NLU under concurrent load.
+
+Closed-loop clients each send one message at a time through a MicroBatcher
+whose batches run on a single model thread (one CPU core). With torch and a
+cached model, the embedding classifier is used. Otherwise a cost model stands
+in for it: a fixed per-batch overhead plus a small per-message cost, which is
+the shape that makes vectorized batching pay off.
+
+    python bench_batching.py [clients] [seconds per config] [--model NAME]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from batching import MicroBatcher
+
+BATCH_OVERHEAD = 0.004   # seconds per forward pass in the cost model
+PER_MESSAGE = 0.0003     # seconds per message in the cost model
+CONFIGS = [(1, 0.0), (8, 0.001), (8, 0.005), (32, 0.002), (32, 0.005), (32, 0.010), (32, 0.020)]
+
+
+def cost_model(messages):
+    time.sleep(BATCH_OVERHEAD + PER_MESSAGE * len(messages))
+    return [("parsed", 1.0)] * len(messages)
+
+
+def load_model(name):
+    from embedding_nlu import EmbeddingIntentClassifier
+    classifier = EmbeddingIntentClassifier(name, threads=1, batch_size=1024)
+    return classifier.classify_batch
+
+
+async def run(classify, clients: int, seconds: float, max_batch: int, max_wait: float) -> dict:
+    model_thread = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+    batcher = MicroBatcher(lambda messages: loop.run_in_executor(model_thread, classify, messages),
+                           max_batch, max_wait)
+    latencies = []
+    deadline = time.perf_counter() + seconds
+
+    async def client(n):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await batcher.submit(f"can I book a haircut {n}")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - start
+    model_thread.shutdown()
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+        "mean_batch": batcher.stats()["mean_batch_size"],
+    }
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    clients = int(args[0]) if args else 64
+    seconds = float(args[1]) if len(args) > 1 else 3.0
+    if "--model" in sys.argv:
+        name = sys.argv[sys.argv.index("--model") + 1]
+        classify, label = load_model(name), name
+    else:
+        classify = cost_model
+        label = f"cost model ({BATCH_OVERHEAD * 1000:.1f} ms/batch + {PER_MESSAGE * 1000:.1f} ms/message)"
+    print(f"{clients} clients, {seconds:.0f} s per config, {label}")
+    print(f"{'max_batch':>9} {'max_wait':>9} {'msg/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'batch':>6}")
+    for max_batch, max_wait in CONFIGS:
+        result = asyncio.run(run(classify, clients, seconds, max_batch, max_wait))
+        print(f"{max_batch:>9} {max_wait * 1000:>7.0f}ms {result['rps']:>9,.0f} {result['p50_ms']:>8.1f} "
+              f"{result['p99_ms']:>8.1f} {result['mean_batch']:>6.1f}")
+
+
+if __name__ == "__main__":
+    main()
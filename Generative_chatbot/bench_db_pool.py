@@ -0,0 +1,91 @@
+"""Booking queries per second: connect-per-request on the event loop vs the Database pool.
+
+Runs the same mix of GET /bookings/{user_id} and POST /booking queries from
+concurrent asyncio tasks, the way the handlers issue them, and tracks how long
+the event loop was blocked (the worst heartbeat delay) while they ran.
+
+    python bench_db_pool.py [requests] [concurrency]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import database
+
+
+def slot(i: int) -> datetime:
+    return datetime(2024, 1, 15, 9) + timedelta(minutes=30 * i)
+
+
+def legacy_request(path: str, i: int) -> None:
+    # What each handler did before: open, query, close, all on the event loop.
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    if i % 10 == 0:
+        cursor.execute('INSERT INTO bookings (user_id, service, start_time) VALUES (?, ?, ?)',
+                       (f"user{i % 50}", "haircut", slot(i).isoformat()))
+        conn.commit()
+    else:
+        cursor.execute('SELECT * FROM bookings WHERE user_id = ? ORDER BY created_at DESC LIMIT 100', (f"user{i % 50}",))
+        cursor.fetchall()
+    conn.close()
+
+
+async def pooled_request(db: database.Database, i: int) -> None:
+    if i % 10 == 0:
+        await db.run(database.book_slot, f"user{i % 50}", "haircut", slot(i), 60)
+    else:
+        await db.run(database.fetch_bookings_page, 100, None, f"user{i % 50}")
+
+
+async def heartbeat(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def drive(handler, total: int, concurrency: int):
+    stop = asyncio.Event()
+    lags: list = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            await handler(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    return total / elapsed, max(lags, default=0.0)
+
+
+async def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = database.Database(path)
+    db.call(database.create_schema)
+
+    async def legacy(i):
+        legacy_request(path, i)
+
+    async def pooled(i):
+        # Offset so the second run books different slots from the first.
+        await pooled_request(db, total + i)
+
+    print(f"{total} requests, {concurrency} concurrent tasks")
+    for name, handler in [("connect per request", legacy), ("Database pool", pooled)]:
+        rps, worst_lag = await drive(handler, total, concurrency)
+        print(f"{name:<20} {rps:9,.0f} req/s   worst event-loop stall {worst_lag * 1000:6.1f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
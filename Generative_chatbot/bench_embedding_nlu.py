@@ -0,0 +1,49 @@
+"""Offline embedding intent classifier throughput on one CPU core.
+
+Embeds a fixed mix of chat messages at several batch sizes and reports
+messages per second, plus single-message latency. The model must already be
+in the Hugging Face cache (or be a local directory); nothing is downloaded.
+
+    python bench_embedding_nlu.py [model] [messages]
+"""
+import sys
+import time
+from embedding_nlu import DEFAULT_MODEL, EmbeddingIntentClassifier
+
+MESSAGES = [
+    "hi there",
+    "what services do you have",
+    "I would like a haircut tomorrow at 3pm",
+    "can I get a facial please",
+    "any free slots on friday afternoon",
+    "please cancel my booking",
+    "I don't need a hair wash any more",
+    "do you do beard trims",
+]
+
+
+def main():
+    model = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_MODEL
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+    messages = (MESSAGES * (total // len(MESSAGES) + 1))[:total]
+
+    start = time.perf_counter()
+    classifier = EmbeddingIntentClassifier(model, threads=1)
+    print(f"model {model}, loaded with label matrix in {time.perf_counter() - start:.2f} s, 1 thread")
+
+    for message, (parsed, confidence) in zip(MESSAGES, classifier.classify_batch(MESSAGES)):
+        print(f"  {message!r:<42} {parsed['intent']:<20} {confidence:.2f}")
+
+    classifier.classify_batch(messages[:64])  # warm up
+    print(f"{'batch':>6} {'msg/s':>10} {'ms/batch':>10}")
+    for batch_size in (1, 8, 32, 64, 128):
+        classifier.batch_size = batch_size
+        count = min(total, batch_size * 32)
+        start = time.perf_counter()
+        classifier.classify_batch(messages[:count])
+        elapsed = time.perf_counter() - start
+        print(f"{batch_size:>6} {count / elapsed:>10,.0f} {elapsed / (count / batch_size) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
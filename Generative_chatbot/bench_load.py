@@ -0,0 +1,88 @@
+"""Load test for /chat/message: greeting -> services -> ask for a service -> book -> cancel.
+
+Runs the app in process on a scratch database unless --url points at a
+running server. In process, OpenAI is replaced by the tests' StubOpenAI
+(stubs.py) answering after --llm-ms milliseconds, so messages the local
+NLU tiers pass on cost about what a real completion would without any
+network or API key.
+Each conversation books one of the times offered and then deletes the
+booking, so availability stays about the same over the run.
+
+    python bench_load.py [--conversations 200] [--concurrency 16] [--llm-ms 300] [--out results.json]
+                         [--baseline old.json] [--url http://127.0.0.1:8000]
+"""
+import json
+import re
+import sys
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+import loadtest
+from stubs import StubOpenAI, use_scratch_environment
+
+GREETINGS = ["hello", "hi there", "hey!"]
+ASK_SERVICES = ["what services do you offer?", "which services do you have", "what do you offer?"]
+SERVICES = {"haircut": "a haircut", "facial": "a facial", "hair_wash": "a hair wash"}
+WHEN = ["tomorrow morning", "tomorrow afternoon", "tomorrow"]
+# The stub's keyword NLU: first match wins
+STUB_INTENTS = [("book", "book_appointment"), ("could i", "book_appointment"), ("slot", "check_slots"),
+                ("service", "ask_services"), ("offer", "ask_services"), ("hello", "greeting"), ("hi", "greeting")]
+
+
+def stub_reply(content: str) -> str:
+    """Keyword intent parsing in the shape the app's prompts ask OpenAI for."""
+    # Batched prompts (NLU_LLM_BATCH=1) carry a JSON array of messages
+    parsed = [parse(m) for m in json.loads(content)] if content.startswith("[") else parse(content)
+    return json.dumps(parsed)
+
+
+def parse(message: str) -> dict:
+    text = message.lower()
+    intent = next((intent for word, intent in STUB_INTENTS if word in text), "unknown")
+    service = next((key for key in SERVICES if key.replace("_", " ") in text), None)
+    time = next((when for when in WHEN if when in text), None)
+    return {"intent": intent, "service": service, "time": time}
+
+
+def stub_llm(main, latency: float) -> StubOpenAI:
+    """Point the app's LLM client at a StubOpenAI answering with `stub_reply`."""
+    stub = StubOpenAI(stub_reply, latency)
+    main.llm_client = main.AsyncLLMClient(stub, max_concurrency=main.llm_client.max_concurrency,
+                                          timeout=main.llm_client.timeout, retries=main.llm_client.retries)
+    return stub
+
+
+def load_app(llm_ms: float):
+    use_scratch_environment("load_bookings.db")
+    import main
+    stub_llm(main, llm_ms / 1000)
+    return main.app
+
+
+async def conversation(call, n: int, rng) -> None:
+    user = f"load-{n}"
+
+    async def say(step, message, expect):
+        return (await call(step, "POST", "/chat/message", {"user_id": user, "message": message}, expect))["reply"]
+
+    await say("greeting", rng.choice(GREETINGS), lambda r: "Welcome" in r["reply"])
+    await say("services", rng.choice(ASK_SERVICES), lambda r: "Haircut" in r["reply"])
+    service = rng.choice(list(SERVICES.values()))
+    # Under load the window asked about can be fully booked for a moment
+    offer = await say("select", f"could I book {service} {rng.choice(WHEN)}?",
+                      lambda r: "1)" in r["reply"] or "no free times" in r["reply"])
+    offered = len(re.findall(r"\d+\) ", offer))
+    if not offered:
+        return
+    # Another client may take the slot between the offer and the booking
+    reply = await say("book", str(rng.randint(1, min(offered, 4))),
+                      lambda r: "You're booked" in r["reply"] or "just taken" in r["reply"])
+    if "You're booked" in reply:
+        bookings = await call("list", "GET", "/bookings/{user_id}", user_id=user)
+        for booking in bookings["bookings"]:
+            await call("cancel", "DELETE", "/bookings/{booking_id}", booking_id=booking["id"])
+
+
+if __name__ == "__main__":
+    parser = loadtest.arg_parser(__doc__)
+    parser.add_argument("--llm-ms", type=float, default=300.0, help="stub OpenAI latency in ms (default 300)")
+    args = parser.parse_args()
+    sys.exit(loadtest.main(args, "generative", lambda: load_app(args.llm_ms), conversation))
@@ -0,0 +1,69 @@
+"""Cold-start cost of the app, from `python -X importtime`.
+
+Imports `main` in fresh interpreters (best of several runs) and reports the
+total import time and the slowest top-level dependencies, then how long the
+deferred work (/warmup: openai client, embedding model if configured) takes.
+Run with NLU_EMBEDDING_MODEL set to include the embedding model.
+
+    python bench_startup.py [runs]
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+WARMUP = """
+import asyncio, json, main
+async def run():
+    async with main.lifespan(main.app):
+        print(json.dumps(await main.warm_up()))
+asyncio.run(run())
+"""
+
+
+def import_profile(env) -> dict:
+    """Cumulative microseconds for `main` and for each module it imports directly."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=APP_DIR, env=env, capture_output=True, text=True, check=True)
+    children = {}
+    for match in LINE.finditer(result.stderr):
+        _, cumulative, indent, name = match.groups()
+        # importtime prints children (indented) before their parent.
+        if len(indent) == 2:
+            children[name] = int(cumulative)
+        elif not indent:
+            if name == "main":
+                return {"main": int(cumulative), **children}
+            children = {}
+    raise RuntimeError("main not found in -X importtime output")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "bench"),
+               DATABASE_PATH=os.path.join(workdir, "bench.db"))
+
+    profiles = [import_profile(env) for _ in range(runs)]
+    best = min(profiles, key=lambda p: p["main"])
+    print(f"import main: {best['main'] / 1000:.0f} ms (best of {runs})")
+    print("slowest dependencies:")
+    for name, micros in sorted(best.items(), key=lambda item: -item[1])[:8]:
+        if name != "main":
+            print(f"  {name:<28} {micros / 1000:7.0f} ms")
+
+    result = subprocess.run([sys.executable, "-c", WARMUP], cwd=APP_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    print("deferred to first use (/warmup):")
+    for name, seconds in timings.items():
+        print(f"  {name:<28} {seconds * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""Shared test setup: the environment `main` reads at import and a scratch
+bookings database. The OpenAI stand-in lives in stubs.py."""
+import sqlite3
+
+import pytest
+
+from stubs import use_scratch_environment
+
+# Set before any test module imports main; the tests share one scratch database
+use_scratch_environment("test_bookings.db")
+
+import database
+
+
+@pytest.fixture
+def db_path(tmp_path) -> str:
+    """A new SQLite file with the bookings schema, separate from the app's database."""
+    path = str(tmp_path / "bookings.db")
+    conn = sqlite3.connect(path)
+    database.create_schema(conn)
+    conn.close()
+    return path
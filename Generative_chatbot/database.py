@@ -0,0 +1,241 @@
+import asyncio
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+from logs import get_logger
+from metrics import count_query
+
+log = get_logger("database")
+
+# (candidate start, booking length) -> that start or the next one inside business hours
+Opening = Callable[[datetime, timedelta], Optional[datetime]]
+
+
+class Database:
+    """Long-lived SQLite connections owned by a small dedicated thread pool.
+
+    Every executor thread opens one connection the first time it runs a query
+    and keeps it for the life of the process, so connection setup and PRAGMAs
+    happen once per thread instead of once per request. Async handlers hand
+    their queries to `run`, which keeps blocking SQLite calls off the event loop.
+    """
+
+    def __init__(self, path: str, workers: int = 1):
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sqlite")
+
+    def connection(self) -> sqlite3.Connection:
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            configure_connection(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    async def run(self, fn: Callable, *args):
+        """Run `fn(conn, *args)` on a database thread and await its result."""
+        # Counted here: the executor thread does not see the request's context
+        count_query()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, args)
+
+    def call(self, fn: Callable, *args):
+        """Blocking variant of `run` for code outside the event loop."""
+        return self._executor.submit(self._call, fn, args).result()
+
+    def _call(self, fn: Callable, args):
+        return fn(self.connection(), *args)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+# WAL lets readers run alongside the single writer; NORMAL sync is safe under
+# WAL and skips an fsync per commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_bookings_start_time ON bookings (start_time)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_user_id_created_at ON bookings (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_bookings_created_at ON bookings (created_at)",
+)
+UNIQUE_SLOT_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS ux_bookings_start_time_service ON bookings (start_time, service)"
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+
+
+def create_schema(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    """Create the bookings and sessions tables and indexes; upgrades an existing database in place.
+
+    Safe to run on every start. If existing rows double-book a slot, the
+    unique slot/service index is skipped (with a warning) until they are
+    fixed; returns those (start_time, service) pairs. book_slot does not
+    depend on the index, so the app still runs.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bookings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            service TEXT NOT NULL,
+            start_time TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    duplicates = conn.execute('''
+        SELECT start_time, service FROM bookings
+        GROUP BY start_time, service HAVING COUNT(*) > 1
+    ''').fetchall()
+    if duplicates:
+        log.warning("unique_slot_index_skipped",
+                    extra={"duplicates": [f"{service} at {start_time}" for start_time, service in duplicates]})
+    for statement in INDEXES if duplicates else INDEXES + (UNIQUE_SLOT_INDEX,):
+        conn.execute(statement)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            user_id TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_updated_at ON sessions (updated_at)')
+    conn.commit()
+    return duplicates
+
+
+def book_slot(conn: sqlite3.Connection, user_id: str, service: str, start: datetime, minutes: int,
+              opening: Optional[Opening] = None) -> Tuple[Optional[int], Optional[datetime]]:
+    """Insert a booking unless it overlaps another booking of the same service.
+
+    Returns (booking id, None), or (None, next free start) when the slot is
+    taken. BEGIN IMMEDIATE takes the write lock before the overlap check, so
+    concurrent bookings from any process are serialized and cannot both
+    claim a slot. `opening` is passed on to next_free_start.
+    """
+    length = timedelta(minutes=minutes)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Bookings of one service all share its length, so any start within
+        # one length either side of ours overlaps it.
+        taken = conn.execute(
+            'SELECT 1 FROM bookings WHERE service = ? AND start_time > ? AND start_time < ? LIMIT 1',
+            (service, (start - length).isoformat(), (start + length).isoformat())
+        ).fetchone()
+        if taken:
+            conn.rollback()
+            return None, next_free_start(conn, service, start, length, opening=opening)
+        cursor = conn.execute(
+            'INSERT INTO bookings (user_id, service, start_time) VALUES (?, ?, ?)',
+            (user_id, service, start.isoformat())
+        )
+        conn.commit()
+        return cursor.lastrowid, None
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def next_free_start(conn: sqlite3.Connection, service: str, start: datetime, length: timedelta,
+                    horizon: timedelta = timedelta(days=7), opening: Optional[Opening] = None) -> Optional[datetime]:
+    """Earliest start at or after `start` (within `horizon`) that overlaps no booking of `service`.
+
+    `opening(when, length)` moves a candidate start into business hours (e.g.
+    BusinessCalendar.next_opening) and returns None when there is none.
+    """
+    opening = opening or (lambda when, _: when)
+    rows = conn.execute(
+        'SELECT start_time FROM bookings WHERE service = ? AND start_time > ? AND start_time < ? ORDER BY start_time',
+        (service, (start - length).isoformat(), (start + horizon + length).isoformat())
+    )
+    candidate = opening(start, length)
+    for (start_time,) in rows:
+        booked = datetime.fromisoformat(start_time)
+        if candidate is None or booked >= candidate + length:
+            break
+        candidate = opening(max(candidate, booked + length), length)
+    return candidate if candidate is not None and candidate <= start + horizon else None
+
+
+def booked_starts(conn: sqlite3.Connection, service: str, start: datetime, end: datetime) -> List[datetime]:
+    """Start times of `service` bookings starting in (start, end), in order.
+
+    A range scan of the covering ux_bookings_start_time_service index.
+    """
+    rows = conn.execute(
+        'SELECT start_time FROM bookings WHERE service = ? AND start_time > ? AND start_time < ? ORDER BY start_time',
+        (service, start.isoformat(), end.isoformat())
+    )
+    return [datetime.fromisoformat(start_time) for (start_time,) in rows]
+
+
+def load_session(conn: sqlite3.Connection, user_id: str, since: float) -> Optional[Tuple[str, float]]:
+    """(state JSON, updated_at) of `user_id`'s session if it was saved after `since`."""
+    return conn.execute(
+        'SELECT state, updated_at FROM sessions WHERE user_id = ? AND updated_at > ?', (user_id, since)
+    ).fetchone()
+
+
+def save_sessions(conn: sqlite3.Connection, rows: List[Tuple[str, str, float]], expired_before: float) -> None:
+    """Upsert (user_id, state JSON, updated_at) rows and drop sessions last saved before `expired_before`."""
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO sessions (user_id, state, updated_at) VALUES (?, ?, ?)', rows)
+        conn.execute('DELETE FROM sessions WHERE updated_at < ?', (expired_before,))
+
+
+def fetch_bookings_page(conn: sqlite3.Connection, limit: int, after: Optional[Tuple[str, int]] = None,
+                        user_id: Optional[str] = None, start: Optional[str] = None,
+                        end: Optional[str] = None) -> list:
+    """Up to `limit` bookings newest first, resuming after the (created_at, id) key `after`.
+
+    Keyset paging walks the created_at indexes instead of skipping an OFFSET,
+    so every page costs the same however deep into the table it is.
+    `start`/`end` bound the appointment time.
+    """
+    clauses = []
+    params: list = []
+    if user_id is not None:
+        clauses.append('user_id = ?')
+        params.append(user_id)
+    if start:
+        clauses.append('start_time >= ?')
+        params.append(start)
+    if end:
+        clauses.append('start_time < ?')
+        params.append(end)
+    if after:
+        clauses.append('(created_at < ? OR (created_at = ? AND id < ?))')
+        params.extend([after[0], after[0], after[1]])
+    where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+    params.append(limit)
+    return conn.execute(
+        'SELECT * FROM bookings' + where + ' ORDER BY created_at DESC, id DESC LIMIT ?', params
+    ).fetchall()
+
+
+def delete_booking(conn: sqlite3.Connection, booking_id: int) -> Optional[Tuple[str, str]]:
+    """Delete a booking; returns its (service, start_time), or None if there was no such booking."""
+    with conn:
+        row = conn.execute('SELECT service, start_time FROM bookings WHERE id = ?', (booking_id,)).fetchone()
+        if row:
+            conn.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
+    return row
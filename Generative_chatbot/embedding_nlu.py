@@ -0,0 +1,95 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from nlu import SERVICES, LocalIntentClassifier
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# A few phrasings per intent; their mean embedding is the intent's label vector.
+INTENT_EXAMPLES = {
+    "greeting": ["hi", "hello there", "hey, good morning", "hi, how are you"],
+    "ask_services": ["what services do you offer", "what can I get done here",
+                     "show me your menu and prices", "which treatments do you have"],
+    "book_appointment": ["I want to book a haircut", "can I make an appointment",
+                         "schedule a facial for me", "I'd like to get my hair washed"],
+    "check_slots": ["what times are available", "do you have any free slots",
+                    "when are you open tomorrow", "any openings this afternoon"],
+    "cancel_appointment": ["cancel my appointment", "I can't make it, please cancel",
+                           "drop my booking", "call off my haircut"],
+}
+
+TIME_ENTITY = re.compile(
+    r'\b(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)|\d{1,2}:\d{2}|noon|tonight|'
+    r'(?:this |tomorrow )?(?:morning|afternoon|evening)|today|tomorrow|'
+    r'(?:next )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b'
+)
+
+
+class EmbeddingIntentClassifier:
+    """Offline intent classifier: a small sentence-embedding model scored against
+    a precomputed label-embedding matrix, on CPU.
+
+    The model is loaded with `local_files_only`, so it must already be in the
+    Hugging Face cache (or `model` must be a local directory); nothing is
+    fetched at runtime. Messages are embedded in batches of up to
+    `batch_size` and scored with one matrix product per batch. Service and
+    time entities come from the rule matcher and a time regex.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, batch_size: int = 32, threads: int = 1,
+                 min_similarity: float = 0.35, temperature: float = 0.05):
+        # Heavy optional dependencies, imported only when this tier is enabled.
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self._torch = torch
+        torch.set_num_threads(threads)
+        self.batch_size = batch_size
+        self.min_similarity = min_similarity
+        self.temperature = temperature
+        self.tokenizer = AutoTokenizer.from_pretrained(model, local_files_only=True)
+        self.model = AutoModel.from_pretrained(model, local_files_only=True).eval()
+        self.rules = LocalIntentClassifier(SERVICES)
+
+        self.intents = list(INTENT_EXAMPLES)
+        label_vectors = []
+        for intent in self.intents:
+            label_vectors.append(self._embed(INTENT_EXAMPLES[intent]).mean(dim=0))
+        self.labels = torch.nn.functional.normalize(torch.stack(label_vectors), dim=1)
+
+    def _embed(self, texts: Sequence[str]):
+        """L2-normalized mean-pooled sentence embeddings, one row per text."""
+        torch = self._torch
+        batch = self.tokenizer(list(texts), padding=True, truncation=True, max_length=64, return_tensors="pt")
+        with torch.inference_mode():
+            hidden = self.model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, dim=1)
+
+    def classify_batch(self, messages: Sequence[str]) -> List[Tuple[Dict, float]]:
+        """(parsed, confidence) per message, in the shape parse_intent_entities returns."""
+        torch = self._torch
+        results: List[Tuple[Dict, float]] = []
+        for offset in range(0, len(messages), self.batch_size):
+            chunk = messages[offset:offset + self.batch_size]
+            similarity = self._embed(chunk) @ self.labels.T
+            probabilities = torch.softmax(similarity / self.temperature, dim=1)
+            best_similarity, best = similarity.max(dim=1)
+            for i, message in enumerate(chunk):
+                if best_similarity[i].item() < self.min_similarity:
+                    parsed, confidence = {"intent": "unknown"}, 0.0
+                else:
+                    label = best[i].item()
+                    parsed, confidence = {"intent": self.intents[label]}, probabilities[i, label].item()
+                parsed["service"] = self.rules.matcher.scan(message).service
+                parsed["time"] = extract_time(message)
+                results.append((parsed, confidence))
+        return results
+
+    def classify(self, message: str) -> Tuple[Dict, float]:
+        return self.classify_batch([message])[0]
+
+
+def extract_time(message: str) -> Optional[str]:
+    match = TIME_ENTITY.search(message.lower())
+    return match.group(0) if match else None
@@ -0,0 +1,123 @@
+import threading
+import time as clock
+from bisect import bisect_right, insort
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+import database
+from salon_calendar import BusinessCalendar
+from time_window import TimeWindow
+
+
+class SlotFinder:
+    """Free start times per service, from the bookings table and the business calendar.
+
+    The booked start times of each (service, day) are loaded with one indexed
+    range query and cached for `ttl` seconds. Bookings made or deleted through
+    this process are written through with `add` / `remove`; the TTL bounds
+    how long one made by another worker can go unseen (book_slot still
+    rejects it, so a stale offer ends in a 409, never a double booking).
+    """
+
+    def __init__(self, db: database.Database, business: BusinessCalendar, minutes: Dict[str, int],
+                 default_minutes: int = 30, ttl: float = 30.0, max_entries: int = 2048, search_days: int = 7):
+        self.db = db
+        self.business = business
+        self.minutes = minutes
+        self.default_minutes = default_minutes
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.search_days = search_days
+        self.hits = 0
+        self.misses = 0
+        self._days: Dict[Tuple[str, date], Tuple[float, List[datetime]]] = {}
+        self._lock = threading.Lock()
+
+    def length(self, service: str) -> timedelta:
+        return timedelta(minutes=self.minutes.get(service, self.default_minutes))
+
+    async def free_slots(self, service: Optional[str], window: TimeWindow = TimeWindow(), limit: int = 8,
+                         now: Optional[datetime] = None) -> List[datetime]:
+        """Up to `limit` free starts inside `window`, earliest first; any service when `service` is None.
+
+        Without a day in `window`, the next `search_days` open days are searched.
+        """
+        now = now or datetime.now()
+        services = [service] if service else list(self.minutes)
+        if window.day is None:
+            days = self.business.open_days(now.date(), self.search_days)
+        elif now.date() <= window.day <= self.business.last_day(now.date()):
+            days = [window.day]
+        else:
+            days = []
+        found: List[datetime] = []
+        for day in days:
+            starts = [start for start in self.business.slots(day, after=now) if window.contains(start)]
+            if not starts:
+                continue
+            free = set()
+            for name in services:
+                booked, length = await self.booked(name, day), self.length(name)
+                free.update(start for start in starts
+                            if self.business.is_bookable(start, start + length) and not overlaps(booked, start, length))
+            found.extend(sorted(free))
+            if len(found) >= limit:
+                break
+        return found[:limit]
+
+    async def booked(self, service: str, day: date) -> List[datetime]:
+        """Sorted start times of `service` bookings that can reach into `day`."""
+        key = (service, day)
+        now = clock.monotonic()
+        with self._lock:
+            entry = self._days.get(key)
+            if entry and now - entry[0] < self.ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        midnight = datetime.combine(day, time.min)
+        starts = await self.db.run(database.booked_starts, service, midnight - self.length(service),
+                                   midnight + timedelta(days=1))
+        with self._lock:
+            if len(self._days) >= self.max_entries:
+                self._evict(now)
+            self._days[key] = (now, starts)
+        return starts
+
+    def add(self, service: str, start: datetime) -> None:
+        with self._lock:
+            for key in self._keys(service, start):
+                if key in self._days:
+                    insort(self._days[key][1], start)
+
+    def remove(self, service: str, start: datetime) -> None:
+        with self._lock:
+            for key in self._keys(service, start):
+                if key in self._days and start in self._days[key][1]:
+                    self._days[key][1].remove(start)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._days.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "days_cached": len(self._days)}
+
+    def _keys(self, service: str, start: datetime):
+        # A booking is cached under the day it starts on and, if it runs past midnight, the next day
+        last = (start + self.length(service) - timedelta(microseconds=1)).date()
+        return {(service, start.date()), (service, last)}
+
+    def _evict(self, now: float) -> None:
+        for key in [key for key, (loaded_at, _) in self._days.items() if now - loaded_at >= self.ttl]:
+            del self._days[key]
+        if len(self._days) >= self.max_entries:
+            for key in sorted(self._days, key=lambda k: self._days[k][0])[:len(self._days) - self.max_entries + 1]:
+                del self._days[key]
+
+
+def overlaps(booked: List[datetime], start: datetime, length: timedelta) -> bool:
+    """Whether a booking of the same `length` in sorted `booked` overlaps [start, start + length)."""
+    i = bisect_right(booked, start - length)
+    return i < len(booked) and booked[i] < start + length
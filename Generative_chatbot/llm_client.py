@@ -0,0 +1,95 @@
+import asyncio
+import random
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, Optional
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+from metrics import stage
+
+
+@lru_cache(maxsize=None)
+def retryable_errors() -> tuple:
+    """Failures worth another attempt; anything else (bad request, auth) is raised at once."""
+    # openai is imported on first use; it is the slowest import in the app.
+    import openai
+    return (
+        asyncio.TimeoutError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+    )
+
+
+class AsyncLLMClient:
+    """Chat completions on an `openai.AsyncOpenAI` client without blocking the event loop.
+
+    Each attempt is bounded by `timeout` seconds, at most `max_concurrency`
+    calls are in flight at once, and retryable failures are retried up to
+    `retries` times with full-jitter exponential backoff. Calls made with a
+    key that is already in flight wait for that call instead of sending
+    their own, so a burst of identical messages costs one completion.
+    Pass `factory` instead of `client` to build the client on first use.
+    """
+
+    def __init__(self, client=None, max_concurrency: int = 8, timeout: float = 10.0,
+                 retries: int = 2, backoff: float = 0.5, factory: Optional[Callable] = None):
+        self._client = client
+        self._factory = factory
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.failures = 0
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    @property
+    def ready(self) -> bool:
+        return self._client is not None
+
+    async def create(self, key: Hashable, **request):
+        """`chat.completions.create(**request)`, shared with concurrent calls for the same `key`."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._create(request))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller being cancelled does not cancel the others' call.
+        with stage("llm"):
+            return await asyncio.shield(task)
+
+    async def _create(self, request: Dict):
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    self.calls += 1
+                    return await asyncio.wait_for(
+                        self.client.chat.completions.create(**request), self.timeout
+                    )
+            except Exception as e:
+                if not isinstance(e, retryable_errors()) or attempt == self.retries:
+                    self.failures += 1
+                    raise
+                self.retried += 1
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "failures": self.failures,
+            "in_flight": len(self._in_flight),
+            "max_concurrency": self.max_concurrency,
+        }
@@ -1,39 +1,83 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-import sqlite3
+from contextlib import asynccontextmanager
+from time import perf_counter
 import os
+import asyncio
+import base64
+import json
 from dotenv import load_dotenv
-import openai
+import database
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+import logs
+import metrics
+from batching import MicroBatcher
+from free_slots import SlotFinder
+from llm_client import AsyncLLMClient
+from nlu_cache import NLUCache, normalize_message
+from nlu import TieredNLU
+from salon_calendar import BusinessCalendar
+from sessions import UserSessionStore, chosen_slot
+from time_window import parse_time_window
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="AI Salon Booking Chatbot", version="1.0.0")
+# JSON logs on stderr, written by a background thread (LOG_LEVEL / LOG_DEBUG_SAMPLE / LOG_QUEUE_SIZE)
+logs.setup()
+log = logs.get_logger("generative")
 
-# OpenAI client setup
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up the database when the server starts rather than at import"""
+    await db.run(database.create_schema)
+    if os.getenv("WARMUP_ON_STARTUP") == "1":
+        await warm_up()
+    flusher = asyncio.create_task(sessions.run_flusher())
+    yield
+    # Cancelling the flusher writes out the sessions still waiting
+    flusher.cancel()
+    await asyncio.gather(flusher, return_exceptions=True)
+
+app = FastAPI(title="AI Salon Booking Chatbot", version="1.0.0", lifespan=lifespan)
+
+# Request rate/latency per route, stage timers and DB query counts at GET /metrics
+if os.getenv("METRICS", "1") != "0":
+    metrics.install(app)
+
+def create_openai_client():
+    """Built on first use, so importing the app does not import openai (its slowest dependency)"""
+    import openai
+    return openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+
+# OpenAI client setup; retries are handled by AsyncLLMClient, not the SDK
+llm_client = AsyncLLMClient(
+    factory=create_openai_client,
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    timeout=float(os.getenv("LLM_TIMEOUT", "10")),
+    retries=int(os.getenv("LLM_RETRIES", "2"))
+)
+
+# Parsed intents keyed by normalized message; NLU_CACHE_PATH adds a SQLite tier that survives restarts
+nlu_cache = NLUCache(
+    max_size=int(os.getenv("NLU_CACHE_SIZE", "5000")),
+    ttl=float(os.getenv("NLU_CACHE_TTL", "86400")),
+    path=os.getenv("NLU_CACHE_PATH")
+)
 
 # Database setup
 DATABASE_PATH = os.getenv("DATABASE_PATH", "salon_bookings.db")
+db = database.Database(DATABASE_PATH, workers=int(os.getenv("DATABASE_WORKERS", "1")))
 
-def init_database():
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id TEXT NOT NULL,
-            service TEXT NOT NULL,
-            start_time TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+# Rows fetched per query when streaming bookings as NDJSON
+STREAM_PAGE_SIZE = 500
 
-# Initialize database on startup
-init_database()
+# Appointment length per service, used to keep bookings of a service from overlapping
+SERVICE_MINUTES = {"haircut": 60, "hair_wash": 30, "facial": 45}
+DEFAULT_SERVICE_MINUTES = 30
 
 # Pydantic models
 class UserMessage(BaseModel):
@@ -48,10 +92,15 @@ class BookingRequest(BaseModel):
 class ChatResponse(BaseModel):
     reply: str
 
-def parse_intent_entities(message: str):
-    """Parse user message to extract intent and entities using OpenAI"""
+async def parse_intent_entities(message: str, llm: Optional[AsyncLLMClient] = None):
+    """Parse user message to extract intent and entities using OpenAI (or `llm`, an AsyncLLMClient)"""
+    cached = await nlu_cache.aget(message)
+    if cached is not None:
+        return cached
     try:
-        response = client.chat.completions.create(
+        # Keyed like the cache, so identical messages already in flight share one completion
+        response = await (llm or llm_client).create(
+            normalize_message(message),
             model="gpt-4o-mini",
             messages=[
                 {
@@ -75,45 +124,200 @@ def parse_intent_entities(message: str):
         )
         
         result = response.choices[0].message.content.strip()
-        print(f"Raw GPT response: {result}")
+        log.debug("llm_response", extra={"content": result})
         
         # Parse JSON response
-        import json
         parsed = json.loads(result)
+        await nlu_cache.aset(message, parsed)
         return parsed
     except Exception as e:
-        print(f"Error parsing intent: {e}")
+        metrics.ERRORS.inc("parse_intent")
+        log.warning("parse_intent_failed", extra={"error": str(e)})
         return {"intent": "unknown", "service": None, "time": None}
 
-def get_sample_slots():
-    """Generate sample available time slots"""
-    slots = []
-    start_hour = 9  # 9 AM
-    end_hour = 17   # 5 PM
-    
-    for hour in range(start_hour, end_hour):
-        slots.append(f"{hour:02d}:00")
-        slots.append(f"{hour:02d}:30")
-    
-    return slots
+async def parse_intent_entities_batch(messages: List[str], llm: Optional[AsyncLLMClient] = None) -> List[Dict]:
+    """Parse several messages with one OpenAI completion; cached messages skip the call"""
+    results = list(await asyncio.gather(*(nlu_cache.aget(message) for message in messages)))
+    missing = [i for i, parsed in enumerate(results) if parsed is None]
+    if not missing:
+        return results
+    try:
+        response = await (llm or llm_client).create(
+            tuple(normalize_message(messages[i]) for i in missing),
+            model="gpt-4o-mini",
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are an AI assistant for a salon booking system. 
+                    The user message is a JSON array of separate customer messages.
+                    For each one, independently, extract:
+                    1. Intent: greeting, ask_services, book_appointment, check_slots, cancel_appointment, unknown
+                    2. Service: haircut, hair_wash, facial (if mentioned)
+                    3. Time: any time mentioned (optional)
+                    
+                    Return ONLY a JSON array with one object per message, in the same order:
+                    [{"intent": "...", "service": "...", "time": "..."}, ...]
+                    If no service/time found, use null."""
+                },
+                {
+                    "role": "user",
+                    "content": json.dumps([messages[i] for i in missing])
+                }
+            ],
+            max_tokens=60 * len(missing),
+            temperature=0.1
+        )
+        parsed = json.loads(response.choices[0].message.content.strip())
+        if not isinstance(parsed, list) or len(parsed) != len(missing):
+            raise ValueError(f"expected {len(missing)} results, got {parsed!r}")
+        for i, result in zip(missing, parsed):
+            results[i] = result
+            await nlu_cache.aset(messages[i], result)
+    except Exception as e:
+        metrics.ERRORS.inc("parse_intent_batch")
+        log.warning("parse_intent_batch_failed", extra={"error": str(e), "messages": len(missing)})
+        for i in missing:
+            results[i] = {"intent": "unknown", "service": None, "time": None}
+    return results
+
+def load_embedding_classifier():
+    """Offline embedding tier, enabled by NLU_EMBEDDING_MODEL (a cached model name or local path)"""
+    from embedding_nlu import EmbeddingIntentClassifier
+    return EmbeddingIntentClassifier(os.getenv("NLU_EMBEDDING_MODEL"), threads=int(os.getenv("NLU_EMBEDDING_THREADS", "1")))
+
+# Concurrent NLU requests are grouped into batches of up to NLU_BATCH_MAX_SIZE,
+# waiting at most NLU_BATCH_MAX_WAIT_MS for a batch to fill
+NLU_BATCH_MAX_SIZE = int(os.getenv("NLU_BATCH_MAX_SIZE", "16"))
+NLU_BATCH_MAX_WAIT = float(os.getenv("NLU_BATCH_MAX_WAIT_MS", "5")) / 1000
+
+# With NLU_LLM_BATCH=1, messages reaching the LLM are sent several to a prompt
+llm_batcher = (
+    MicroBatcher(parse_intent_entities_batch, NLU_BATCH_MAX_SIZE, NLU_BATCH_MAX_WAIT)
+    if os.getenv("NLU_LLM_BATCH") == "1" else None
+)
+
+# Local rules answer confident, simple messages; the rest go to the embedding tier (if enabled), then the LLM parser
+nlu = TieredNLU(
+    llm_batcher.submit if llm_batcher else parse_intent_entities,
+    threshold=float(os.getenv("NLU_LOCAL_THRESHOLD", "0.8")),
+    # torch/transformers load on the first message that needs them, or on /warmup
+    embedding_loader=load_embedding_classifier if os.getenv("NLU_EMBEDDING_MODEL") else None,
+    max_batch=NLU_BATCH_MAX_SIZE,
+    max_wait=NLU_BATCH_MAX_WAIT
+)
+
+# Opening hours, closures and booking horizon, shared with the Saloon app (SALON_HOURS / SALON_CLOSURES / SALON_HORIZON_DAYS)
+business = BusinessCalendar.from_env()
+
+# Free times per service and day from the bookings table, cached for AVAILABILITY_TTL seconds
+slot_finder = SlotFinder(db, business, SERVICE_MINUTES, DEFAULT_SERVICE_MINUTES,
+                         ttl=float(os.getenv("AVAILABILITY_TTL", "30")))
+
+def service_key(service: Optional[str]) -> Optional[str]:
+    """"Hair wash" / "hair-wash" -> "hair_wash", as the bookings table stores it"""
+    return service.strip().lower().replace(" ", "_").replace("-", "_") if service else None
+
+async def get_available_slots(service: Optional[str], time_entity: Optional[str], limit: int) -> List[datetime]:
+    """Free start times for `service` (any service if None) within the parsed `time` entity"""
+    with metrics.stage("availability"):
+        return await slot_finder.free_slots(service_key(service), parse_time_window(time_entity), limit)
+
+def format_slot(slot: datetime) -> str:
+    return slot.strftime("%a %d %b %H:%M")
+
+def format_slots(slots: List[datetime]) -> str:
+    return ", ".join(f"{i}) {format_slot(slot)}" for i, slot in enumerate(slots, 1))
+
+# Per-user conversation state, kept in memory and written behind to the sessions table
+sessions = UserSessionStore(
+    db,
+    max_size=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("SESSION_TTL", "1800")),
+    flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL_MS", "1000")) / 1000,
+    flush_size=int(os.getenv("SESSION_FLUSH_SIZE", "256"))
+)
+
+metrics.REGISTRY.gauge("sessions_active", "Conversation sessions held in memory.",
+                       lambda: sessions.stats()["sessions_in_memory"])
+metrics.REGISTRY.gauge("sessions_dirty", "Sessions waiting for the next write-behind flush.",
+                       lambda: sessions.stats()["dirty"])
+metrics.REGISTRY.gauge("availability_days_cached", "Service days held by the free-slot cache.",
+                       lambda: slot_finder.stats()["days_cached"])
+metrics.REGISTRY.gauge("log_records_dropped", "Log records dropped because the log queue was full.", logs.dropped)
+
+async def book_offered_slot(user_id: str, service: str, start: datetime) -> str:
+    """Book a time offered in an earlier reply; the reply text"""
+    service = service_key(service)
+    minutes = SERVICE_MINUTES.get(service, DEFAULT_SERVICE_MINUTES)
+    with metrics.stage("db_commit"):
+        booking_id, next_free = await db.run(database.book_slot, user_id, service, start, minutes, business.next_opening)
+    if booking_id is None:
+        later = f" The next free time is {format_slot(next_free)}." if next_free else ""
+        return f"Sorry, {format_slot(start)} was just taken.{later} Would you like another time?"
+    slot_finder.add(service, start)
+    return f"You're booked! Your {service.replace('_', ' ')} is on {format_slot(start)} (booking #{booking_id}). See you then!"
 
 @app.get("/")
 async def root():
     return {"message": "AI Salon Booking Chatbot API"}
 
+async def warm_up() -> Dict:
+    """Load everything that is otherwise deferred to first use; returns seconds spent per part"""
+    timings = {}
+    start = perf_counter()
+    await db.run(lambda conn: conn.execute("SELECT 1").fetchone())
+    timings["database"] = perf_counter() - start
+    if not llm_client.ready:
+        start = perf_counter()
+        await asyncio.to_thread(lambda: llm_client.client)
+        timings["openai"] = perf_counter() - start
+    if nlu.embedding_batcher is not None and nlu.embedding is None:
+        start = perf_counter()
+        await asyncio.to_thread(nlu.warm_embedding)
+        timings["embedding"] = perf_counter() - start
+    return timings
+
+@app.post("/warmup")
+async def warmup():
+    """Optional: load deferred dependencies now so the first chat message does not pay for them"""
+    return {"warmed": {name: round(seconds, 3) for name, seconds in (await warm_up()).items()}}
+
+@app.get("/nlu/stats")
+async def nlu_stats():
+    """Share and latency of each NLU tier, intent cache hit/miss counters and LLM call counters"""
+    stats = {**nlu.stats(), "cache": nlu_cache.stats(), "llm": llm_client.stats()}
+    if llm_batcher:
+        stats["llm_batching"] = llm_batcher.stats()
+    return stats
+
 @app.post("/chat/message", response_model=ChatResponse)
 async def chat_message(user_message: UserMessage):
     """Handle chat messages and provide human-like responses"""
-    
-    # Parse intent and entities
-    parsed = parse_intent_entities(user_message.message)
+    with logs.bind(user_id=user_message.user_id):
+        return await chat_reply(user_message)
+
+async def chat_reply(user_message: UserMessage) -> ChatResponse:
+    session = await sessions.get(user_message.user_id)
+
+    # "2" after a list of times books the second one
+    chosen = chosen_slot(session, user_message.message)
+    if chosen is not None:
+        reply = await book_offered_slot(session.user_id, session.service, chosen)
+        session.remember(user_message.message, {"intent": "confirm_booking"}, offered=[])
+        sessions.save(session)
+        return ChatResponse(reply=reply)
+
+    # Short follow-ups reuse the session's service and time; the rest goes through the NLU tiers
+    with metrics.stage("intent"):
+        parsed = sessions.follow_up(session, user_message.message, nlu.local) or await nlu.parse(user_message.message)
     intent = parsed.get("intent", "unknown")
     service = parsed.get("service")
     time = parsed.get("time")
     
-    print(f"Parsed: intent={intent}, service={service}, time={time}")
+    log.debug("parsed", extra={"intent": intent, "service": service, "time": time})
     
     # Generate appropriate response based on intent
+    offered: List[datetime] = []
     if intent == "greeting":
         reply = "Hello! 👋 Welcome to our salon! I'm here to help you with bookings and services. How can I assist you today?"
     
@@ -128,100 +332,147 @@ What would you like to book today?"""
     
     elif intent == "book_appointment":
         if service:
-            available_slots = get_sample_slots()
-            slots_text = ", ".join(available_slots[:6])  # Show first 6 slots
-            reply = f"Perfect! I'd be happy to book a {service} for you. Here are some available times: {slots_text}. What time works best for you?"
+            offered = await get_available_slots(service, time, 6)
+            if offered:
+                reply = f"Perfect! I'd be happy to book a {service} for you. Here are some available times: {format_slots(offered)}. Reply with a number to book it."
+            else:
+                reply = f"Sorry, we have no free times for a {service}{f' {time}' if time else ''}. Would another day or time work for you?"
         else:
             reply = "I'd be happy to help you book an appointment! What service would you like? We offer haircuts, hair wash, and facials."
     
     elif intent == "check_slots":
-        available_slots = get_sample_slots()
-        slots_text = ", ".join(available_slots[:8])  # Show first 8 slots
-        reply = f"Here are our available time slots: {slots_text}. What time would you prefer?"
+        offered = await get_available_slots(service, time, 8)
+        if offered:
+            reply = f"Here are our available time slots: {format_slots(offered)}. What time would you prefer?"
+        else:
+            reply = f"Sorry, there are no free slots{f' {time}' if time else ''}. Would another day or time work for you?"
     
     else:
         reply = "I'm not sure I understood that. Could you please let me know if you'd like to see our services, book an appointment, or check available times?"
     
+    # Offered times can be picked by number only when they were for a specific service
+    session.remember(user_message.message, parsed, offered if service else [])
+    sessions.save(session)
     return ChatResponse(reply=reply)
 
+def booking_to_dict(booking) -> dict:
+    return {
+        "id": booking[0],
+        "user_id": booking[1],
+        "service": booking[2],
+        "start_time": booking[3],
+        "created_at": booking[4]
+    }
+
 @app.post("/booking")
 async def create_booking(booking: BookingRequest):
-    """Create a new booking"""
+    """Create a new booking; 400 outside opening hours, 409 with the next free start time if the slot is taken"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO bookings (user_id, service, start_time)
-            VALUES (?, ?, ?)
-        ''', (booking.user_id, booking.service, booking.start_time))
-        
-        booking_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        start = datetime.fromisoformat(booking.start_time)
+        if start.tzinfo is not None:
+            # Opening hours and stored times are the salon's local wall-clock time
+            start = start.astimezone().replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail="start_time must be an ISO 8601 date and time")
+    service = service_key(booking.service)
+    minutes = SERVICE_MINUTES.get(service, DEFAULT_SERVICE_MINUTES)
+    if not business.is_bookable(start, start + timedelta(minutes=minutes)):
+        raise HTTPException(status_code=400, detail=f"The salon is closed at {start.isoformat()} for a {minutes}-minute {service}")
+    try:
+        with metrics.stage("db_commit"):
+            booking_id, next_free = await db.run(database.book_slot, booking.user_id, service, start, minutes,
+                                                 business.next_opening)
+        if booking_id is None:
+            raise HTTPException(status_code=409, detail={
+                "message": f"{service} at {start.isoformat()} is already booked",
+                "next_available": next_free.isoformat() if next_free else None
+            })
+        slot_finder.add(service, start)
         
         return {
             "message": "Booking created successfully",
             "booking_id": booking_id,
             "user_id": booking.user_id,
-            "service": booking.service,
-            "start_time": booking.start_time
+            "service": service,
+            "start_time": start.isoformat()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating booking: {str(e)}")
 
+def encode_cursor(booking) -> str:
+    return base64.urlsafe_b64encode(json.dumps([booking[4], booking[0]]).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
+    try:
+        created_at, booking_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), int(booking_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def list_bookings(user_id: Optional[str], limit: int, cursor: Optional[str],
+                        start: Optional[datetime], end: Optional[datetime]) -> dict:
+    bookings = await db.run(
+        database.fetch_bookings_page, limit + 1, decode_cursor(cursor), user_id,
+        start.isoformat() if start else None, end.isoformat() if end else None
+    )
+    next_cursor = encode_cursor(bookings[limit - 1]) if len(bookings) > limit else None
+    return {
+        "bookings": [booking_to_dict(booking) for booking in bookings[:limit]],
+        "next_cursor": next_cursor
+    }
+
+async def stream_bookings(user_id: Optional[str], start: Optional[datetime], end: Optional[datetime]):
+    """Yield matching bookings as NDJSON, fetched one keyset page at a time."""
+    after = None
+    while True:
+        bookings = await db.run(
+            database.fetch_bookings_page, STREAM_PAGE_SIZE, after, user_id,
+            start.isoformat() if start else None, end.isoformat() if end else None
+        )
+        for booking in bookings:
+            yield json.dumps(booking_to_dict(booking)) + "\n"
+        if len(bookings) < STREAM_PAGE_SIZE:
+            break
+        after = (bookings[-1][4], bookings[-1][0])
+
 @app.get("/bookings")
-async def get_all_bookings():
-    """Get all bookings"""
+async def get_all_bookings(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    stream: bool = False
+):
+    """Get bookings, newest first, one page at a time (or all of them as NDJSON with stream=true)"""
+    if stream:
+        return StreamingResponse(stream_bookings(None, start, end), media_type="application/x-ndjson")
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM bookings ORDER BY created_at DESC')
-        bookings = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "bookings": [
-                {
-                    "id": booking[0],
-                    "user_id": booking[1],
-                    "service": booking[2],
-                    "start_time": booking[3],
-                    "created_at": booking[4]
-                }
-                for booking in bookings
-            ]
-        }
+        return await list_bookings(None, limit, cursor, start, end)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching bookings: {str(e)}")
 
 @app.get("/bookings/{user_id}")
-async def get_user_bookings(user_id: str):
-    """Get bookings for a specific user"""
+async def get_user_bookings(
+    user_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    stream: bool = False
+):
+    """Get bookings for a specific user, paginated like GET /bookings"""
+    if stream:
+        return StreamingResponse(stream_bookings(user_id, start, end), media_type="application/x-ndjson")
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM bookings WHERE user_id = ? ORDER BY created_at DESC', (user_id,))
-        bookings = cursor.fetchall()
-        
-        conn.close()
-        
-        return {
-            "user_id": user_id,
-            "bookings": [
-                {
-                    "id": booking[0],
-                    "user_id": booking[1],
-                    "service": booking[2],
-                    "start_time": booking[3],
-                    "created_at": booking[4]
-                }
-                for booking in bookings
-            ]
-        }
+        return {"user_id": user_id, **await list_bookings(user_id, limit, cursor, start, end)}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user bookings: {str(e)}")
 
@@ -229,17 +480,16 @@ async def get_user_bookings(user_id: str):
 async def delete_booking(booking_id: int):
     """Delete a booking by ID"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        deleted = await db.run(database.delete_booking, booking_id)
         
-        cursor.execute('DELETE FROM bookings WHERE id = ?', (booking_id,))
-        
-        if cursor.rowcount == 0:
-            conn.close()
+        if deleted is None:
             raise HTTPException(status_code=404, detail="Booking not found")
-        
-        conn.commit()
-        conn.close()
+        service, start_time = deleted
+        try:
+            slot_finder.remove(service, datetime.fromisoformat(start_time))
+        except ValueError:
+            # A legacy row whose start_time is not ISO; its day is unknown, so drop every cached day
+            slot_finder.invalidate()
         
         return {"message": f"Booking {booking_id} deleted successfully"}
     except HTTPException:
@@ -0,0 +1,27 @@
+"""Upgrade salon_bookings.db in place: WAL journal, booking indexes and the unique slot index.
+
+Exits with status 1 and lists the slots if existing rows double-book a
+service; the unique index is added once those rows are fixed.
+
+    python migrate.py
+"""
+import os
+import sqlite3
+import sys
+from dotenv import load_dotenv
+import database
+
+if __name__ == "__main__":
+    load_dotenv()
+    path = os.getenv("DATABASE_PATH", "salon_bookings.db")
+    conn = sqlite3.connect(path)
+    database.configure_connection(conn)
+    duplicates = database.create_schema(conn)
+    mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list('bookings')")]
+    conn.close()
+    print(f"Upgraded {path} (journal_mode={mode}, indexes: {', '.join(sorted(indexes))})")
+    if duplicates:
+        print("Unique slot index not added; double-booked slots: "
+              + ", ".join(f"{service} at {start_time}" for start_time, service in duplicates))
+        sys.exit(1)
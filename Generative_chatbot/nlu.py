@@ -0,0 +1,171 @@
+import asyncio
+import math
+import re
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+from batching import MicroBatcher
+from intents import IntentMatcher
+
+SERVICES = {
+    'haircut': {'name': 'Haircut'},
+    'hair_wash': {'name': 'Hair Wash'},
+    'facial': {'name': 'Facial'},
+}
+
+KEYWORDS = {
+    'greeting': ['hi', 'hello', 'hey'],
+    'ask_services': ['services', 'what do you offer', 'menu', 'prices'],
+    'book_appointment': ['book', 'booking', 'appointment', 'schedule', 'reserve'],
+    'check_slots': ['slots', 'available', 'availability', 'free times', 'openings'],
+    'cancel_appointment': ['cancel'],
+    'negation': ['not', "don't", 'dont', 'never'],
+}
+
+# Order in which a message matching several intents is resolved.
+PRECEDENCE = ('cancel_appointment', 'check_slots', 'book_appointment', 'ask_services', 'greeting')
+
+_TIME_WORDS = re.compile(
+    r'\b(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)?|noon|today|tomorrow|tonight|morning|afternoon|evening|'
+    r'monday|tuesday|wednesday|thursday|friday|saturday|sunday|next week)\b'
+)
+
+
+class LocalIntentClassifier:
+    """Rule-based intent labels with a confidence score, using the Saloon IntentMatcher.
+
+    Confident only for short, unambiguous messages. Anything with a time in
+    it, a negation, or several competing intents scores low so the LLM
+    handles it (and extracts the entities).
+    """
+
+    def __init__(self, services: Dict[str, Dict] = SERVICES):
+        self.matcher = IntentMatcher(services, KEYWORDS)
+
+    def classify(self, message: str) -> Tuple[Dict, float]:
+        features = self.matcher.scan(message)
+        intents = set(features.categories) - {'negation'}
+        if features.service:
+            intents.add('book_appointment')
+        if len(intents) > 1:
+            # A greeting in front of a request does not compete with it.
+            intents.discard('greeting')
+        if not intents:
+            return {"intent": "unknown", "service": None, "time": None}, 0.0
+
+        intent = next(name for name in PRECEDENCE if name in intents)
+        confidence = 0.95 - 0.25 * (len(intents) - 1)
+        if len(message.split()) > 12:
+            confidence -= 0.2
+        if features.has_number or _TIME_WORDS.search(message.lower()):
+            confidence = min(confidence, 0.5)
+        if 'negation' in features.categories:
+            confidence = min(confidence, 0.3)
+        return {"intent": intent, "service": features.service, "time": None}, confidence
+
+
+def nearest_rank(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (ceil(q * n)-th value)."""
+    # The epsilon keeps q * n that lands a hair above a whole number (0.95 * 60) on that rank
+    return ordered[min(max(math.ceil(len(ordered) * q - 1e-9) - 1, 0), len(ordered) - 1)]
+
+
+class TierStats:
+    """Requests served by one tier and their latency over the last `window` requests."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(seconds)
+
+    def snapshot(self, total: int) -> Dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            requests = self.requests
+        if not latencies:
+            return {"requests": requests, "share": 0.0, "latency_ms": None}
+        return {
+            "requests": requests,
+            "share": requests / total if total else 0.0,
+            "latency_ms": {
+                "mean": sum(latencies) / len(latencies) * 1000,
+                "p50": nearest_rank(latencies, 0.5) * 1000,
+                "p95": nearest_rank(latencies, 0.95) * 1000,
+            },
+        }
+
+
+class TieredNLU:
+    """Runs the local classifier first and escalates to `fallback` (the async LLM
+    parser) when its confidence is below `threshold`.
+
+    With an `embedding` classifier (see embedding_nlu) messages the rules are
+    unsure about try it next before reaching the LLM. Concurrent messages are
+    micro-batched (up to `max_batch`, waiting at most `max_wait` seconds) and
+    each batch runs as one `classify_batch` call on a worker thread. Pass
+    `embedding_loader` instead of `embedding` to load the model on that
+    thread the first time it is needed (or on `warm_embedding`).
+    A threshold above 1 sends everything to the LLM; 0 keeps every message
+    the rules recognise local.
+    """
+
+    def __init__(self, fallback: Callable[[str], Awaitable[Dict]], threshold: float = 0.8,
+                 local: Optional[LocalIntentClassifier] = None, embedding=None,
+                 embedding_loader: Optional[Callable] = None,
+                 max_batch: int = 16, max_wait: float = 0.005):
+        self.fallback = fallback
+        self.threshold = threshold
+        self.local = local or LocalIntentClassifier()
+        self.embedding = embedding
+        self._embedding_loader = embedding_loader
+        self._embedding_lock = threading.Lock()
+        self.tiers = {"local": TierStats(), "llm": TierStats()}
+        self.embedding_batcher: Optional[MicroBatcher] = None
+        if embedding is not None or embedding_loader is not None:
+            self.tiers["embedding"] = TierStats()
+            self.embedding_batcher = MicroBatcher(
+                lambda messages: asyncio.to_thread(self._classify_embedding_batch, messages), max_batch, max_wait
+            )
+
+    def warm_embedding(self) -> None:
+        """Load the embedding model now, if there is one and it is not loaded yet."""
+        if self.embedding is None and self._embedding_loader is not None:
+            with self._embedding_lock:
+                if self.embedding is None:
+                    self.embedding = self._embedding_loader()
+
+    def _classify_embedding_batch(self, messages):
+        self.warm_embedding()
+        return self.embedding.classify_batch(messages)
+
+    async def parse(self, message: str) -> Dict:
+        start = time.perf_counter()
+        parsed, confidence = self.local.classify(message)
+        if confidence > 0 and confidence >= self.threshold:
+            self.tiers["local"].record(time.perf_counter() - start)
+            return parsed
+        if self.embedding_batcher is not None:
+            parsed, confidence = await self.embedding_batcher.submit(message)
+            if confidence > 0 and confidence >= self.threshold:
+                self.tiers["embedding"].record(time.perf_counter() - start)
+                return parsed
+        parsed = await self.fallback(message)
+        self.tiers["llm"].record(time.perf_counter() - start)
+        return parsed
+
+    def stats(self) -> Dict:
+        total = sum(tier.requests for tier in self.tiers.values())
+        stats = {
+            "threshold": self.threshold,
+            "tiers": {name: tier.snapshot(total) for name, tier in self.tiers.items()},
+        }
+        if self.embedding_batcher is not None:
+            stats["embedding_batching"] = self.embedding_batcher.stats()
+        return stats
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+_PUNCTUATION = re.compile(r"[^\w\s:]")
+
+
+def normalize_message(message: str) -> str:
+    """Cache key for a message: lowercase, punctuation dropped, whitespace collapsed."""
+    return " ".join(_PUNCTUATION.sub(" ", message.lower()).split())
+
+
+class NLUCache:
+    """Parsed-intent cache keyed by normalized message.
+
+    A bounded in-memory LRU sits in front of an optional SQLite file, so
+    common phrasings survive restarts and are shared by workers on one host.
+    Entries in both tiers expire after `ttl` seconds. Async handlers use
+    `aget`/`aset`, which keep the SQLite tier off the event loop.
+    """
+
+    def __init__(self, max_size: int = 5000, ttl: float = 86400.0, path: Optional[str] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # The SQLite tier has its own lock so LRU lookups never wait on disk I/O
+        self._disk_lock = threading.Lock()
+        self._disk: Optional[sqlite3.Connection] = None
+        if path:
+            self._disk = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute('''
+                CREATE TABLE IF NOT EXISTS nlu_cache (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            ''')
+            self._disk.commit()
+
+    def get(self, message: str) -> Optional[Dict]:
+        """Blocking lookup in both tiers, for code outside the event loop."""
+        key = normalize_message(message)
+        now = time.time()
+        result = self._memory_get(key, now)
+        if result is None and self._disk is not None:
+            result = self._disk_get(key, now)
+        if result is None:
+            self._miss()
+        return result
+
+    async def aget(self, message: str) -> Optional[Dict]:
+        """`get` for async handlers: the LRU is read on the loop, the SQLite tier in a worker thread."""
+        key = normalize_message(message)
+        now = time.time()
+        result = self._memory_get(key, now)
+        if result is None and self._disk is not None:
+            result = await asyncio.to_thread(self._disk_get, key, now)
+        if result is None:
+            self._miss()
+        return result
+
+    def set(self, message: str, result: Dict) -> None:
+        """Blocking store in both tiers, for code outside the event loop."""
+        key = normalize_message(message)
+        now = time.time()
+        self._memory_set(key, now, result)
+        if self._disk is not None:
+            self._disk_set(key, now, result)
+
+    async def aset(self, message: str, result: Dict) -> None:
+        """`set` for async handlers; the SQLite write runs in a worker thread."""
+        key = normalize_message(message)
+        now = time.time()
+        self._memory_set(key, now, result)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk_set, key, now, result)
+
+    def _memory_get(self, key: str, now: float) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return dict(entry[1])
+        return None
+
+    def _memory_set(self, key: str, now: float, result: Dict) -> None:
+        with self._lock:
+            self._remember(key, now, dict(result))
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT result, stored_at FROM nlu_cache WHERE key = ? AND stored_at > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+        if not row:
+            return None
+        result = json.loads(row[0])
+        with self._lock:
+            self._remember(key, row[1], result)
+            self.disk_hits += 1
+        return dict(result)
+
+    def _disk_set(self, key: str, now: float, result: Dict) -> None:
+        with self._disk_lock:
+            self._disk.execute(
+                "INSERT OR REPLACE INTO nlu_cache (key, result, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result), now),
+            )
+            self._disk.commit()
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _remember(self, key: str, stored_at: float, result: Dict) -> None:
+        self._entries[key] = (stored_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._disk is not None:
+            with self._disk_lock:
+                self._disk.execute("DELETE FROM nlu_cache")
+                self._disk.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,12 @@
+"""Makes the Saloon_chatbot modules (intents, conversation, ...) importable from this app.
+
+The Saloon directory is appended, not prepended, so this app's own modules
+(main, database) always win on a name clash.
+"""
+import os
+import sys
+
+SALOON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Saloon_chatbot")
+
+if SALOON_DIR not in sys.path:
+    sys.path.append(SALOON_DIR)
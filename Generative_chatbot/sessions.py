@@ -0,0 +1,205 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+import database
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+from embedding_nlu import TIME_ENTITY
+from logs import get_logger
+from nlu import LocalIntentClassifier
+from time_window import ISO_DATE, RELATIVE_DAY
+
+# Intents whose service/time a short follow-up ("and friday?", "what about a facial") carries on
+FOLLOW_UP_INTENTS = ('book_appointment', 'check_slots')
+# Messages that change the subject go through intent parsing even mid-flow
+TOPIC_CHANGES = {'greeting', 'ask_services', 'cancel_appointment', 'negation'}
+FOLLOW_UP_MAX_WORDS = 8
+# "2", "book 2", "#2", "option 2": picks one of the times offered in the last reply
+SLOT_CHOICE = re.compile(r'^(?:book |slot |option |number |#)?(\d{1,2})[.!]?$')
+
+log = get_logger("sessions")
+
+
+class UserSession:
+    """Conversation state of one user: recent turns and the entities extracted so far."""
+    __slots__ = ('user_id', 'intent', 'service', 'time', 'offered', 'turns', 'updated_at')
+
+    def __init__(self, user_id: str, intent: Optional[str] = None, service: Optional[str] = None,
+                 time: Optional[str] = None, offered: Optional[List[datetime]] = None,
+                 turns=(), updated_at: float = 0.0, max_turns: int = 10):
+        self.user_id = user_id
+        self.intent = intent
+        self.service = service
+        self.time = time
+        self.offered = offered or []
+        self.turns = deque((tuple(turn) for turn in turns), maxlen=max_turns)
+        self.updated_at = updated_at
+
+    def remember(self, message: str, parsed: Dict, offered: Optional[List[datetime]] = None) -> None:
+        """Record a turn; entities the turn did not mention keep their earlier values."""
+        self.intent = parsed.get("intent")
+        self.service = parsed.get("service") or self.service
+        self.time = parsed.get("time") or self.time
+        if offered is not None:
+            self.offered = offered
+        self.turns.append((message[:200], self.intent))
+
+    def to_dict(self) -> Dict:
+        return {
+            "intent": self.intent,
+            "service": self.service,
+            "time": self.time,
+            "offered": [slot.isoformat() for slot in self.offered],
+            "turns": list(self.turns),
+        }
+
+    @classmethod
+    def from_dict(cls, user_id: str, data: Dict, updated_at: float) -> "UserSession":
+        return cls(user_id, data.get("intent"), data.get("service"), data.get("time"),
+                   [datetime.fromisoformat(slot) for slot in data.get("offered", [])],
+                   data.get("turns", []), updated_at)
+
+
+class UserSessionStore:
+    """Sessions keyed by user_id: a hot in-memory LRU tier written behind to SQLite.
+
+    `save` only marks a session dirty; dirty sessions are written in one
+    transaction every `flush_interval` seconds (`run_flusher`), or as soon
+    as `flush_size` of them are waiting. A session evicted from the LRU
+    before its flush stays reachable from the dirty set. Sessions unused for
+    `ttl` seconds start over. All methods run on the event loop, so the
+    tiers need no lock.
+    """
+
+    def __init__(self, db: database.Database, max_size: int = 10000, ttl: float = 1800.0,
+                 flush_interval: float = 1.0, flush_size: int = 256):
+        self.db = db
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "new": 0, "follow_ups": 0, "flushes": 0, "flushed": 0}
+        self._hot: "OrderedDict[str, UserSession]" = OrderedDict()
+        self._dirty: Dict[str, UserSession] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(self, user_id: str) -> UserSession:
+        now = time.time()
+        session = self._hot.get(user_id) or self._dirty.get(user_id)
+        if session is not None and now - session.updated_at < self.ttl:
+            self.counters["memory_hits"] += 1
+        else:
+            row = await self.db.run(database.load_session, user_id, now - self.ttl)
+            if row:
+                session = UserSession.from_dict(user_id, json.loads(row[0]), row[1])
+                self.counters["disk_hits"] += 1
+            else:
+                session = UserSession(user_id)
+                self.counters["new"] += 1
+        self._keep(session)
+        return session
+
+    def save(self, session: UserSession) -> None:
+        session.updated_at = time.time()
+        self._keep(session)
+        self._dirty[session.user_id] = session
+        if len(self._dirty) >= self.flush_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Write every dirty session in one transaction; returns how many were written."""
+        if not self._dirty:
+            return 0
+        batch, self._dirty = self._dirty, {}
+        rows = [(user_id, json.dumps(session.to_dict()), session.updated_at) for user_id, session in batch.items()]
+        try:
+            await self.db.run(database.save_sessions, rows, time.time() - self.ttl)
+        except BaseException:
+            # Keep them for the next flush, unless the session changed again meanwhile
+            for user_id, session in batch.items():
+                self._dirty.setdefault(user_id, session)
+            raise
+        self.counters["flushes"] += 1
+        self.counters["flushed"] += len(rows)
+        return len(rows)
+
+    async def run_flusher(self) -> None:
+        """Flush every `flush_interval` seconds until cancelled, then once more."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                try:
+                    await self.flush()
+                except Exception:
+                    log.exception("session_flush_failed")
+        finally:
+            await self.flush()
+
+    def follow_up(self, session: UserSession, message: str, local: LocalIntentClassifier) -> Optional[Dict]:
+        """`resolve_follow_up`, counted in `stats`."""
+        parsed = resolve_follow_up(session, message, local)
+        if parsed is not None:
+            self.counters["follow_ups"] += 1
+        return parsed
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, "sessions_in_memory": len(self._hot), "dirty": len(self._dirty)}
+
+    def _keep(self, session: UserSession) -> None:
+        self._hot[session.user_id] = session
+        self._hot.move_to_end(session.user_id)
+        while len(self._hot) > self.max_size:
+            self._hot.popitem(last=False)
+
+
+def resolve_follow_up(session: UserSession, message: str, local: LocalIntentClassifier) -> Optional[Dict]:
+    """Parse a short follow-up from the session instead of the NLU tiers, or None if it is not one.
+
+    "and tomorrow?" after a haircut question keeps the haircut; "what about a
+    facial" keeps the time asked about before, and "the afternoon?" its day.
+    """
+    if session.intent not in FOLLOW_UP_INTENTS or len(message.split()) > FOLLOW_UP_MAX_WORDS:
+        return None
+    features = local.matcher.scan(message)
+    if TOPIC_CHANGES & set(features.categories):
+        return None
+    # Every time phrase, so "friday afternoon" keeps both parts
+    time_entity = " ".join(TIME_ENTITY.findall(message.lower())) or None
+    if time_entity is None and features.service is None:
+        return None
+    if time_entity is not None:
+        time_entity = with_previous_day(time_entity, session.time)
+    return {
+        "intent": next((name for name in FOLLOW_UP_INTENTS if name in features.categories), session.intent),
+        "service": features.service or session.service,
+        "time": time_entity or (session.time if features.service else None),
+    }
+
+
+def with_previous_day(time_entity: str, previous: Optional[str]) -> str:
+    """"afternoon" after "tomorrow morning" means tomorrow afternoon: a time of day
+    with no day of its own keeps the day asked about before."""
+    if not previous or ISO_DATE.search(time_entity) or RELATIVE_DAY.search(time_entity):
+        return time_entity
+    previous = previous.lower()
+    iso = ISO_DATE.search(previous)
+    relative = RELATIVE_DAY.search(previous)
+    if iso:
+        day = iso.group(1)
+    elif relative:
+        # "tonight" is a part of the day too; only its day is kept
+        day = "today" if relative.group(1) == "tonight" else relative.group(1)
+    else:
+        return time_entity
+    return f"{day} {time_entity}"
+
+
+def chosen_slot(session: UserSession, message: str) -> Optional[datetime]:
+    """The offered time a reply like "2" or "book 2" picks, if any."""
+    match = SLOT_CHOICE.match(message.strip().lower())
+    if match and session.service and 1 <= int(match.group(1)) <= len(session.offered):
+        return session.offered[int(match.group(1)) - 1]
+    return None
@@ -0,0 +1,43 @@
+"""Stand-ins shared by the tests (through conftest.py) and bench_load.py: a
+scratch environment for `main` and a fake OpenAI client. Needs neither pytest
+nor network access."""
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+
+def use_scratch_environment(database_name: str) -> str:
+    """Point `main` at a new database file in a temporary directory and give it
+    a placeholder OpenAI key if none is set. Call before importing `main`."""
+    path = os.path.join(tempfile.mkdtemp(), database_name)
+    os.environ["DATABASE_PATH"] = path
+    os.environ.setdefault("OPENAI_API_KEY", "test-key")
+    return path
+
+
+class StubOpenAI:
+    """Stands in for openai.AsyncOpenAI.
+
+    `reply` is the completion text, or a function from the last message's
+    content to it. Answers after `latency` seconds and records every prompt
+    it was sent in `prompts`.
+    """
+
+    def __init__(self, reply, latency: float = 0.0):
+        self.reply = reply
+        self.latency = latency
+        self.prompts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def calls(self) -> int:
+        return len(self.prompts)
+
+    async def create(self, **request):
+        prompt = request["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self.reply(prompt) if callable(self.reply) else self.reply
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
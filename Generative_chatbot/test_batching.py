@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+import main
+from batching import MicroBatcher
+from stubs import StubOpenAI
+from llm_client import AsyncLLMClient
+
+
+class RecordingModel:
+    """Batched 'model' that uppercases its inputs and records each batch it ran"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, items):
+        self.batches.append(list(items))
+        await asyncio.sleep(0.01)
+        return [item.upper() for item in items]
+
+
+def test_full_batches_flush_immediately():
+    model = RecordingModel()
+
+    async def run():
+        batcher = MicroBatcher(model, max_batch=4, max_wait=10.0)
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(f"m{i}") for i in range(8))), 1.0)
+
+    assert asyncio.run(run()) == [f"M{i}" for i in range(8)]
+    assert model.batches == [["m0", "m1", "m2", "m3"], ["m4", "m5", "m6", "m7"]]
+
+
+def test_partial_batch_flushes_after_max_wait():
+    model = RecordingModel()
+
+    async def run():
+        batcher = MicroBatcher(model, max_batch=100, max_wait=0.02)
+        first = await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+        second = await batcher.submit("c")
+        return first, second, batcher.stats()
+
+    first, second, stats = asyncio.run(run())
+    assert first == ["A", "B"] and second == "C"
+    assert model.batches == [["a", "b"], ["c"]]
+    assert stats["batches"] == 2 and stats["mean_batch_size"] == 1.5
+
+
+def test_batch_errors_reach_every_caller():
+    async def broken(items):
+        raise ValueError("model unavailable")
+
+    async def run():
+        batcher = MicroBatcher(broken, max_batch=2, max_wait=0.01)
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in asyncio.run(run()))
+
+
+def test_llm_batch_prompt_skips_cached_messages():
+    main.nlu_cache.clear()
+    main.nlu_cache.set("at noon", {"intent": "check_slots", "service": None, "time": "noon"})
+    stub = StubOpenAI(lambda prompt: json.dumps([
+        {"intent": "book_appointment", "service": None, "time": message} for message in json.loads(prompt)
+    ]))
+
+    results = asyncio.run(main.parse_intent_entities_batch(["at 3pm", "at noon", "at 5pm"], llm=AsyncLLMClient(stub)))
+
+    assert [r["time"] for r in results] == ["at 3pm", "noon", "at 5pm"]
+    assert [json.loads(prompt) for prompt in stub.prompts] == [["at 3pm", "at 5pm"]]
+    assert main.nlu_cache.get("at 5pm")["intent"] == "book_appointment"
+
+
+@pytest.mark.parametrize("content", ["not json", '[{"intent": "greeting"}]'])
+def test_llm_batch_falls_back_to_unknown_on_bad_output(content):
+    main.nlu_cache.clear()
+    results = asyncio.run(main.parse_intent_entities_batch(["hi", "book"], llm=AsyncLLMClient(StubOpenAI(content))))
+    assert [r["intent"] for r in results] == ["unknown", "unknown"]
@@ -0,0 +1,141 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+import database
+import main
+
+DAY = datetime(2031, 3, 4, 9)
+SLOTS = [DAY + timedelta(minutes=15 * i) for i in range(20)]
+
+
+def test_overlapping_booking_gets_409_with_next_free_time():
+    with TestClient(main.app) as client:
+        first = client.post("/booking", json={"user_id": "u1", "service": "haircut", "start_time": "2030-05-06T10:00:00"})
+        assert first.status_code == 200
+
+        clash = client.post("/booking", json={"user_id": "u2", "service": "haircut", "start_time": "2030-05-06T10:30:00"})
+        assert clash.status_code == 409
+        assert clash.json()["detail"]["next_available"] == "2030-05-06T11:00:00"
+
+        other_service = client.post("/booking", json={"user_id": "u2", "service": "facial", "start_time": "2030-05-06T10:30:00"})
+        assert other_service.status_code == 200
+
+        bad_time = client.post("/booking", json={"user_id": "u3", "service": "facial", "start_time": "half past ten"})
+        assert bad_time.status_code == 400
+
+
+def test_start_time_with_offset_is_booked_in_local_time():
+    local = datetime(2030, 5, 7, 14).astimezone()
+    with TestClient(main.app) as client:
+        offset = client.post("/booking", json={"user_id": "u1", "service": "facial", "start_time": local.isoformat()})
+        assert offset.status_code == 200
+        assert offset.json()["start_time"] == "2030-05-07T14:00:00"
+
+        utc = local.replace(hour=16).astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+        zulu = client.post("/booking", json={"user_id": "u1", "service": "facial", "start_time": utc})
+        assert zulu.status_code == 200
+        assert zulu.json()["start_time"] == "2030-05-07T16:00:00"
+
+        out_of_range = client.post("/booking", json={"user_id": "u1", "service": "facial",
+                                                      "start_time": "0001-01-01T10:00:00+05:00"})
+        assert out_of_range.status_code == 400
+
+
+def test_booking_endpoint_uses_opening_hours():
+    with TestClient(main.app) as client:
+        closed = client.post("/booking", json={"user_id": "u1", "service": "haircut", "start_time": "2030-05-07T18:30:00"})
+        assert closed.status_code == 400
+
+        last = client.post("/booking", json={"user_id": "u1", "service": "haircut", "start_time": "2030-05-07T18:00:00"})
+        assert last.status_code == 200
+        clash = client.post("/booking", json={"user_id": "u2", "service": "haircut", "start_time": "2030-05-07T18:00:00"})
+        assert clash.status_code == 409
+        assert clash.json()["detail"]["next_available"] == "2030-05-08T09:00:00"
+
+
+def test_next_free_start_skips_back_to_back_bookings(db_path):
+    conn = sqlite3.connect(db_path)
+    for hour in (10, 11, 12):
+        assert database.book_slot(conn, "u", "haircut", DAY.replace(hour=hour), 60)[0] is not None
+    booking_id, next_free = database.book_slot(conn, "u", "haircut", DAY.replace(hour=10, minute=30), 60)
+    assert booking_id is None
+    assert next_free == DAY.replace(hour=13)
+    conn.close()
+
+
+def hammer(path: str, seed: int, threads: int, attempts: int, results) -> None:
+    """Fire bookings at SLOTS from several threads, each with its own connection."""
+    outcomes = []
+
+    def worker(n: int) -> None:
+        rng = random.Random(seed * 100 + n)
+        conn = sqlite3.connect(path, timeout=30)
+        database.configure_connection(conn)
+        for i in range(attempts):
+            service = rng.choice(list(main.SERVICE_MINUTES))
+            booking_id, _ = database.book_slot(conn, f"user{seed}-{n}", service, rng.choice(SLOTS),
+                                               main.SERVICE_MINUTES[service])
+            outcomes.append(booking_id is not None)
+        conn.close()
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((sum(outcomes), len(outcomes)))
+
+
+def test_concurrent_bookings_never_overlap(db_path, monkeypatch):
+    # Spawned workers re-import this module by name; with the Saloon tests collected too,
+    # this app's directory has to come first for them to get its database and main
+    monkeypatch.syspath_prepend(os.path.dirname(os.path.abspath(__file__)))
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=hammer, args=(db_path, p, 4, 125, results)) for p in range(4)]
+    for process in processes:
+        process.start()
+    outcomes = [results.get(timeout=120) for _ in processes]
+    for process in processes:
+        process.join()
+
+    assert sum(total for _, total in outcomes) == 2000
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT service, start_time FROM bookings ORDER BY service, start_time").fetchall()
+    conn.close()
+    assert len(rows) == sum(booked for booked, _ in outcomes)
+
+    by_service = defaultdict(list)
+    for service, start_time in rows:
+        by_service[service].append(datetime.fromisoformat(start_time))
+    for service, starts in by_service.items():
+        length = timedelta(minutes=main.SERVICE_MINUTES[service])
+        for earlier, later in zip(starts, starts[1:]):
+            assert earlier + length <= later, f"{service} bookings at {earlier} and {later} overlap"
+
+
+def test_existing_double_bookings_skip_the_unique_index_instead_of_failing(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP INDEX ux_bookings_start_time_service")
+    for user in ("u1", "u2"):
+        conn.execute("INSERT INTO bookings (user_id, service, start_time) VALUES (?, 'haircut', '2024-01-15T10:00:00')",
+                     (user,))
+    conn.commit()
+
+    assert database.create_schema(conn) == [("2024-01-15T10:00:00", "haircut")]
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list('bookings')")}
+    assert "ux_bookings_start_time_service" not in indexes and "ix_bookings_start_time" in indexes
+    assert database.book_slot(conn, "u3", "haircut", datetime(2024, 1, 15, 10, 30), 60)[0] is None
+
+    conn.execute("DELETE FROM bookings WHERE user_id = 'u2'")
+    conn.commit()
+    assert database.create_schema(conn) == []
+    assert "ux_bookings_start_time_service" in {row[1] for row in conn.execute("PRAGMA index_list('bookings')")}
+    conn.close()
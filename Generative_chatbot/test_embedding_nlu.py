@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from embedding_nlu import DEFAULT_MODEL, extract_time
+from nlu import TieredNLU
+
+
+class FixedClassifier:
+    """Embedding tier that always gives the same answer"""
+
+    def __init__(self, confidence):
+        self.confidence = confidence
+        self.messages = []
+
+    def classify(self, message):
+        self.messages.append(message)
+        return {"intent": "check_slots", "service": None, "time": extract_time(message)}, self.confidence
+
+    def classify_batch(self, messages):
+        return [self.classify(message) for message in messages]
+
+
+async def llm(message):
+    return {"intent": "unknown", "service": None, "time": None}
+
+
+def test_extract_time():
+    assert extract_time("book a haircut at 3pm") == "3pm"
+    assert extract_time("anything at 10:30 tomorrow?") == "10:30"
+    assert extract_time("free on Friday afternoon") == "friday"
+    assert extract_time("book 2") is None
+
+
+def test_embedding_tier_sits_between_rules_and_llm():
+    confident = FixedClassifier(0.9)
+    nlu = TieredNLU(llm, threshold=0.8, embedding=confident)
+    assert asyncio.run(nlu.parse("hello"))["intent"] == "greeting"
+    assert asyncio.run(nlu.parse("when can I come in at 3pm"))["time"] == "3pm"
+    assert confident.messages == ["when can I come in at 3pm"]
+
+    unsure = TieredNLU(llm, threshold=0.8, embedding=FixedClassifier(0.4))
+    assert asyncio.run(unsure.parse("when can I come in"))["intent"] == "unknown"
+    tiers = unsure.stats()["tiers"]
+    assert tiers["embedding"]["requests"] == 0
+    assert tiers["llm"]["requests"] == 1
+
+
+def test_classifier_on_cached_model():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from embedding_nlu import EmbeddingIntentClassifier
+    try:
+        classifier = EmbeddingIntentClassifier(DEFAULT_MODEL)
+    except OSError:
+        pytest.skip(f"{DEFAULT_MODEL} is not in the local Hugging Face cache")
+
+    results = classifier.classify_batch(["hello there", "please cancel my appointment",
+                                         "what times are free tomorrow"])
+    assert [parsed["intent"] for parsed, _ in results] == ["greeting", "cancel_appointment", "check_slots"]
+    assert results[2][0]["time"] == "tomorrow"
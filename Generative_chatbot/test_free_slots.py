@@ -0,0 +1,85 @@
+import asyncio
+import sqlite3
+from datetime import date, datetime, time, timedelta
+
+from fastapi.testclient import TestClient
+
+import database
+import main
+from free_slots import SlotFinder
+from salon_calendar import BusinessCalendar
+from time_window import TimeWindow, parse_time_window
+
+MONDAY_MORNING = datetime(2030, 5, 6, 8)
+
+
+def test_parse_time_window():
+    def parse(text):
+        return parse_time_window(text, MONDAY_MORNING)
+
+    assert parse(None) == TimeWindow()
+    assert parse("tomorrow afternoon") == TimeWindow(date(2030, 5, 7), time(12), time(17))
+    assert parse("3pm") == TimeWindow(None, time(15), time(17))
+    assert parse("friday") == TimeWindow(date(2030, 5, 10))
+    assert parse("next monday at 10:30") == TimeWindow(date(2030, 5, 13), time(10, 30), time(12, 30))
+    assert parse("2030-06-01 09:00") == TimeWindow(date(2030, 6, 1), time(9), time(11))
+    assert parse("tonight") == TimeWindow(date(2030, 5, 6), time(17), time.max)
+    assert parse("whenever suits") == TimeWindow()
+
+
+def test_slot_finder_skips_overlaps_and_writes_through(db_path):
+    conn = sqlite3.connect(db_path)
+    database.book_slot(conn, "u", "haircut", datetime(2030, 5, 6, 10), 60)
+    database.book_slot(conn, "u", "facial", datetime(2030, 5, 6, 9), 45)
+    conn.close()
+
+    db = database.Database(db_path)
+    finder = SlotFinder(db, BusinessCalendar(horizon_days=100000), main.SERVICE_MINUTES)
+    morning = TimeWindow(date(2030, 5, 6), time(9), time(12))
+
+    async def scenario():
+        free = await finder.free_slots("haircut", morning, now=MONDAY_MORNING)
+        assert [t.time() for t in free] == [time(9), time(11), time(11, 30)]
+        finder.add("haircut", datetime(2030, 5, 6, 11))
+        free = await finder.free_slots("haircut", morning, now=MONDAY_MORNING)
+        assert [t.time() for t in free] == [time(9)]
+        finder.remove("haircut", datetime(2030, 5, 6, 11))
+        # With no service, a start is offered if any service is free then
+        free = await finder.free_slots(None, morning, limit=3, now=MONDAY_MORNING)
+        assert [t.time() for t in free] == [time(9), time(9, 30), time(10)]
+
+    asyncio.run(scenario())
+    assert finder.stats()["misses"] == 3 and finder.stats()["hits"] == 2
+    db.close()
+
+
+def test_chat_offers_free_slots_for_the_requested_time():
+    tomorrow = date.today() + timedelta(days=1)
+    message = "any haircut slots tomorrow morning?"
+    main.nlu_cache.set(message, {"intent": "check_slots", "service": "haircut", "time": f"{tomorrow} morning"})
+    with TestClient(main.app) as client:
+        booked = client.post("/booking", json={"user_id": "u1", "service": "Haircut", "start_time": f"{tomorrow}T09:00:00"})
+        assert booked.status_code == 200 and booked.json()["service"] == "haircut"
+
+        reply = client.post("/chat/message", json={"user_id": "u2", "message": message}).json()["reply"]
+        assert "09:00" not in reply and "09:30" not in reply
+        assert tomorrow.strftime("%a %d %b 10:00") in reply
+        assert "11:30" in reply and "12:00" not in reply
+
+        client.delete(f"/bookings/{booked.json()['booking_id']}")
+        reply = client.post("/chat/message", json={"user_id": "u2", "message": message}).json()["reply"]
+        assert tomorrow.strftime("%a %d %b 09:00") in reply
+
+
+def test_deleting_a_legacy_booking_with_a_non_iso_start_time():
+    def insert_legacy(conn):
+        with conn:
+            return conn.execute("INSERT INTO bookings (user_id, service, start_time) VALUES (?, ?, ?)",
+                                ("legacy", "facial", "next tuesday 3pm")).lastrowid
+
+    with TestClient(main.app) as client:
+        booking_id = main.db.call(insert_legacy)
+        deleted = client.delete(f"/bookings/{booking_id}")
+        assert deleted.status_code == 200
+        assert client.delete(f"/bookings/{booking_id}").status_code == 404
+        assert main.slot_finder.stats()["days_cached"] == 0
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from llm_client import AsyncLLMClient
+
+REQUEST = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hi"}]}
+
+
+class FakeOpenAI(ThreadingHTTPServer):
+    """Local stand-in for the chat completions API.
+
+    Answers after `delay` seconds, fails the first `failures` requests with a
+    500, and records how many requests it saw and how many overlapped.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0, failures: int = 0):
+        super().__init__(("127.0.0.1", 0), FakeHandler)
+        self.delay = delay
+        self.failures = failures
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        pass  # clients that timed out hang up before the reply is written
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            server.requests += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            fail = server.requests <= server.failures
+        time.sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        if fail:
+            self.send_response(500)
+            body = json.dumps({"error": {"message": "overloaded"}}).encode()
+        else:
+            self.send_response(200)
+            body = json.dumps({
+                "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": '{"intent": "greeting"}'}}],
+            }).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_openai():
+    servers = []
+
+    def start(**options):
+        server = FakeOpenAI(**options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(server: FakeOpenAI, **options) -> AsyncLLMClient:
+    sdk = openai.AsyncOpenAI(api_key="test-key", base_url=server.base_url, max_retries=0)
+    return AsyncLLMClient(sdk, backoff=0.01, **options)
+
+
+def test_identical_messages_in_flight_share_one_call(fake_openai):
+    server = fake_openai(delay=0.2)
+    llm = make_client(server)
+
+    async def burst():
+        return await asyncio.gather(*(llm.create("hi", **REQUEST) for _ in range(10)))
+
+    responses = asyncio.run(burst())
+    assert all(r.choices[0].message.content == '{"intent": "greeting"}' for r in responses)
+    assert server.requests == 1
+    assert llm.stats()["coalesced"] == 9
+
+
+def test_concurrency_is_capped(fake_openai):
+    server = fake_openai(delay=0.1)
+    llm = make_client(server, max_concurrency=2)
+
+    async def burst():
+        await asyncio.gather(*(llm.create(f"message {i}", **REQUEST) for i in range(6)))
+
+    asyncio.run(burst())
+    assert server.requests == 6
+    assert server.max_active == 2
+
+
+def test_server_errors_are_retried(fake_openai):
+    server = fake_openai(failures=2)
+    llm = make_client(server, retries=2)
+
+    response = asyncio.run(llm.create("hi", **REQUEST))
+    assert response.choices[0].message.content == '{"intent": "greeting"}'
+    assert server.requests == 3
+    assert llm.stats()["retried"] == 2
+
+
+def test_slow_calls_time_out_without_blocking_the_loop(fake_openai):
+    server = fake_openai(delay=1.0)
+    llm = make_client(server, timeout=0.1, retries=1)
+
+    async def call_while_ticking():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        beat = asyncio.create_task(ticker())
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await llm.create("hi", **REQUEST)
+        finally:
+            beat.cancel()
+        return ticks
+
+    start = time.perf_counter()
+    ticks = asyncio.run(call_while_ticking())
+    assert time.perf_counter() - start < 0.9
+    assert ticks > 5
+    assert llm.stats()["failures"] == 1
@@ -0,0 +1,41 @@
+import asyncio
+
+import bench_load
+import loadtest
+import main
+
+
+def test_scripted_conversations_under_load():
+    llm_client = main.llm_client
+    stub = bench_load.stub_llm(main, latency=0.01)
+
+    async def scenario():
+        async with loadtest.in_process_client(main.app) as client:
+            return await loadtest.run_load(client, bench_load.conversation, conversations=12, concurrency=4,
+                                           warmup=2)
+
+    try:
+        results = asyncio.run(scenario())
+    finally:
+        main.llm_client = llm_client
+
+    assert results["failures"] == {}
+    assert results["overall"]["conversations"] == 12
+    chat = results["endpoints"]["POST /chat/message"]
+    assert chat["requests"] >= 12 * 4 and chat["p50_ms"] <= chat["p95_ms"] <= chat["p99_ms"]
+    assert set(results["steps"]) >= {"greeting", "services", "select", "book"}
+    assert stub.calls >= 1
+
+    assert loadtest.compare(results, results, tolerance=0.0) == []
+    slower = {"endpoints": {"POST /chat/message": {**chat, "p99_ms": chat["p99_ms"] * 2}}}
+    assert loadtest.compare(slower, results, tolerance=0.25) == [
+        f"POST /chat/message p99_ms {chat['p99_ms']} -> {chat['p99_ms'] * 2}"
+    ]
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert [loadtest.percentile(values, q) for q in (0.5, 0.95, 0.99)] == [50, 95, 99]
+    assert loadtest.percentile([7], 0.99) == 7
+    # 0.95 * 12 = 11.4: nearest rank takes the 12th value, where rounding would give the 11th
+    assert loadtest.percentile(list(range(1, 13)), 0.95) == 12
@@ -0,0 +1,66 @@
+import json
+import logging
+import queue
+
+import saloon_shared  # noqa: F401  (puts the Saloon modules on sys.path)
+import logs
+
+
+def capture(name: str, debug_sample: float, size: int = 100):
+    """A "salon.<name>" logger whose records stay in a queue instead of reaching the listener."""
+    handler = logs.DroppingQueueHandler(queue.Queue(size))
+    handler.addFilter(logs.ContextFilter(debug_sample))
+    logger = logs.get_logger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger, handler
+
+
+def formatted(handler) -> list:
+    records = []
+    while not handler.queue.empty():
+        records.append(json.loads(logs.JsonFormatter().format(handler.queue.get_nowait())))
+    return records
+
+
+def test_records_are_json_with_fields_and_correlation_ids():
+    logger, handler = capture("test-json", debug_sample=0.0)
+    with logs.bind(user_id="u1"):
+        logger.info("parsed %s", "ok", extra={"intent": "greeting", "service": None})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    logger.info("outside")
+
+    inside, error, outside = formatted(handler)
+    assert inside["event"] == "parsed ok" and inside["level"] == "info" and inside["logger"] == "salon.test-json"
+    assert (inside["intent"], inside["service"], inside["user_id"]) == ("greeting", None, "u1")
+    assert error["request_id"] == inside["request_id"] and "ValueError: boom" in error["exc"]
+    assert "user_id" not in outside and "request_id" not in outside
+    assert not any(key.startswith("_") for key in inside)
+
+
+def test_debug_events_are_sampled_per_request(monkeypatch):
+    logger, handler = capture("test-sampling", debug_sample=0.0)
+    logger.debug("dropped outside a request")
+    monkeypatch.setattr(logs._filter, "debug_sample", 1.0)
+    with logs.bind(user_id="kept"):
+        logger.debug("first")
+        logger.debug("second")
+    monkeypatch.setattr(logs._filter, "debug_sample", 0.0)
+    with logs.bind(user_id="skipped"):
+        logger.debug("never")
+        logger.warning("always")
+    assert [(r["event"], r["user_id"]) for r in formatted(handler)] == [
+        ("first", "kept"), ("second", "kept"), ("always", "skipped")
+    ]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    logger, handler = capture("test-full", debug_sample=1.0, size=2)
+    for i in range(5):
+        logger.info("event %d", i)
+    assert handler.dropped == 3
+    assert [r["event"] for r in formatted(handler)] == ["event 0", "event 1"]
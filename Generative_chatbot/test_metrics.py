@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+
+import main
+import metrics
+
+
+def sample(text: str, name: str) -> float:
+    """Value of the exposition line starting with `name` (including its labels)."""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_reports_routes_stages_and_queries():
+    message = "any facial slots for tomorrow morning?"
+    main.nlu_cache.set(message, {"intent": "check_slots", "service": "facial", "time": "tomorrow morning"})
+    main.slot_finder.invalidate()
+    with TestClient(main.app) as client:
+        before = client.get("/metrics").text
+        reply = client.post("/chat/message", json={"user_id": "metrics-user", "message": message}).json()["reply"]
+        assert (date.today() + timedelta(days=1)).strftime("%a %d %b") in reply
+        client.get("/bookings/metrics-user")
+        client.get("/no-such-page")
+        text = client.get("/metrics").text
+
+    chat = 'http_requests_total{method="POST",route="/chat/message",status="200"}'
+    assert sample(text, chat) == sample(before, chat) + 1
+    assert sample(text, 'http_requests_total{method="GET",route="/bookings/{user_id}",status="200"}') >= 1
+    assert sample(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') >= 1
+    for stage in ("intent", "availability"):
+        count = f'stage_duration_seconds_count{{stage="{stage}"}}'
+        assert sample(text, count) == sample(before, count) + 1
+    # Session lookup and the facial's booked times: at least two round trips to SQLite
+    queries = 'db_queries_per_request_sum{route="/chat/message"}'
+    assert sample(text, queries) - sample(before, queries) >= 2
+    assert sample(text, "sessions_active") >= 1
+    assert "# TYPE http_request_duration_seconds histogram" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    histogram = registry.histogram("h", "test", ("route",), buckets=(1, 5))
+    for value in (0.5, 3, 3, 9):
+        histogram.observe(value, "/x")
+    text = registry.render()
+    assert 'h_bucket{route="/x",le="1"} 1' in text
+    assert 'h_bucket{route="/x",le="5"} 3' in text
+    assert 'h_bucket{route="/x",le="+Inf"} 4' in text
+    assert 'h_count{route="/x"} 4' in text and 'h_sum{route="/x"} 15.5' in text
@@ -0,0 +1,69 @@
+import asyncio
+from nlu import LocalIntentClassifier, TierStats, TieredNLU
+
+
+class StubParser:
+    """Stands in for parse_intent_entities and records the messages it was asked about"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+        return {"intent": "book_appointment", "service": "haircut", "time": "15:00"}
+
+
+def test_local_classifier_labels_simple_messages():
+    local = LocalIntentClassifier()
+    assert local.classify("Hello!")[0]["intent"] == "greeting"
+    assert local.classify("what services do you offer")[0]["intent"] == "ask_services"
+    assert local.classify("hi, I'd like a facial")[0] == {"intent": "book_appointment", "service": "facial", "time": None}
+    assert local.classify("show me your available slots")[0]["intent"] == "check_slots"
+    assert local.classify("this is something else")[1] == 0.0
+
+
+def test_low_confidence_messages_escalate():
+    local = LocalIntentClassifier()
+    threshold = 0.8
+    assert local.classify("hello")[1] >= threshold
+    assert local.classify("book a haircut tomorrow at 3pm")[1] < threshold
+    assert local.classify("I don't want a haircut")[1] < threshold
+    assert local.classify("cancel and book a facial")[1] < threshold
+
+
+def test_tiered_pipeline_routes_and_reports_stats():
+    llm = StubParser()
+    nlu = TieredNLU(llm, threshold=0.8)
+
+    assert asyncio.run(nlu.parse("hey"))["intent"] == "greeting"
+    assert asyncio.run(nlu.parse("what services do you offer"))["intent"] == "ask_services"
+    assert asyncio.run(nlu.parse("book a haircut at 3pm"))["time"] == "15:00"
+    assert llm.messages == ["book a haircut at 3pm"]
+
+    stats = nlu.stats()["tiers"]
+    assert stats["local"]["requests"] == 2
+    assert stats["llm"]["requests"] == 1
+    assert abs(stats["local"]["share"] - 2 / 3) < 1e-9
+    assert stats["llm"]["latency_ms"]["p50"] >= 0
+
+
+def test_threshold_above_one_disables_local_tier():
+    llm = StubParser()
+    nlu = TieredNLU(llm, threshold=1.1)
+    asyncio.run(nlu.parse("hello"))
+    assert llm.messages == ["hello"]
+    assert nlu.stats()["tiers"]["local"]["requests"] == 0
+
+
+def test_tier_latency_uses_nearest_rank_percentiles():
+    stats = TierStats()
+    for ms in (10, 40):
+        stats.record(ms / 1000)
+    latency = stats.snapshot(2)["latency_ms"]
+    assert (latency["p50"], latency["p95"]) == (10.0, 40.0)
+
+    stats = TierStats()
+    for ms in range(1, 21):
+        stats.record(ms / 1000)
+    latency = stats.snapshot(20)["latency_ms"]
+    assert (round(latency["p50"]), round(latency["p95"])) == (10, 19)
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+import main
+from stubs import StubOpenAI
+from llm_client import AsyncLLMClient
+from nlu_cache import NLUCache, normalize_message
+
+
+def test_normalize_message():
+    assert normalize_message("  Hi!! ") == "hi"
+    assert normalize_message("What services do you offer?") == normalize_message("what services  do you offer")
+
+
+def test_repeated_phrasings_skip_the_llm():
+    main.nlu_cache.clear()
+    stub = StubOpenAI('{"intent": "greeting", "service": null, "time": null}')
+    llm = AsyncLLMClient(stub)
+    hits_before = main.nlu_cache.stats()["memory_hits"]
+
+    first = asyncio.run(main.parse_intent_entities("Hi!", llm=llm))
+    second = asyncio.run(main.parse_intent_entities("hi", llm=llm))
+    third = asyncio.run(main.parse_intent_entities("  HI ", llm=llm))
+
+    assert first == second == third == {"intent": "greeting", "service": None, "time": None}
+    assert stub.calls == 1
+    assert main.nlu_cache.stats()["memory_hits"] - hits_before == 2
+
+
+def test_failed_parses_are_not_cached():
+    main.nlu_cache.clear()
+    broken = AsyncLLMClient(StubOpenAI("not json"))
+    assert asyncio.run(main.parse_intent_entities("book a haircut", llm=broken))["intent"] == "unknown"
+
+    working = StubOpenAI('{"intent": "book_appointment", "service": "haircut", "time": null}')
+    assert asyncio.run(main.parse_intent_entities("book a haircut", llm=AsyncLLMClient(working)))["service"] == "haircut"
+    assert working.calls == 1
+
+
+def test_lru_eviction_and_ttl():
+    cache = NLUCache(max_size=2, ttl=60)
+    cache.set("a", {"intent": "greeting"})
+    cache.set("b", {"intent": "greeting"})
+    cache.get("a")
+    cache.set("c", {"intent": "greeting"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    expired = NLUCache(ttl=0)
+    expired.set("hello", {"intent": "greeting"})
+    assert expired.get("hello") is None
+
+
+def test_disk_tier_survives_restart():
+    path = os.path.join(tempfile.mkdtemp(), "nlu_cache.db")
+    NLUCache(path=path).set("What services do you offer?", {"intent": "ask_services", "service": None, "time": None})
+
+    restarted = NLUCache(path=path)
+    assert restarted.get("what services do you offer")["intent"] == "ask_services"
+    assert restarted.stats()["disk_hits"] == 1
+    assert restarted.get("what services do you offer") is not None
+    assert restarted.stats()["memory_hits"] == 1
+
+
+def test_async_lookups_keep_the_disk_tier_off_the_event_loop():
+    path = os.path.join(tempfile.mkdtemp(), "nlu_cache.db")
+    cache = NLUCache(path=path)
+    disk_threads = []
+    for name in ("_disk_get", "_disk_set"):
+        original = getattr(cache, name)
+
+        def recorded(*args, original=original):
+            disk_threads.append(threading.get_ident())
+            return original(*args)
+
+        setattr(cache, name, recorded)
+
+    async def scenario():
+        await cache.aset("book a facial", {"intent": "book_appointment", "service": "facial", "time": None})
+        assert (await cache.aget("book a facial"))["service"] == "facial"
+        assert await NLUCache(path=path).aget("book a facial") is not None
+        assert await cache.aget("never seen") is None
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(disk_threads) == 2 and loop_thread not in disk_threads
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+import database
+import main
+from sessions import UserSession, UserSessionStore, with_previous_day
+
+
+def stored_sessions(db: database.Database) -> set:
+    return {row[0] for row in db.call(lambda conn: conn.execute("SELECT user_id FROM sessions").fetchall())}
+
+
+def test_write_behind_flushes_in_batches_and_reloads_from_disk(db_path):
+    db = database.Database(db_path)
+
+    async def scenario():
+        store = UserSessionStore(db, max_size=1, flush_size=3)
+        for user in ("a", "b"):
+            session = await store.get(user)
+            session.remember("haircut tomorrow", {"intent": "check_slots", "service": "haircut", "time": "tomorrow"})
+            store.save(session)
+        # Nothing written yet; "a" left the LRU but is still served from the dirty set
+        assert stored_sessions(db) == set()
+        assert (await store.get("a")).service == "haircut"
+        assert store.stats()["memory_hits"] == 1
+
+        store.save(await store.get("c"))
+        await asyncio.sleep(0.05)
+        assert stored_sessions(db) == {"a", "b", "c"}
+        assert store.stats()["flushes"] == 1 and store.stats()["flushed"] == 3
+
+        restarted = UserSessionStore(db)
+        reloaded = await restarted.get("b")
+        assert (reloaded.intent, reloaded.service, reloaded.time) == ("check_slots", "haircut", "tomorrow")
+        assert list(reloaded.turns) == [("haircut tomorrow", "check_slots")]
+        assert restarted.stats()["disk_hits"] == 1
+
+    asyncio.run(scenario())
+    db.close()
+
+
+def test_session_round_trips_offered_slots():
+    session = UserSession("u", "book_appointment", "facial", None, [datetime(2030, 5, 6, 9, 30)], [("book a facial", "book_appointment")])
+    copy = UserSession.from_dict("u", session.to_dict(), 1.0)
+    assert copy.offered == session.offered and list(copy.turns) == list(session.turns)
+
+
+def test_follow_ups_reuse_entities_and_book_an_offered_slot():
+    tomorrow = date.today() + timedelta(days=1)
+    first = "haircut slots for tomorrow morning?"
+    main.nlu_cache.set(first, {"intent": "check_slots", "service": "haircut", "time": "tomorrow morning"})
+    user = "session-test-user"
+    with TestClient(main.app) as client:
+        def say(message):
+            return client.post("/chat/message", json={"user_id": user, "message": message}).json()["reply"]
+
+        say(first)
+        llm_calls = main.nlu.tiers["llm"].requests
+        follow_ups = main.sessions.stats()["follow_ups"]
+
+        reply = say("what about tomorrow afternoon?")
+        assert f"2) {tomorrow.strftime('%a %d %b')} 12:30" in reply
+        assert main.nlu.tiers["llm"].requests == llm_calls
+        assert main.sessions.stats()["follow_ups"] == follow_ups + 1
+
+        assert "You're booked" in say("2")
+        bookings = client.get(f"/bookings/{user}").json()["bookings"]
+        assert [(b["service"], b["start_time"]) for b in bookings] == [("haircut", f"{tomorrow}T12:30:00")]
+        client.delete(f"/bookings/{bookings[0]['id']}")
+
+
+def test_time_of_day_follow_up_keeps_the_day_asked_about():
+    tomorrow = date.today() + timedelta(days=1)
+    first = "facial slots for tomorrow morning?"
+    main.nlu_cache.set(first, {"intent": "check_slots", "service": "facial", "time": "tomorrow morning"})
+    user = "session-day-user"
+    with TestClient(main.app) as client:
+        def say(message):
+            return client.post("/chat/message", json={"user_id": user, "message": message}).json()["reply"]
+
+        say(first)
+        reply = say("what about the afternoon?")
+        assert f"1) {tomorrow.strftime('%a %d %b')} 12:00" in reply
+        assert main.sessions._hot[user].time == "tomorrow afternoon"
+
+        assert "You're booked" in say("1")
+        bookings = client.get(f"/bookings/{user}").json()["bookings"]
+        assert [(b["service"], b["start_time"]) for b in bookings] == [("facial", f"{tomorrow}T12:00:00")]
+        client.delete(f"/bookings/{bookings[0]['id']}")
+
+
+def test_follow_up_day_comes_from_the_previous_time_only_when_missing():
+    previous = "Friday morning"
+    assert with_previous_day("afternoon", previous) == "friday afternoon"
+    assert with_previous_day("3pm", "2030-05-06 10:00") == "2030-05-06 3pm"
+    assert with_previous_day("evening", "tonight") == "today evening"
+    assert with_previous_day("tomorrow afternoon", previous) == "tomorrow afternoon"
+    assert with_previous_day("afternoon", "morning") == "afternoon"
+    assert with_previous_day("afternoon", None) == "afternoon"
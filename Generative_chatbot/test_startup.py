@@ -0,0 +1,43 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def app_env(workdir):
+    return dict(os.environ, OPENAI_API_KEY="test-key", DATABASE_PATH=os.path.join(workdir, "bookings.db"))
+
+
+def test_import_defers_openai_and_database_setup():
+    workdir = tempfile.mkdtemp()
+    check = "import sys, main; print('openai' in sys.modules, 'torch' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", check], cwd=APP_DIR, env=app_env(workdir),
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False"]
+    assert not os.path.exists(os.path.join(workdir, "bookings.db"))
+
+
+def test_lifespan_creates_schema_and_warmup_loads_openai():
+    workdir = tempfile.mkdtemp()
+    script = """
+from fastapi.testclient import TestClient
+import json, sys, main
+with TestClient(main.app) as client:
+    response = client.post("/warmup")
+    print(json.dumps({"status": response.status_code, "body": response.json(), "openai": "openai" in sys.modules}))
+"""
+    result = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, env=app_env(workdir),
+                            capture_output=True, text=True, check=True)
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome["status"] == 200
+    assert set(outcome["body"]["warmed"]) == {"database", "openai"}
+    assert outcome["openai"]
+
+    conn = sqlite3.connect(os.path.join(workdir, "bookings.db"))
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    conn.close()
+    assert "bookings" in tables
@@ -0,0 +1,89 @@
+import re
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple, Optional
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Parts of the day, as [start, end) times
+PERIODS = {
+    'morning': (time(0), time(12)),
+    'noon': (time(12), time(13)),
+    'afternoon': (time(12), time(17)),
+    'evening': (time(17), time.max),
+    'tonight': (time(17), time.max),
+}
+
+# A specific clock time shows the slots from then until this much later
+CLOCK_WINDOW = timedelta(hours=2)
+
+ISO_DATE = re.compile(r'\b(\d{4}-\d{2}-\d{2})(?:[ t](\d{1,2}:\d{2}))?')
+RELATIVE_DAY = re.compile(r'\b(today|tonight|tomorrow|(next )?(' + '|'.join(WEEKDAYS) + r'))\b')
+CLOCK = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b')
+PERIOD = re.compile(r'\b(' + '|'.join(PERIODS) + r')\b')
+
+
+class TimeWindow(NamedTuple):
+    """A day (None: any upcoming day) and the [start, end) part of it a customer asked about."""
+    day: Optional[date] = None
+    start: time = time.min
+    end: time = time.max
+
+    def contains(self, when: datetime) -> bool:
+        return (self.day is None or when.date() == self.day) and self.start <= when.time() < self.end
+
+
+def parse_time_window(text: Optional[str], now: Optional[datetime] = None) -> TimeWindow:
+    """Read the `time` entity from intent parsing ("tomorrow afternoon", "3pm", "next friday",
+    "2030-05-06 10:00") into a TimeWindow; whatever is not understood is left open."""
+    if not text:
+        return TimeWindow()
+    text = text.lower()
+    today = (now or datetime.now()).date()
+    day: Optional[date] = None
+    start, end = time.min, time.max
+
+    iso = ISO_DATE.search(text)
+    relative = RELATIVE_DAY.search(text)
+    if iso:
+        try:
+            day = date.fromisoformat(iso.group(1))
+        except ValueError:
+            pass
+    elif relative:
+        word = relative.group(1)
+        if word in ('today', 'tonight'):
+            day = today
+        elif word == 'tomorrow':
+            day = today + timedelta(days=1)
+        else:
+            ahead = (WEEKDAYS.index(relative.group(3)) - today.weekday()) % 7
+            # "friday" on a Friday is today; "next friday" is a week later
+            day = today + timedelta(days=ahead or (7 if relative.group(2) else 0))
+
+    clock = _clock_time(text, iso)
+    period = PERIOD.search(text)
+    if clock is not None:
+        start = clock
+        later = datetime.combine(today, clock) + CLOCK_WINDOW
+        end = later.time() if later.date() == today else time.max
+    elif period:
+        start, end = PERIODS[period.group(1)]
+    return TimeWindow(day, start, end)
+
+
+def _clock_time(text: str, iso) -> Optional[time]:
+    if iso and iso.group(2):
+        hour, minute = (int(part) for part in iso.group(2).split(':'))
+    else:
+        match = CLOCK.search(ISO_DATE.sub(' ', text))
+        if not match:
+            return None
+        if match.group(3):
+            hour, minute = int(match.group(1)) % 12, int(match.group(2) or 0)
+            if match.group(3) == 'pm':
+                hour += 12
+        else:
+            hour, minute = int(match.group(4)), int(match.group(5))
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
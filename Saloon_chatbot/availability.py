@@ -0,0 +1,261 @@
+import threading
+import time as clock
+from bisect import insort
+from datetime import date, datetime, time, timedelta
+from functools import reduce
+from operator import or_
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import select
+from models import Booking
+from salon_calendar import SLOT, SLOT_MINUTES, SLOTS_PER_DAY, BusinessCalendar
+
+# (start, end, resource_id) of one booking
+Interval = Tuple[datetime, datetime, int]
+
+
+def slots_needed(duration: int) -> int:
+    return -(-duration // SLOT_MINUTES)
+
+
+def slot_mask(start: datetime, end: datetime, day: date) -> int:
+    """Bits of `day`'s slots that [start, end) touches; off-grid times round outwards."""
+    midnight = datetime.combine(day, time.min)
+    first = max(0, (start - midnight) // SLOT)
+    last = min(SLOTS_PER_DAY, -((midnight - end) // SLOT))
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def run_starts(free: int, length: int) -> int:
+    """Bit i set where slots i .. i + length - 1 are all set in `free`.
+
+    Doubles the covered run length with each shift, so a run of n slots
+    costs about log2(n) shift-and-ANDs.
+    """
+    covered = 1
+    while covered < length:
+        step = min(covered, length - covered)
+        free &= free >> step
+        covered += step
+    return free
+
+
+class ResourceCalendar:
+    """Busy time of every resource (chair or stylist) as one int bitset per day.
+
+    Bit i of a day's mask is the i-th SLOT_MINUTES slot after midnight, the
+    same indexing as the business calendar's DayGrid. Where a service fits is
+    a few shift-and-ANDs per resource and day, however many bookings there
+    are, over the slots the salon is open. OR-ing those over the resources
+    gives every start some resource can take; the lowest set bit is the
+    earliest. Those per-day results are memoised per run length until the day
+    changes.
+    """
+
+    def __init__(self, resources: int = 1, business: Optional[BusinessCalendar] = None):
+        self.resources = resources
+        self.business = business or BusinessCalendar()
+        self.days: Dict[date, List[int]] = {}
+        self._fits: Dict[Tuple[date, int], Tuple[List[int], int]] = {}
+
+    def add(self, start: datetime, end: datetime, resource_id: int = 1) -> None:
+        if not 1 <= resource_id <= self.resources:
+            return
+        day = start.date()
+        masks = self.days.setdefault(day, [0] * self.resources)
+        masks[resource_id - 1] |= slot_mask(start, end, day)
+        for key in [key for key in self._fits if key[0] == day]:
+            del self._fits[key]
+
+    def fits(self, day: date, duration: int) -> List[int]:
+        """Per resource, the slots of `day` where `duration` minutes fit within opening hours."""
+        free_all = self.business.grid(day).mask
+        length = slots_needed(duration)
+        masks = self.days.get(day)
+        if masks is None:
+            return [run_starts(free_all, length)] * self.resources
+        return [run_starts(free_all & ~busy, length) for busy in masks]
+
+    def free_starts(self, days: Iterable[date], duration: int,
+                    after: Optional[datetime] = None) -> Iterator[Tuple[datetime, int]]:
+        """Yield (start, resource_id) in time order for every start some resource can take,
+        from `after` onwards if given."""
+        length = slots_needed(duration)
+        for day in days:
+            key = (day, length)
+            if key not in self._fits:
+                fits = self.fits(day, duration)
+                self._fits[key] = (fits, reduce(or_, fits, 0))
+            fits, starts = self._fits[key]
+            grid = self.business.grid(day)
+            if after is not None:
+                starts &= grid.starting_from(after)
+            while starts:
+                lowest = starts & -starts
+                resource = next(r for r, mask in enumerate(fits) if mask & lowest)
+                yield grid.slot_time(lowest.bit_length() - 1), resource + 1
+                starts ^= lowest
+
+
+def _intervals_query(start: datetime, end: datetime, durations: Dict[str, int]):
+    longest = max(durations.values(), default=SLOT_MINUTES)
+    return (
+        select(Booking.slot_time, Booking.service, Booking.resource_id)
+        .where(Booking.slot_time > start - timedelta(minutes=longest))
+        .where(Booking.slot_time < end)
+    )
+
+
+def _to_intervals(rows, durations: Dict[str, int]) -> List[Interval]:
+    return [
+        (slot_time, slot_time + timedelta(minutes=durations.get(service, SLOT_MINUTES)), resource_id)
+        for slot_time, service, resource_id in rows
+    ]
+
+
+def conflict_query(slot_time: datetime, duration: int, durations: Dict[str, int], exclude_id: Optional[int] = None):
+    """Bookings that may overlap [slot_time, slot_time + duration); narrow with `busy_resources`."""
+    query = _intervals_query(slot_time, slot_time + timedelta(minutes=duration), durations)
+    if exclude_id is not None:
+        query = query.where(Booking.id != exclude_id)
+    return query
+
+
+def busy_resources(rows, slot_time: datetime, durations: Dict[str, int]) -> Set[int]:
+    """Resources with a `conflict_query` booking still running at `slot_time`."""
+    return {resource_id for _, end, resource_id in _to_intervals(rows, durations) if end > slot_time}
+
+
+def load_calendar(db, start: datetime, end: datetime, durations: Dict[str, int], resources: int = 1,
+                  business: Optional[BusinessCalendar] = None) -> ResourceCalendar:
+    """Load every booking overlapping [start, end) into a calendar with one range query.
+
+    Bookings only store their start time and service name, so the end of each
+    booking comes from the service catalogue (`durations` maps name -> minutes).
+    """
+    calendar = ResourceCalendar(resources, business)
+    for interval in _to_intervals(db.execute(_intervals_query(start, end, durations)).all(), durations):
+        calendar.add(*interval)
+    return calendar
+
+
+class _CachedDay:
+    __slots__ = ('loaded_at', 'intervals', 'masks')
+
+    def __init__(self, loaded_at: float, intervals: List[Interval]):
+        self.loaded_at = loaded_at
+        self.intervals = intervals
+        self.masks: Optional[List[int]] = None
+
+
+class AvailabilityCache:
+    """Process-wide cache of bookings per day, kept as intervals and as resource bitsets.
+
+    Bookings made or deleted through this process are written through with
+    `add` / `remove`. Days are reloaded once they are older than `ttl` seconds,
+    which bounds how long a booking written by another worker can go unseen.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_days: int = 120, resources: int = 1,
+                 business: Optional[BusinessCalendar] = None):
+        self.ttl = ttl
+        self.max_days = max_days
+        self.resources = resources
+        self.business = business or BusinessCalendar()
+        self.hits = 0
+        self.misses = 0
+        self._days: Dict[date, _CachedDay] = {}
+        self._lock = threading.Lock()
+
+    def booked(self, db, days: List[date], durations: Dict[str, int]) -> ResourceCalendar:
+        """Calendar of `days`, querying the database only for missing or expired days."""
+        now, calendar, missing = self._lookup(days)
+        if missing:
+            rows = db.execute(self._missing_query(missing, durations)).all()
+            self._fill(now, calendar, missing, _to_intervals(rows, durations))
+        return calendar
+
+    async def abooked(self, db, days: List[date], durations: Dict[str, int]) -> ResourceCalendar:
+        """`booked` for an AsyncSession."""
+        now, calendar, missing = self._lookup(days)
+        if missing:
+            rows = (await db.execute(self._missing_query(missing, durations))).all()
+            self._fill(now, calendar, missing, _to_intervals(rows, durations))
+        return calendar
+
+    def _lookup(self, days: List[date]):
+        now = clock.monotonic()
+        calendar = ResourceCalendar(self.resources, self.business)
+        with self._lock:
+            self._evict(now)
+            for day in days:
+                entry = self._days.get(day)
+                if entry and now - entry.loaded_at < self.ttl:
+                    calendar.days[day] = list(self._masks(entry))
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return now, calendar, [day for day in days if day not in calendar.days]
+
+    def _masks(self, entry: _CachedDay) -> List[int]:
+        if entry.masks is None:
+            day = ResourceCalendar(self.resources, self.business)
+            for interval in entry.intervals:
+                day.add(*interval)
+            entry.masks = next(iter(day.days.values()), [0] * self.resources)
+        return entry.masks
+
+    def _missing_query(self, missing: List[date], durations: Dict[str, int]):
+        start = datetime.combine(min(missing), time.min)
+        end = datetime.combine(max(missing) + timedelta(days=1), time.min)
+        return _intervals_query(start, end, durations)
+
+    def _fill(self, now: float, calendar: ResourceCalendar, missing: List[date], loaded_intervals: List[Interval]) -> None:
+        loaded: Dict[date, List[Interval]] = {day: [] for day in missing}
+        # Each day caches the bookings that start on it; the range query's
+        # look-back also returns the previous evening, which is skipped here.
+        for interval in sorted(loaded_intervals):
+            if interval[0].date() in loaded:
+                loaded[interval[0].date()].append(interval)
+        with self._lock:
+            for day in missing:
+                entry = _CachedDay(now, loaded[day])
+                self._days[day] = entry
+                calendar.days[day] = list(self._masks(entry))
+
+    def add(self, slot_time: datetime, duration: int, resource_id: int = 1) -> None:
+        with self._lock:
+            entry = self._days.get(slot_time.date())
+            if entry:
+                insort(entry.intervals, (slot_time, slot_time + timedelta(minutes=duration), resource_id))
+                entry.masks = None
+
+    def remove(self, slot_time: datetime, duration: int, resource_id: int = 1) -> None:
+        with self._lock:
+            entry = self._days.get(slot_time.date())
+            if entry:
+                interval = (slot_time, slot_time + timedelta(minutes=duration), resource_id)
+                if interval in entry.intervals:
+                    entry.intervals.remove(interval)
+                    entry.masks = None
+
+    def invalidate(self, day: Optional[date] = None) -> None:
+        with self._lock:
+            if day is None:
+                self._days.clear()
+            else:
+                self._days.pop(day, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'days_cached': len(self._days),
+                    'resources': self.resources}
+
+    def _evict(self, now: float) -> None:
+        today = datetime.now().date()
+        for day in [d for d, entry in self._days.items() if d < today or now - entry.loaded_at >= self.ttl]:
+            del self._days[day]
+        if len(self._days) > self.max_days:
+            for day in sorted(self._days, key=lambda d: self._days[d].loaded_at)[:len(self._days) - self.max_days]:
+                del self._days[day]
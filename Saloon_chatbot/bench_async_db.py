@@ -0,0 +1,111 @@
+"""Load test: threadpool (sync SQLAlchemy) vs async (aiosqlite) /chat at one worker.
+
+Starts one uvicorn worker per mode in a scratch directory, disables the
+availability cache so every turn queries SQLite, and fires "show times"
+turns from concurrent clients. Requests not answered within the time budget
+are reported as failed.
+
+    python bench_async_db.py [concurrency] [requests]
+"""
+import http.client
+import json
+import math
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PORT = 8765
+# A run that stalls (e.g. the threadpool waiting on pooled connections) is cut off here.
+MAX_SECONDS = 30
+
+
+def wait_for_server(port: int, timeout: float = 15.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def client(port: int, count: int, offset: int, latencies: list, failures: list, deadline: float) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    for i in range(count):
+        if time.perf_counter() > deadline:
+            failures.append(i)
+            continue
+        body = json.dumps({"message": "haircut", "session_id": f"load-{offset}-{i}"})
+        start = time.perf_counter()
+        try:
+            conn.request("POST", "/chat", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+        except OSError:
+            # A stalled server shows up as timeouts; count them and reconnect.
+            failures.append(i)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            continue
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            failures.append(i)
+
+
+def run(async_db: bool, concurrency: int, total: int) -> dict:
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, SALON_ASYNC_DB="1" if async_db else "0", AVAILABILITY_TTL="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", APP_DIR,
+         "--port", str(PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=workdir, env=env, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(PORT)
+        latencies: list = []
+        failures: list = []
+        per_client = total // concurrency
+        start = time.perf_counter()
+        deadline = start + MAX_SECONDS
+        threads = [threading.Thread(target=client, args=(PORT, per_client, n, latencies, failures, deadline))
+                   for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "p95_ms": latencies[max(math.ceil(len(latencies) * 0.95 - 1e-9) - 1, 0)] * 1000 if latencies else float("nan"),
+        "failed": len(failures),
+    }
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 4000
+    print(f"Concurrency {concurrency}, {total} requests, 1 worker")
+    for name, async_db in [("threadpool", False), ("async", True)]:
+        result = run(async_db, concurrency, total)
+        print(f"{name:<10} {result['rps']:8.0f} req/s  p50 {result['p50_ms']:6.1f} ms  "
+              f"p95 {result['p95_ms']:6.1f} ms  failed {result['failed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Intent classification throughput as the service catalogue grows.
+
+Compares the compiled IntentMatcher with the previous keyword/substring scan.
+
+    python bench_intents.py
+"""
+import re
+import time
+from conversation import Stage
+from intents import IntentMatcher
+
+MESSAGES = [
+    "hi there",
+    "what services do you have",
+    "I would like a haircut tomorrow",
+    "can I get a pedicure please",
+    "book 3",
+    "yes please",
+    "no thanks, I know what I want",
+    "this is something else entirely",
+]
+
+
+def catalogue(size: int):
+    services = {
+        'haircut': {'name': 'Haircut & Styling', 'duration': 60, 'price': 30},
+        'hair_wash': {'name': 'Hair Wash & Blow Dry', 'duration': 30, 'price': 15},
+        'facial': {'name': 'Facial Treatment', 'duration': 90, 'price': 50},
+        'manicure': {'name': 'Manicure', 'duration': 45, 'price': 25},
+        'pedicure': {'name': 'Pedicure', 'duration': 60, 'price': 30},
+    }
+    for i in range(size - 5):
+        services[f'treatment_{i}'] = {'name': f'Signature Treatment {i}', 'duration': 30, 'price': 20}
+    return services
+
+
+def legacy_detect(services, message, stage):
+    # The substring scan detect_intent used before the compiled matcher.
+    message = message.lower().strip()
+    if stage == Stage.SHOW_TIMES and re.search(r'\b\d+\b', message):
+        return 'confirm_booking'
+    if any(word in message for word in ['hi', 'hello', 'hey']):
+        return 'greeting'
+    if any(phrase in message for phrase in ['services', 'what do you offer']):
+        return 'ask_services'
+    for key, info in services.items():
+        if key.replace('_', ' ') in message or info['name'].lower() in message:
+            return f'select_service:{key}'
+    if stage is not None and stage != Stage.SHOW_TIMES:
+        if any(word in message for word in ['book', 'appointment', 'schedule']):
+            match = re.match(r'book\s+(\d+)', message)
+            if match and 1 <= int(match.group(1)) <= len(services):
+                return f'select_service_by_number:{match.group(1)}'
+            return 'start_booking'
+    if any(word in message for word in ['confirm', 'yes', 'ok', 'sure']):
+        return 'confirm_booking'
+    if any(word in message for word in ['cancel', 'no']):
+        return 'cancel'
+    return 'general'
+
+
+def rate(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in MESSAGES:
+            fn(message)
+    return rounds * len(MESSAGES) / (time.perf_counter() - start)
+
+
+def main():
+    rounds = 2000
+    print(f"{'services':>8} {'legacy msg/s':>14} {'matcher msg/s':>14} {'speedup':>8}")
+    for size in (10, 50, 100, 250, 500, 1000):
+        services = catalogue(size)
+        matcher = IntentMatcher(services)
+        legacy = rate(lambda m: legacy_detect(services, m, Stage.GREETING), rounds)
+        compiled = rate(lambda m: matcher.detect(m, Stage.GREETING), rounds)
+        print(f"{size:>8} {legacy:>14,.0f} {compiled:>14,.0f} {compiled / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Load test for /chat: greeting -> services -> pick a service -> book -> cancel.
+
+Runs the app in process against a scratch salon.db (the tracked one is not
+touched) unless --url points at a running server. Each conversation books
+one of the first times offered and then deletes the booking, so the
+calendar stays about as full from the first conversation to the last.
+SALON_ASYNC_DB=1 loads the async endpoint.
+
+    python bench_load.py [--conversations 200] [--concurrency 16] [--out results.json]
+                         [--baseline old.json] [--url http://127.0.0.1:8000]
+"""
+import os
+import sys
+import tempfile
+import loadtest
+
+GREETINGS = ["hello", "hi there", "hey"]
+ASK_SERVICES = ["what services do you have?", "show me your services", "what do you offer?"]
+
+
+def load_app():
+    # salon.db is opened relative to the working directory
+    os.chdir(tempfile.mkdtemp())
+    import main
+    return main.app
+
+
+async def conversation(call, n: int, rng) -> None:
+    client = f"load-{n}"
+    chat = {"session_id": None, "client_name": client}
+
+    async def say(step, message, expect=None):
+        reply = await call(step, "POST", "/chat", {**chat, "message": message}, expect)
+        chat["session_id"] = reply["session_id"]
+        return reply
+
+    await say("greeting", rng.choice(GREETINGS), lambda r: r["reply"].startswith("Hello"))
+    await say("services", rng.choice(ASK_SERVICES), lambda r: "services" in r["reply"])
+    service = rng.randint(1, 3)
+    await say("select", f"book {service}", lambda r: "Available slots" in r["reply"])
+    # Another client may take the slot between the offer and the booking
+    booked = await say("book", str(rng.randint(1, 4)),
+                       lambda r: r["booking_confirmed"] or "just taken" in r["reply"])
+    if booked["booking_confirmed"]:
+        bookings = await call("list", "GET", "/bookings?limit=100")
+        mine = [b["id"] for b in bookings if b["client_name"] == client]
+        if mine:
+            await call("cancel", "DELETE", "/bookings/{booking_id}", booking_id=mine[0])
+
+
+if __name__ == "__main__":
+    sys.exit(loadtest.main(loadtest.arg_parser(__doc__).parse_args(), "saloon", load_app, conversation))
@@ -0,0 +1,82 @@
+"""Replies per second: prebuilt ReplyTemplates vs the += string building they replaced.
+
+Renders the services menu, a list of eight slots, a service offer (header
+plus slots) and a booking confirmation, for the bot's own catalogue and a
+40-service one. Every reply is checked to be identical to the old text
+before it is timed.
+
+    python bench_replies.py [seconds per case]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+from replies import ReplyTemplates
+from utils import SalonChatBot
+
+
+def legacy_services(services):
+    text = "Here are our services:\n"
+    for i, (k, v) in enumerate(services.items(), 1):
+        text += f"{i}. {v['name']} - ${v['price']} ({v['duration']} mins)\n"
+    text += "Which service would you like to book?"
+    return text
+
+
+def legacy_times(times):
+    text = "Available slots:\n"
+    for i, t in enumerate(times[:8], 1):
+        text += f"{i}. {t.strftime('%A %I:%M %p')}\n"
+    text += "Please reply with the slot number to book."
+    return text
+
+
+def legacy_offer(services, key, times):
+    info = services[key]
+    reply = f"Great choice! {info['name']} takes {info['duration']} mins and costs ${info['price']}.\n"
+    reply += legacy_times(times)
+    return reply
+
+
+def legacy_confirmation(services, key, when):
+    info = services[key]
+    return (f"Booking confirmed for {info['name']} on {when.strftime('%A, %b %d %I:%M %p')}.\n"
+            f"Price: ${info['price']}. See you then!")
+
+
+def rate(render, seconds: float) -> float:
+    count = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            render()
+        count += 100
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    small = SalonChatBot().services
+    large = {**small, **{f'treatment_{i}': {'name': f'Signature Treatment {i}', 'duration': 30, 'price': 20}
+                         for i in range(40 - len(small))}}
+    day = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    times = [day + timedelta(minutes=30 * i) for i in range(10)]
+
+    print(f"{'reply':<26} {'old/s':>12} {'new/s':>12} {'speedup':>8}")
+    for label, services in (("9 services", small), ("40 services", large)):
+        replies = ReplyTemplates(services)
+        cases = [
+            (f"services menu ({label})", lambda: legacy_services(services), lambda: replies.services_menu),
+            ("eight slots", lambda: legacy_times(times), lambda: replies.available_times(times)),
+            ("offer", lambda: legacy_offer(services, 'facial', times), lambda: replies.offer('facial', times)),
+            ("confirmation", lambda: legacy_confirmation(services, 'facial', day),
+             lambda: replies.confirmation('facial', day)),
+        ]
+        for name, old, new in cases:
+            assert old() == new(), name
+            before, after = rate(old, seconds), rate(new, seconds)
+            print(f"{name:<26} {before:>12,.0f} {after:>12,.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Earliest-slot lookups across many chairs: resource bitsets vs an interval scan.
+
+Fills a ResourceCalendar of 50 resources x 90 days with random bookings, then
+asks for the earliest start (and the first ten starts) a service of each
+duration can take on any resource, from a random day onwards. The naive
+search walks every slot of every day and checks each resource's bookings for
+an overlap, which is what a per-booking interval list costs.
+
+    python bench_scheduler.py [resources] [days] [occupancy]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+from itertools import islice
+from availability import ResourceCalendar, slots_needed
+from salon_calendar import SLOT, BusinessCalendar
+
+DURATIONS = [30, 60, 90, 150]
+QUERIES = 200
+
+
+def fill(business: BusinessCalendar, resources: int, days: list, occupancy: float, rng: random.Random):
+    calendar = ResourceCalendar(resources, business)
+    intervals = {(day, r): [] for day in days for r in range(1, resources + 1)}
+    for day in days:
+        starts = business.grid(day).starts
+        closing = starts[-1] + SLOT
+        for resource in range(1, resources + 1):
+            slot = 0
+            while slot < len(starts):
+                length = rng.choice([1, 2, 3])
+                if rng.random() < occupancy:
+                    start = starts[slot]
+                    end = min(start + SLOT * length, closing)
+                    calendar.add(start, end, resource)
+                    intervals[(day, resource)].append((start, end))
+                slot += length
+    return calendar, intervals
+
+
+def naive_starts(business: BusinessCalendar, intervals, resources: int, days: list, duration: int):
+    length = timedelta(minutes=duration)
+    for day in days:
+        starts = business.grid(day).starts
+        for start in starts[:len(starts) - slots_needed(duration) + 1]:
+            for resource in range(1, resources + 1):
+                if all(end <= start or begin >= start + length for begin, end in intervals[(day, resource)]):
+                    yield start, resource
+                    break
+
+
+def timed(label: str, search, queries) -> list:
+    started = time.perf_counter()
+    found = [list(islice(search(days, duration), want)) for days, duration, want in queries]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<18} {len(queries) / elapsed:10,.0f} queries/s")
+    return found
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    horizon = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    occupancy = float(sys.argv[3]) if len(sys.argv) > 3 else 0.97
+    rng = random.Random(7)
+    days = [date(2031, 1, 1) + timedelta(days=i) for i in range(horizon)]
+    business = BusinessCalendar()  # 09:00-19:00 every day
+
+    started = time.perf_counter()
+    calendar, intervals = fill(business, resources, days, occupancy, rng)
+    bookings = sum(len(found) for found in intervals.values())
+    print(f"{resources} resources x {horizon} days, {bookings:,} bookings "
+          f"(built in {time.perf_counter() - started:.2f} s)")
+
+    for want in (1, 10):
+        queries = [(days[rng.randrange(horizon):], rng.choice(DURATIONS), want) for _ in range(QUERIES)]
+        print(f"earliest {want} start(s), durations {DURATIONS}:")
+        fast = timed("bitset calendar", calendar.free_starts, queries)
+        slow = timed("interval scan", lambda d, n: naive_starts(business, intervals, resources, d, n), queries)
+        assert [[s for s, _ in f] for f in fast] == [[s for s, _ in f] for f in slow], "searches disagree"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare per-session memory of the old dict layout with ConversationState.
+
+    python bench_session_memory.py [sessions]
+"""
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from conversation import ConversationState, Stage
+
+
+def sample_times(count: int = 10):
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    return [start + timedelta(minutes=30 * i) for i in range(count)]
+
+
+def dict_session(times):
+    return {
+        'stage': 'show_times',
+        'selected_service': 'haircut',
+        'available_times': [{'datetime': t, 'display': t.strftime("%A %I:%M %p")} for t in times],
+        'client_name': 'Guest'
+    }
+
+
+def slots_session(times):
+    state = ConversationState(Stage.SHOW_TIMES, 'haircut')
+    state.set_available_times(times)
+    return state
+
+
+def measure(build, sessions: int) -> int:
+    # Fresh datetimes per session, as generate_available_times produces them.
+    tracemalloc.start()
+    store = {f"session-{i}": build(sample_times()) for i in range(sessions)}
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del store
+    return current
+
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"Sessions: {sessions:,} (10 offered slots each)")
+    results = {}
+    for name, build in [("dict layout", dict_session), ("ConversationState", slots_session)]:
+        results[name] = measure(build, sessions)
+        print(f"{name:<18} {results[name] / 2**20:8.1f} MiB  {results[name] / sessions:7.0f} B/session")
+    print(f"Reduction: {results['dict layout'] / results['ConversationState']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+from array import array
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Dict, Iterable, Optional
+
+EPOCH = datetime(1970, 1, 1)
+MINUTE = timedelta(minutes=1)
+
+
+class Stage(IntEnum):
+    GREETING = 0
+    SERVICES = 1
+    SHOW_TIMES = 2
+    BOOKED = 3
+
+
+def to_epoch_minutes(value: datetime) -> int:
+    return (value - EPOCH) // MINUTE
+
+
+def from_epoch_minutes(minutes: int) -> datetime:
+    return EPOCH + minutes * MINUTE
+
+
+class ConversationState:
+    """Per-session chat state.
+
+    Offered slots are kept as an array of epoch minutes (8 bytes each) rather
+    than datetimes plus pre-rendered strings; display text is built when a
+    reply needs it.
+    """
+
+    __slots__ = ('stage', 'selected_service', 'available_times', 'client_name')
+
+    def __init__(self, stage: Stage = Stage.GREETING, selected_service: Optional[str] = None,
+                 available_times: Iterable[int] = (), client_name: str = 'Guest'):
+        self.stage = stage
+        self.selected_service = selected_service
+        self.available_times = array('q', available_times)
+        self.client_name = client_name
+
+    def set_available_times(self, times: Iterable[datetime]) -> None:
+        self.available_times = array('q', map(to_epoch_minutes, times))
+
+    def available_time(self, index: int) -> Optional[datetime]:
+        if 0 <= index < len(self.available_times):
+            return from_epoch_minutes(self.available_times[index])
+        return None
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': int(self.stage),
+            'selected_service': self.selected_service,
+            'available_times': self.available_times.tolist(),
+            'client_name': self.client_name,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ConversationState':
+        return cls(Stage(data['stage']), data['selected_service'], data['available_times'], data['client_name'])
@@ -1,8 +1,86 @@
 # database.py
-from sqlalchemy import create_engine
+import os
+from typing import List
+from sqlalchemy import create_engine, event, func, inspect, select
 from sqlalchemy.orm import sessionmaker
+from models import Base, Booking
+from logs import get_logger
+from metrics import count_query
+from profiling import after_sql, before_sql
 
 DATABASE_URL = "sqlite:///./salon.db"
+ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./salon.db"
+# SALON_ASYNC_DB=1 serves /chat from an async engine (requires aiosqlite).
+ASYNC_DB = os.getenv("SALON_ASYNC_DB", "0") == "1"
+
+log = get_logger("database")
+
+# Applied to every new connection. WAL lets readers run alongside the single
+# writer; NORMAL sync is safe under WAL and skips an fsync per commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
 
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+event.listen(engine, "connect", _set_sqlite_pragmas)
+# Counted against the current HTTP request for db_queries_per_request
+event.listen(engine, "after_cursor_execute", count_query)
+# SQL text and timings of turns sampled by the profiler
+event.listen(engine, "before_cursor_execute", before_sql)
+event.listen(engine, "after_cursor_execute", after_sql)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", count_query)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_sql)
+    event.listen(async_engine.sync_engine, "after_cursor_execute", after_sql)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def upgrade_schema(bind=engine) -> List:
+    """Create missing tables, columns and indexes; upgrades an existing salon.db in place.
+
+    Safe to run on every start. If existing rows double-book a resource, the
+    unique resource/slot index is skipped (with a warning) until they are
+    fixed; returns those (resource_id, slot_time) rows. The booking path
+    re-checks overlaps under the write lock, so the app still runs.
+    """
+    Base.metadata.create_all(bind=bind)
+    with bind.begin() as conn:
+        columns = {column["name"] for column in inspect(conn).get_columns("bookings")}
+        if "resource_id" not in columns:
+            conn.exec_driver_sql("ALTER TABLE bookings ADD COLUMN resource_id INTEGER NOT NULL DEFAULT 1")
+        # Superseded by ux_bookings_resource_slot once bookings carry a resource.
+        conn.exec_driver_sql("DROP INDEX IF EXISTS ux_bookings_slot_service")
+        duplicates = conn.execute(
+            select(Booking.resource_id, Booking.slot_time)
+            .group_by(Booking.resource_id, Booking.slot_time)
+            .having(func.count() > 1)
+        ).all()
+    if duplicates:
+        log.warning("unique_slot_index_skipped", extra={
+            "duplicates": [f"resource {resource_id} at {slot_time}" for resource_id, slot_time in duplicates]
+        })
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if not (index.unique and duplicates):
+                index.create(bind=bind, checkfirst=True)
+    return duplicates
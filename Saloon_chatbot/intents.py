@@ -0,0 +1,127 @@
+import re
+from typing import Dict, List, NamedTuple, Optional
+from conversation import Stage
+
+KEYWORDS = {
+    'greeting': ['hi', 'hello', 'hey'],
+    'ask_services': ['services', 'what do you offer'],
+    'booking': ['book', 'booking', 'appointment', 'schedule'],
+    'confirm': ['confirm', 'yes', 'ok', 'sure'],
+    'cancel': ['cancel', 'no'],
+}
+
+
+# Shortest phrase that also matches with a trailing "s"
+PLURAL_MIN_LENGTH = 4
+
+
+class MessageFeatures(NamedTuple):
+    categories: frozenset
+    service: Optional[str]
+    has_number: bool
+    book_number: Optional[int]
+
+
+class IntentMatcher:
+    """Classifies chat messages with one precompiled, word-bounded regex.
+
+    Every keyword and service phrase is folded into a single pattern shaped
+    like a trie, so a message is scanned once and the work per character does
+    not grow with the catalogue. Phrases only match as whole words ("hi" does
+    not fire on "this"), optionally plural ("facials"). `keywords` maps category to phrases and defaults to
+    this bot's KEYWORDS; `detect` expects those categories, `scan` works with any.
+    """
+
+    def __init__(self, services: Dict[str, Dict], keywords: Optional[Dict[str, List[str]]] = None):
+        self.service_count = len(services)
+        self._phrases: Dict[str, str] = {}
+        for category, words in (keywords or KEYWORDS).items():
+            for word in words:
+                self._phrases[word] = category
+        self._service_rank: Dict[str, int] = {}
+        for rank, (key, info) in enumerate(services.items()):
+            self._service_rank[key] = rank
+            for phrase in (key.replace('_', ' '), info['name'].lower()):
+                self._phrases.setdefault(_normalize(phrase), 'service:' + key)
+        # Plurals ("haircuts", "appointments") match like the phrase itself; words
+        # of three letters or fewer are left alone so "hi" does not fire on "his"
+        for phrase, category in list(self._phrases.items()):
+            if len(phrase) >= PLURAL_MIN_LENGTH:
+                self._phrases.setdefault(phrase + 's', category)
+        self._pattern = re.compile(
+            r'(?<!\w)(?:(?P<book_number>book\s+\d+)|(?P<number>\d+)|(?P<phrase>'
+            + _trie_pattern(self._phrases) + r'))(?!\w)'
+        )
+
+    def scan(self, message: str) -> MessageFeatures:
+        categories = set()
+        service = None
+        has_number = False
+        book_number = None
+        for match in self._pattern.finditer(_normalize(message)):
+            if match.group('book_number'):
+                categories.add('booking')
+                has_number = True
+                if match.start() == 0:
+                    book_number = int(match.group('book_number').split()[1])
+            elif match.group('number'):
+                has_number = True
+            else:
+                category = self._phrases[match.group('phrase')]
+                if category.startswith('service:'):
+                    key = category[len('service:'):]
+                    # Earliest service in the catalogue wins, as with the old ordered scan.
+                    if service is None or self._service_rank[key] < self._service_rank[service]:
+                        service = key
+                else:
+                    categories.add(category)
+        return MessageFeatures(frozenset(categories), service, has_number, book_number)
+
+    def detect(self, message: str, stage: Optional[Stage] = None) -> str:
+        """Intent for `message`; `stage` is the session's stage, or None without a session."""
+        features = self.scan(message)
+        categories = features.categories
+
+        if stage == Stage.SHOW_TIMES and features.has_number:
+            return 'confirm_booking'
+        if 'greeting' in categories:
+            return 'greeting'
+        if 'ask_services' in categories:
+            return 'ask_services'
+        if features.service:
+            return f'select_service:{features.service}'
+        if stage is not None and stage != Stage.SHOW_TIMES and 'booking' in categories:
+            if features.book_number and 1 <= features.book_number <= self.service_count:
+                return f'select_service_by_number:{features.book_number}'
+            return 'start_booking'
+        if 'confirm' in categories:
+            return 'confirm_booking'
+        if 'cancel' in categories:
+            return 'cancel'
+        return 'general'
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+
+def _trie_pattern(phrases) -> str:
+    """Regex alternation factored by common prefix; longer phrases are tried first."""
+    trie: Dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node: Dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return '(?:' + body + ')?'
+        return body
+
+    return build(trie)
@@ -0,0 +1,241 @@
+"""Scripted multi-turn load against either chat API, in process or over HTTP.
+
+An app's bench_load.py supplies a conversation: an async function
+`conversation(call, n, rng)` that plays one user's turns through
+`call(step, method, route, json=None, expect=None, **params)`, where
+`route` is a path template such as "/bookings/{user_id}" filled from
+`params`. Closed-loop clients replay conversations until the requested
+number has run, and every call is timed per endpoint ("POST /chat") and
+per step ("book"). A call that fails, returns an error status or a reply
+`expect` rejects ends that conversation and is counted as an error.
+
+Results are printed and can be written to JSON; `--baseline` compares
+them with an earlier run's JSON and exits 1 on a regression.
+"""
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+Conversation = Callable[..., Awaitable[None]]
+
+
+class ConversationFailed(Exception):
+    pass
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (ceil(q * n)-th value)."""
+    # The epsilon keeps q * n that lands a hair above a whole number (0.95 * 60) on that rank
+    return ordered[min(max(math.ceil(len(ordered) * q - 1e-9) - 1, 0), len(ordered) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    summary = {"requests": len(ordered), "errors": errors, "rps": round(len(ordered) / elapsed, 1)}
+    if ordered:
+        summary.update({
+            "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+            "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3),
+        })
+    return summary
+
+
+class LoadRun:
+    """Times the calls of every conversation; `record=False` for warm-up runs."""
+
+    def __init__(self, client, record: bool = True):
+        self.client = client
+        self.record = record
+        self.endpoints: Dict[str, List[float]] = defaultdict(list)
+        self.steps: Dict[str, List[float]] = defaultdict(list)
+        self.endpoint_errors: Counter = Counter()
+        self.step_errors: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.completed = 0
+
+    async def call(self, step: str, method: str, route: str, json: Optional[Dict] = None,
+                   expect: Optional[Callable] = None, **params):
+        """Send one request; the decoded JSON reply, or ConversationFailed."""
+        # Labelled by the template, so ids and query strings do not make new endpoints
+        endpoint = f"{method} {route.split('?')[0]}"
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, route.format(**params), json=json)
+            elapsed = time.perf_counter() - start
+            body = response.json()
+        except Exception as e:
+            self._fail(endpoint, step, type(e).__name__)
+        if response.status_code >= 400:
+            self._fail(endpoint, step, f"HTTP {response.status_code}")
+        if self.record:
+            self.endpoints[endpoint].append(elapsed)
+            self.steps[step].append(elapsed)
+        if expect is not None and not expect(body):
+            self._fail(endpoint, step, "unexpected reply")
+        return body
+
+    def _fail(self, endpoint: str, step: str, reason: str):
+        if self.record:
+            self.endpoint_errors[endpoint] += 1
+            self.step_errors[step] += 1
+            self.failures[f"{step}: {reason}"] += 1
+        raise ConversationFailed(reason)
+
+    async def play(self, conversation: Conversation, conversations: int, concurrency: int, seed: int,
+                   offset: int = 0) -> float:
+        """Run `conversations` conversations from `concurrency` clients; the wall time taken."""
+        remaining = iter(range(offset, offset + conversations))
+
+        async def client():
+            for n in remaining:
+                try:
+                    await conversation(self.call, n, random.Random(seed + n))
+                    if self.record:
+                        self.completed += 1
+                except ConversationFailed:
+                    pass
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+    def results(self, elapsed: float) -> Dict:
+        every = [latency for latencies in self.endpoints.values() for latency in latencies]
+        return {
+            "overall": {**summarize(every, sum(self.endpoint_errors.values()), elapsed),
+                        "conversations": self.completed,
+                        "conversations_per_s": round(self.completed / elapsed, 1),
+                        "elapsed_s": round(elapsed, 3)},
+            "endpoints": {name: summarize(self.endpoints[name], self.endpoint_errors[name], elapsed)
+                          for name in sorted({*self.endpoints, *self.endpoint_errors})},
+            "steps": {name: summarize(self.steps[name], self.step_errors[name], elapsed)
+                      for name in {**self.steps, **self.step_errors}},
+            "failures": dict(self.failures),
+        }
+
+
+@asynccontextmanager
+async def in_process_client(app):
+    """An httpx client calling `app` directly, with its lifespan (startup/shutdown) running."""
+    import httpx
+
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest") as client:
+            yield client
+
+
+@asynccontextmanager
+async def http_client(url: str, concurrency: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0) as client:
+        yield client
+
+
+async def run_load(client, conversation: Conversation, conversations: int, concurrency: int,
+                   warmup: int = 0, seed: int = 0) -> Dict:
+    """Warm up with `warmup` unrecorded conversations, then time `conversations` of them."""
+    if warmup:
+        await LoadRun(client, record=False).play(conversation, warmup, concurrency, seed, offset=conversations)
+    run = LoadRun(client)
+    elapsed = await run.play(conversation, conversations, concurrency, seed)
+    return run.results(elapsed)
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Endpoints whose p95/p99 grew or whose throughput fell by more than `tolerance` (0.2 = 20%)."""
+    regressions = []
+    for name, old in baseline.get("endpoints", {}).items():
+        new = results["endpoints"].get(name)
+        if new is None:
+            continue
+        for key in ("p95_ms", "p99_ms"):
+            if key in old and key in new and new[key] > old[key] * (1 + tolerance):
+                regressions.append(f"{name} {key} {old[key]} -> {new[key]}")
+        if new["rps"] < old["rps"] * (1 - tolerance):
+            regressions.append(f"{name} rps {old['rps']} -> {new['rps']}")
+        if new["errors"] > old["errors"]:
+            regressions.append(f"{name} errors {old['errors']} -> {new['errors']}")
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def arg_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200, help="conversations timed (default 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="simultaneous clients (default 16)")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed conversations first (default 20)")
+    parser.add_argument("--seed", type=int, default=0, help="seeds each conversation's phrasing")
+    parser.add_argument("--url", help="load a running server instead of the app in process, e.g. http://127.0.0.1:8000")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="an earlier --out file; exit 1 if this run regressed against it")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed regression vs --baseline (default 0.25)")
+    return parser
+
+
+def print_results(results: Dict) -> None:
+    for title, table in (("endpoint", results["endpoints"]), ("step", results["steps"])):
+        print(f"{title:<28} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name, row in table.items():
+            print(f"{name:<28} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8.1f} "
+                  f"{row.get('p50_ms', 0):>8.2f} {row.get('p95_ms', 0):>8.2f} {row.get('p99_ms', 0):>8.2f}")
+        print()
+    overall = results["overall"]
+    print(f"{overall['conversations']} conversations in {overall['elapsed_s']:.2f} s "
+          f"({overall['conversations_per_s']:.1f}/s, {overall['rps']:.1f} requests/s)")
+    for failure, count in results["failures"].items():
+        print(f"  failed: {failure} x{count}")
+
+
+def main(args: argparse.Namespace, app_name: str, load_app: Callable, conversation: Conversation) -> int:
+    """Run the load test `args` describes; the process exit status."""
+    async def run():
+        if args.url:
+            client = http_client(args.url, args.concurrency)
+        else:
+            client = in_process_client(load_app())
+        async with client as session:
+            return await run_load(session, conversation, args.conversations, args.concurrency, args.warmup, args.seed)
+
+    results = {
+        "app": app_name,
+        "target": args.url or "in-process",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {key: getattr(args, key) for key in vars(args) if key not in ("out", "baseline")},
+        **asyncio.run(run()),
+    }
+    print_results(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"results written to {args.out}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,152 @@
+"""Structured JSON logs written by a background thread.
+
+Loggers under "salon" (`get_logger`) hand records to a bounded queue; a
+QueueListener thread formats them as one JSON object per line on stderr.
+A full queue drops the record (counted in `dropped`) instead of making
+the request wait. Fields passed with `extra=` become JSON keys, and
+`bind(user_id=...)` adds correlation ids to every record logged in that
+request (or task). DEBUG records are sampled per request: with
+LOG_DEBUG_SAMPLE=0.01 one request in a hundred keeps all of its debug
+events, the rest keep none.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+ROOT = "salon"
+# Correlation ids of the current request, plus whether its debug events are kept
+_context: ContextVar[Dict] = ContextVar("log_context", default={})
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RESERVED)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the request's correlation ids on a record and samples DEBUG records.
+
+    Runs in the calling thread, before the record is queued.
+    """
+
+    def __init__(self, debug_sample: float = 1.0):
+        super().__init__()
+        self.debug_sample = debug_sample
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        if record.levelno <= logging.DEBUG:
+            sampled = context.get("_sampled")
+            if not (sampled if sampled is not None else random.random() < self.debug_sample):
+                return False
+        for key, value in context.items():
+            if not key.startswith("_"):
+                setattr(record, key, value)
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records that do not fit are dropped and counted."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what cannot wait for the listener thread: the message text and the traceback
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_filter = ContextFilter()
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup(level: Optional[str] = None, debug_sample: Optional[float] = None, queue_size: Optional[int] = None,
+          stream=None) -> DroppingQueueHandler:
+    """Route the "salon" loggers through the queue (LOG_LEVEL, LOG_DEBUG_SAMPLE, LOG_QUEUE_SIZE); idempotent."""
+    global _handler, _filter, _listener
+    if _handler is not None:
+        return _handler
+    log_queue: queue.Queue = queue.Queue(queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    _handler = DroppingQueueHandler(log_queue)
+    _filter = ContextFilter(debug_sample if debug_sample is not None else float(os.getenv("LOG_DEBUG_SAMPLE", "0.01")))
+    _handler.addFilter(_filter)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(shutdown)
+    logger = logging.getLogger(ROOT)
+    logger.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    logger.addHandler(_handler)
+    logger.propagate = False
+    return _handler
+
+
+def shutdown() -> None:
+    """Write out the queued records and stop the listener thread."""
+    global _handler, _listener
+    if _listener is not None:
+        logging.getLogger(ROOT).removeHandler(_handler)
+        _listener.stop()
+        _handler = _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+def dropped() -> int:
+    return _handler.dropped if _handler is not None else 0
+
+
+@contextmanager
+def bind(**ids):
+    """Add correlation ids (and a request_id) to every record logged inside the block.
+
+    Nested binds keep the outer ids and request_id; the outermost one also
+    decides whether the request's DEBUG records are kept.
+    """
+    context = _context.get()
+    if "request_id" not in context:
+        ids = {"request_id": uuid.uuid4().hex[:16], "_sampled": random.random() < _filter.debug_sample, **ids}
+    token = _context.set({**context, **ids})
+    try:
+        yield
+    finally:
+        _context.reset(token)
@@ -1,13 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine
-from models import Base, Booking
+from database import ASYNC_DB, AsyncSessionLocal, SessionLocal, upgrade_schema
+import logs
+import metrics
+from profiling import ChatProfiler
+from models import Booking
 from schemas import ChatRequest, ChatResponse
 from utils import salon_bot
+from pagination import bookings_query, encode_cursor
+from datetime import datetime
+from typing import Optional
+import json
+import os
 import uuid
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# JSON logs on stderr, written by a background thread (LOG_LEVEL / LOG_DEBUG_SAMPLE / LOG_QUEUE_SIZE)
+logs.setup()
+log = logs.get_logger("chat")
+
+# Create tables and bring existing databases up to the current indexes
+upgrade_schema()
 
 app = FastAPI(
     title="Salon Chatbot API",
@@ -15,6 +28,17 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Request/stage/DB metrics at GET /metrics (METRICS=0 turns the middleware off)
+if os.getenv("METRICS", "1") != "0":
+    metrics.install(app)
+    metrics.REGISTRY.gauge("sessions_active", "Chat sessions in the session store.", lambda: len(salon_bot.sessions))
+    metrics.REGISTRY.gauge("availability_days_cached", "Days held by the availability cache.",
+                           lambda: salon_bot.availability.stats()['days_cached'])
+    metrics.REGISTRY.gauge("log_records_dropped", "Log records dropped because the log queue was full.", logs.dropped)
+
+# Opt-in: PROFILE_SAMPLE_RATE of chat turns run under cProfile, slow ones are dumped to PROFILE_DIR
+profiler = ChatProfiler.from_env()
+
 def get_db():
     db = SessionLocal()
     try:
@@ -22,25 +46,56 @@ def get_db():
     finally:
         db.close()
 
-@app.post("/chat", response_model=ChatResponse)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def chat_endpoint(request: ChatRequest, db: Session = Depends(get_db)):
     if not request.session_id:
         request.session_id = str(uuid.uuid4())
-    try:
-        result = salon_bot.chat_response(
-            message=request.message,
-            session_id=request.session_id,
-            client_name=request.client_name or "Guest",
-            db=db
-        )
-        return ChatResponse(
-            reply=result['reply'],
-            booking_confirmed=result.get('booking_confirmed', False),
-            session_id=request.session_id
-        )
-    except Exception as e:
-        print(f"[Error]: {e}")
-        raise HTTPException(status_code=500, detail="Failed to process the chat message.")
+    with logs.bind(session_id=request.session_id):
+        try:
+            with profiler.profile("/chat", session_id=request.session_id, message=request.message):
+                result = salon_bot.chat_response(
+                    message=request.message,
+                    session_id=request.session_id,
+                    client_name=request.client_name or "Guest",
+                    db=db
+                )
+            return ChatResponse(
+                reply=result['reply'],
+                booking_confirmed=result.get('booking_confirmed', False),
+                session_id=request.session_id
+            )
+        except Exception:
+            metrics.ERRORS.inc("chat")
+            log.exception("chat_failed")
+            raise HTTPException(status_code=500, detail="Failed to process the chat message.")
+
+async def async_chat_endpoint(request: ChatRequest, db=Depends(get_async_db)):
+    if not request.session_id:
+        request.session_id = str(uuid.uuid4())
+    with logs.bind(session_id=request.session_id):
+        try:
+            with profiler.profile("/chat", session_id=request.session_id, message=request.message):
+                result = await salon_bot.achat_response(
+                    message=request.message,
+                    session_id=request.session_id,
+                    client_name=request.client_name or "Guest",
+                    db=db
+                )
+            return ChatResponse(
+                reply=result['reply'],
+                booking_confirmed=result.get('booking_confirmed', False),
+                session_id=request.session_id
+            )
+        except Exception:
+            metrics.ERRORS.inc("chat")
+            log.exception("chat_failed")
+            raise HTTPException(status_code=500, detail="Failed to process the chat message.")
+
+# The async path keeps chat turns off the threadpool while SQLite is busy.
+app.post("/chat", response_model=ChatResponse)(async_chat_endpoint if ASYNC_DB else chat_endpoint)
 
 @app.get("/")
 def home():
@@ -49,15 +104,64 @@ def home():
         "usage": "POST to /chat with your message to start chatting.",
     }
 
+def booking_to_dict(b: Booking) -> dict:
+    return {
+        "id": b.id,
+        "client_name": b.client_name,
+        "service": b.service,
+        "time": b.slot_time.strftime("%Y-%m-%d %H:%M"),
+        "resource_id": b.resource_id,
+        "created_at": b.created_at.strftime("%Y-%m-%d %H:%M")
+    }
+
+def stream_bookings(start: Optional[datetime], end: Optional[datetime]):
+    # Runs after the request's session is closed, so it owns its own; yield_per
+    # pulls rows from the SQLite cursor in batches instead of loading them all.
+    db = SessionLocal()
+    try:
+        rows = db.execute(bookings_query(start, end).execution_options(yield_per=500)).scalars()
+        for b in rows:
+            yield json.dumps(booking_to_dict(b)) + "\n"
+    finally:
+        db.close()
+
 @app.get("/bookings")
-def get_bookings(db: Session = Depends(get_db)):
-    bookings = db.query(Booking).all()
-    return [
-        {
-            "id": b.id,
-            "client_name": b.client_name,
-            "service": b.service,
-            "time": b.slot_time.strftime("%Y-%m-%d %H:%M"),
-            "created_at": b.created_at.strftime("%Y-%m-%d %H:%M")
-        } for b in bookings
-    ]
+def get_bookings(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    stream: bool = False,
+    db: Session = Depends(get_db),
+):
+    """Newest bookings first, one page at a time; follow X-Next-Cursor for the next page.
+
+    `start`/`end` filter on the appointment time; `stream=true` returns every
+    matching booking as NDJSON instead of a page.
+    """
+    if stream:
+        return StreamingResponse(stream_bookings(start, end), media_type="application/x-ndjson")
+    try:
+        query = bookings_query(start, end, cursor)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    bookings = db.execute(query.limit(limit + 1)).scalars().all()
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(bookings[-1].created_at, bookings[-1].id)
+    return [booking_to_dict(b) for b in bookings]
+
+@app.delete("/bookings/{booking_id}")
+def delete_booking(booking_id: int, db: Session = Depends(get_db)):
+    if not salon_bot.delete_booking(booking_id, db):
+        raise HTTPException(status_code=404, detail="Booking not found")
+    return {"message": f"Booking {booking_id} deleted successfully"}
+
+@app.get("/availability/stats")
+def availability_stats():
+    return salon_bot.availability.stats()
+
+@app.get("/profiling/stats")
+def profiling_stats():
+    return profiler.stats()
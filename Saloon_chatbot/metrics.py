@@ -0,0 +1,193 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; Prometheus' client defaults with a finer low end for in-process stages
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join('{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+                     for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_labels(self.labels, key)} {value}" for key, value in values)
+        return lines
+
+
+class Histogram:
+    """Bucket counts per label set; `observe` is one bisect and three additions under a lock."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (last is +Inf), sum, total count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, [list(counts), total, count]) for key, (counts, total, count) in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket in zip([*self.buckets, "+Inf"], counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels((*self.labels, 'le'), (*key, bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """Read from `read` at scrape time, so nothing is paid on the request path."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {float(self.read())}")
+        except Exception:
+            pass
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read: Callable[[], float]) -> Gauge:
+        """Register (or replace) a gauge read at scrape time."""
+        self.metrics[name] = Gauge(name, help, read)
+        return self.metrics[name]
+
+    def render(self) -> str:
+        """The Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(line for metric in list(self.metrics.values()) for line in metric.render()) + "\n"
+
+    def _add(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+
+REGISTRY = Registry()
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by method, route and status.",
+                                 ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency by route.", ("route",))
+DB_QUERIES = REGISTRY.histogram("db_queries_per_request", "Database queries issued per HTTP request.", ("route",),
+                                buckets=QUERY_BUCKETS)
+STAGE_LATENCY = REGISTRY.histogram("stage_duration_seconds",
+                                   "Time spent per request stage (intent, availability, db_commit, llm).", ("stage",))
+ERRORS = REGISTRY.counter("errors_total", "Errors caught and answered with a fallback, by where they happened.",
+                          ("where",))
+
+# Queries issued so far by the current request; None outside one
+_request_queries: ContextVar[Optional[List[int]]] = ContextVar("request_queries", default=None)
+
+
+def count_query(*_) -> None:
+    """Count one database query against the current request (usable as a SQLAlchemy event hook)."""
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block of a request (sync or async) into stage_duration_seconds."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(perf_counter() - start, name)
+
+
+class MetricsMiddleware:
+    """Plain ASGI middleware recording rate, latency and query count per route template.
+
+    Routes are labelled by their path template ("/bookings/{user_id}"), so
+    label sets stay bounded; unmatched paths share one "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(scope["method"], route, str(status[0]))
+            HTTP_LATENCY.observe(elapsed, route)
+            DB_QUERIES.observe(queries[0], route)
+
+
+def install(app, registry: Registry = REGISTRY) -> None:
+    """Add the metrics middleware and a GET /metrics endpoint to a FastAPI app."""
+    from fastapi import Response
+
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
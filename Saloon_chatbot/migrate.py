@@ -0,0 +1,20 @@
+"""Upgrade salon.db in place: WAL journal, resource column, booking indexes and the unique resource/slot index.
+
+Exits with status 1 and lists the slots if existing rows double-book a
+resource; the unique index is added once those rows are fixed.
+
+    python migrate.py
+"""
+import sys
+from database import DATABASE_URL, engine, upgrade_schema
+
+if __name__ == "__main__":
+    duplicates = upgrade_schema()
+    with engine.connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        indexes = [row[1] for row in conn.exec_driver_sql("PRAGMA index_list('bookings')")]
+    print(f"Upgraded {DATABASE_URL} (journal_mode={mode}, indexes: {', '.join(sorted(indexes))})")
+    if duplicates:
+        print("Unique resource/slot index not added; double-booked slots: "
+              + ", ".join(f"resource {resource_id} at {slot_time}" for resource_id, slot_time in duplicates))
+        sys.exit(1)
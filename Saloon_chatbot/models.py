@@ -1,5 +1,5 @@
 # models.py
-from sqlalchemy import Column, Integer, String, DateTime, Float
+from sqlalchemy import Column, Integer, String, DateTime, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -7,10 +7,14 @@ Base = declarative_base()
 
 class Booking(Base):
     __tablename__ = "bookings"
+    # One booking per resource and start time; slot_time has its own index for range scans.
+    __table_args__ = (Index("ux_bookings_resource_slot", "resource_id", "slot_time", unique=True),)
     id = Column(Integer, primary_key=True, index=True)
     client_name = Column(String, nullable=False)
     service = Column(String, nullable=False)
-    slot_time = Column(DateTime, nullable=False)
+    slot_time = Column(DateTime, nullable=False, index=True)
+    # Chair/stylist the booking occupies (1..SALON_RESOURCES)
+    resource_id = Column(Integer, nullable=False, default=1, server_default="1")
     phone = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import and_, or_, select
+from models import Booking
+
+
+def encode_cursor(created_at: datetime, booking_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), booking_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str):
+    created_at, booking_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return datetime.fromisoformat(created_at), int(booking_id)
+
+
+def bookings_query(start: Optional[datetime] = None, end: Optional[datetime] = None, cursor: Optional[str] = None):
+    """Bookings newest first, optionally limited to appointments in [start, end).
+
+    Ordering by (created_at, id) makes the cursor a keyset: each page resumes
+    from the last row of the previous one through the created_at index rather
+    than skipping over an OFFSET.
+    """
+    query = select(Booking).order_by(Booking.created_at.desc(), Booking.id.desc())
+    if start:
+        query = query.where(Booking.slot_time >= start)
+    if end:
+        query = query.where(Booking.slot_time < end)
+    if cursor:
+        created_at, booking_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Booking.created_at < created_at,
+            and_(Booking.created_at == created_at, Booking.id < booking_id),
+        ))
+    return query
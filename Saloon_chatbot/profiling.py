@@ -0,0 +1,178 @@
+import cProfile
+import json
+import os
+import pstats
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List, Optional
+
+# SQL issued by the request being profiled; None when it is not sampled
+_statements: ContextVar[Optional[List[Dict]]] = ContextVar("profiled_statements", default=None)
+# Held by the turn being profiled. Python 3.12+ allows one active profiler per
+# process (earlier versions one per thread, which async turns share anyway).
+_profiling = threading.Lock()
+
+
+def before_sql(conn, cursor, statement, parameters, context, executemany) -> None:
+    """SQLAlchemy before_cursor_execute hook; only does work inside a sampled request."""
+    if _statements.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(perf_counter())
+
+
+def after_sql(conn, cursor, statement, parameters, context, executemany) -> None:
+    """SQLAlchemy after_cursor_execute hook: records the statement and its time."""
+    statements = _statements.get()
+    starts = conn.info.get("profile_query_start")
+    if statements is not None and starts:
+        statements.append({"sql": statement, "ms": round((perf_counter() - starts.pop()) * 1000, 3)})
+
+
+class ChatProfiler:
+    """Profiles a random `sample_rate` share of chat turns with cProfile.
+
+    Sampled turns that take at least `slow_ms` are written to `directory`
+    as `<stamp>.prof` (load with pstats or snakeviz), `<stamp>.speedscope.json`
+    (open at speedscope.app) and `<stamp>.json` (latency and the SQL issued).
+    Only the newest `keep` dumps are kept. Unsampled turns pay one
+    random() call. One turn in the process is profiled at a time; a turn
+    sampled meanwhile runs unprofiled. cProfile follows the calling thread,
+    so on the async path a sampled turn's profile also holds whatever other
+    tasks ran on the event loop meanwhile.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, slow_ms: float = 250.0, directory: str = "profiles",
+                 keep: int = 50):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.directory = directory
+        self.keep = keep
+        self.sampled = 0
+        self.dumped = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ChatProfiler":
+        return cls(
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            slow_ms=float(os.getenv("PROFILE_SLOW_MS", "250")),
+            directory=os.getenv("PROFILE_DIR", "profiles"),
+            keep=int(os.getenv("PROFILE_KEEP", "50")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    @contextmanager
+    def profile(self, label: str, **info):
+        """Profile the block if this turn is sampled; `info` is stored with a dump."""
+        if not self.enabled or random.random() >= self.sample_rate or not _profiling.acquire(blocking=False):
+            yield
+            return
+        statements: List[Dict] = []
+        token = _statements.set(statements)
+        profiler = cProfile.Profile()
+        enabled = False
+        start = perf_counter()
+        try:
+            # Another profiling tool (a debugger, coverage) may own the hook; the turn then runs unprofiled
+            try:
+                profiler.enable()
+                enabled = True
+            except ValueError:
+                pass
+            yield
+        finally:
+            if enabled:
+                profiler.disable()
+            elapsed_ms = (perf_counter() - start) * 1000
+            _statements.reset(token)
+            _profiling.release()
+            if enabled:
+                with self._lock:
+                    self.sampled += 1
+                if elapsed_ms >= self.slow_ms:
+                    self._dump(profiler, label, elapsed_ms, statements, info)
+
+    def stats(self) -> Dict:
+        return {"sample_rate": self.sample_rate, "slow_ms": self.slow_ms, "sampled": self.sampled,
+                "dumped": self.dumped}
+
+    def _dump(self, profiler: cProfile.Profile, label: str, elapsed_ms: float, statements: List[Dict],
+              info: Dict) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{int(elapsed_ms)}ms"
+        base = os.path.join(self.directory, stamp)
+        profiler.dump_stats(base + ".prof")
+        stats = pstats.Stats(profiler)
+        with open(base + ".speedscope.json", "w") as f:
+            json.dump(speedscope_profile(stats, f"{label} {elapsed_ms:.0f} ms"), f)
+        with open(base + ".json", "w") as f:
+            json.dump({"label": label, "elapsed_ms": round(elapsed_ms, 3), **info,
+                       "sql_ms": round(sum(s["ms"] for s in statements), 3), "statements": statements}, f, indent=1)
+        with self._lock:
+            self.dumped += 1
+            self._rotate()
+
+    def _rotate(self) -> None:
+        dumps = sorted(name[:-len(".prof")] for name in os.listdir(self.directory) if name.endswith(".prof"))
+        for stamp in dumps[:max(len(dumps) - self.keep, 0)]:
+            for suffix in (".prof", ".speedscope.json", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, stamp + suffix))
+                except FileNotFoundError:
+                    pass
+
+
+def speedscope_profile(stats: pstats.Stats, name: str, min_seconds: float = 1e-6) -> Dict:
+    """A speedscope "sampled" profile rebuilt from cProfile's caller/callee totals.
+
+    cProfile keeps totals per caller edge rather than whole stacks, so (as
+    flameprof and gprof2dot do) each call path gets the share of a
+    function's time that its caller edge accounts for. Recursion is cut at
+    the first repeat and paths under `min_seconds` are dropped.
+    """
+    table = stats.stats
+    children: Dict[tuple, Dict[tuple, float]] = {}
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, {})[func] = edge[3]
+    frames: List[Dict] = []
+    index: Dict[tuple, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+
+    def frame(func: tuple) -> int:
+        if func not in index:
+            filename, line, function = func
+            index[func] = len(frames)
+            frames.append({"name": function, "file": filename, "line": line})
+        return index[func]
+
+    def walk(func: tuple, share: float, stack: List[int]) -> None:
+        own = table[func][2]
+        stack = stack + [frame(func)]
+        if own * share >= min_seconds:
+            samples.append(stack)
+            weights.append(own * share)
+        for child, edge_total in children.get(func, {}).items():
+            child_total = table[child][3]
+            if child_total > 0 and edge_total * share >= min_seconds and index.get(child) not in stack:
+                walk(child, share * edge_total / child_total, stack)
+
+    for func, (_, _, _, _, callers) in table.items():
+        if not any(caller in table for caller in callers):
+            walk(func, 1.0, [])
+    total = sum(weights)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{"type": "sampled", "name": name, "unit": "seconds", "startValue": 0, "endValue": total,
+                      "samples": samples, "weights": weights}],
+        "name": name,
+        "exporter": "Saloon_chatbot profiling.py",
+    }
@@ -0,0 +1,55 @@
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List
+
+# Most slots listed in one reply
+MAX_SLOTS_SHOWN = 8
+
+
+@lru_cache(maxsize=4096)
+def slot_label(time: datetime) -> str:
+    """"Monday 09:30 AM". Every reply offers slots from the same grid, so each is formatted once."""
+    return time.strftime('%A %I:%M %p')
+
+
+class ReplyTemplates:
+    """Reply text for one service catalogue, with everything that depends only on it prebuilt.
+
+    Build a new one when the catalogue changes (SalonChatBot.set_services
+    does); replies that mention times are joined from the prebuilt parts.
+    """
+
+    def __init__(self, services: Dict[str, Dict]):
+        self.services_menu = "".join([
+            "Here are our services:\n",
+            *(f"{i}. {info['name']} - ${info['price']} ({info['duration']} mins)\n"
+              for i, info in enumerate(services.values(), 1)),
+            "Which service would you like to book?",
+        ])
+        self.select_service_first = "Please select a service first. Here are our popular services:\n\n" + self.services_menu
+        self._offer_headers = {
+            key: f"Great choice! {info['name']} takes {info['duration']} mins and costs ${info['price']}.\n"
+            for key, info in services.items()
+        }
+        self._confirmations = {
+            key: (f"Booking confirmed for {info['name']} on ", f".\nPrice: ${info['price']}. See you then!")
+            for key, info in services.items()
+        }
+
+    def available_times(self, times: List[datetime]) -> str:
+        return "".join([
+            "Available slots:\n",
+            *(f"{i}. {slot_label(t)}\n" for i, t in enumerate(times[:MAX_SLOTS_SHOWN], 1)),
+            "Please reply with the slot number to book.",
+        ])
+
+    def offer(self, service_key: str, times: List[datetime]) -> str:
+        return self._offer_headers[service_key] + self.available_times(times)
+
+    def next_times(self, taken: datetime, times: List[datetime]) -> str:
+        return (f"Sorry, {slot_label(taken)} was just taken. The next free slot is {slot_label(times[0])}.\n"
+                + self.available_times(times))
+
+    def confirmation(self, service_key: str, time: datetime) -> str:
+        before, after = self._confirmations[service_key]
+        return f"{before}{time.strftime('%A, %b %d %I:%M %p')}{after}"
@@ -0,0 +1,154 @@
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SLOT_MINUTES = 30
+SLOT = timedelta(minutes=SLOT_MINUTES)
+# Day bitsets count slots from midnight, so every weekday shares one indexing
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+
+# Opening periods of one weekday; empty when the salon is closed
+Hours = Tuple[Tuple[time, time], ...]
+
+DEFAULT_HOURS: Hours = ((time(9), time(19)),)
+
+
+def hours_mask(hours: Hours) -> int:
+    """Bits of the slots that start and end inside one of the opening periods."""
+    mask = 0
+    for opening, closing in hours:
+        first = -(-(opening.hour * 60 + opening.minute) // SLOT_MINUTES)
+        last = (closing.hour * 60 + closing.minute) // SLOT_MINUTES
+        if last > first:
+            mask |= ((1 << (last - first)) - 1) << first
+    return mask
+
+
+class DayGrid:
+    """Bookable slots of one day; bit i of `mask` is the slot starting i * SLOT_MINUTES after midnight."""
+    __slots__ = ('day', 'midnight', 'mask', 'starts')
+
+    def __init__(self, day: date, mask: int):
+        self.day = day
+        self.midnight = datetime.combine(day, time.min)
+        self.mask = mask
+        self.starts = tuple(self.slot_time(i) for i in range(SLOTS_PER_DAY) if mask >> i & 1)
+
+    def slot_time(self, index: int) -> datetime:
+        return self.midnight + SLOT * index
+
+    def starting_from(self, when: datetime) -> int:
+        """`mask` without the slots that start before `when`."""
+        if when <= self.midnight:
+            return self.mask
+        first = -(-(when - self.midnight) // SLOT)
+        return self.mask >> first << first
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        """Whether [start, end) lies inside opening hours, off-grid times included."""
+        if start.date() != self.day or end <= start:
+            return False
+        first = (start - self.midnight) // SLOT
+        last = -(-(end - self.midnight) // SLOT)
+        if last > SLOTS_PER_DAY:
+            return False
+        needed = ((1 << (last - first)) - 1) << first
+        return self.mask & needed == needed
+
+
+class BusinessCalendar:
+    """Opening hours per weekday, closure dates and how far ahead bookings are taken.
+
+    The slot grid of each weekday's hours is computed once, and each date's
+    DayGrid once per process, so a day 60 days out costs the same as today.
+    """
+
+    def __init__(self, hours: Optional[Dict[int, Hours]] = None, closures: Iterable[date] = (),
+                 horizon_days: int = 60):
+        weekly = hours if hours is not None else {weekday: DEFAULT_HOURS for weekday in range(7)}
+        self.hours: List[Hours] = [tuple(weekly.get(weekday, ())) for weekday in range(7)]
+        self.closures = frozenset(closures)
+        self.horizon_days = horizon_days
+        self._masks = [hours_mask(hours) for hours in self.hours]
+        self._grids: Dict[date, DayGrid] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "BusinessCalendar":
+        """SALON_HOURS ("mon-fri=09:00-19:00;sat=10:00-13:00,14:00-17:00;sun=closed"; days
+        not listed keep 09:00-19:00), SALON_CLOSURES ("2026-12-25,2026-12-26") and
+        SALON_HORIZON_DAYS (default 60)."""
+        hours = {weekday: DEFAULT_HOURS for weekday in range(7)}
+        hours.update(parse_hours(os.getenv("SALON_HOURS", "")))
+        closures = [date.fromisoformat(day.strip()) for day in os.getenv("SALON_CLOSURES", "").split(",") if day.strip()]
+        return cls(hours, closures, int(os.getenv("SALON_HORIZON_DAYS", "60")))
+
+    def grid(self, day: date) -> DayGrid:
+        grid = self._grids.get(day)
+        if grid is None:
+            mask = 0 if day in self.closures else self._masks[day.weekday()]
+            grid = DayGrid(day, mask)
+            with self._lock:
+                if len(self._grids) > 4 * self.horizon_days + 64:
+                    today = date.today()
+                    for old in [d for d in self._grids if d < today]:
+                        del self._grids[old]
+                self._grids[day] = grid
+        return grid
+
+    def is_open(self, day: date) -> bool:
+        return self.grid(day).mask != 0
+
+    def last_day(self, today: Optional[date] = None) -> date:
+        return (today or date.today()) + timedelta(days=self.horizon_days - 1)
+
+    def open_days(self, start: Optional[date] = None, count: Optional[int] = None) -> List[date]:
+        """Up to `count` open days from `start` (default today), within the booking horizon."""
+        today = date.today()
+        day = max(start or today, today)
+        last = self.last_day(today)
+        days: List[date] = []
+        while day <= last and (count is None or len(days) < count):
+            if self.is_open(day):
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def slots(self, day: date, after: Optional[datetime] = None) -> Tuple[datetime, ...]:
+        """Slot start times of `day`, leaving out those before `after`."""
+        starts = self.grid(day).starts
+        if after is None or after.date() < day:
+            return starts
+        return tuple(start for start in starts if start >= after)
+
+    def is_bookable(self, start: datetime, end: datetime) -> bool:
+        return self.grid(start.date()).covers(start, end)
+
+    def next_opening(self, when: datetime, length: timedelta, within_days: int = 14) -> Optional[datetime]:
+        """`when` if [when, when + length) is inside opening hours, else the next slot start that is."""
+        if self.is_bookable(when, when + length):
+            return when
+        for offset in range(within_days):
+            for start in self.slots(when.date() + timedelta(days=offset), after=when):
+                if self.is_bookable(start, start + length):
+                    return start
+        return None
+
+
+def parse_hours(spec: str) -> Dict[int, Hours]:
+    """Parse "mon-fri=09:00-19:00;sat=10:00-13:00,14:00-17:00;sun=closed" into weekday -> periods."""
+    hours: Dict[int, Hours] = {}
+    for part in filter(None, (part.strip() for part in spec.split(";"))):
+        days, _, periods = part.partition("=")
+        first, _, last = days.strip().lower().partition("-")
+        start = WEEKDAYS.index(first[:3])
+        end = WEEKDAYS.index(last[:3]) if last else start
+        value: Hours = () if periods.strip().lower() == "closed" else tuple(
+            tuple(time.fromisoformat(t.strip()) for t in period.split("-"))
+            for period in periods.split(",")
+        )
+        for offset in range((end - start) % 7 + 1):
+            hours[(start + offset) % 7] = value
+    return hours
@@ -0,0 +1,135 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from conversation import ConversationState
+
+
+class SessionStore(ABC):
+    """Where conversation state lives between chat turns."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[ConversationState]:
+        ...
+
+    @abstractmethod
+    def set(self, session_id: str, state: ConversationState) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemorySessionStore(SessionStore):
+    """In-process store bounded by `max_size` (least recently used first out) and `ttl` seconds."""
+
+    def __init__(self, max_size: int = 10000, ttl: float = 1800.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[ConversationState]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl:
+                del self._sessions[session_id]
+                return None
+            self._sessions.move_to_end(session_id)
+            return entry[1]
+
+    def set(self, session_id: str, state: ConversationState) -> None:
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), state)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """Store backed by a SQLite file, so several worker processes see the same sessions.
+
+    Expired rows are purged every `purge_every` writes, which keeps the file
+    bounded by the number of sessions active within `ttl`.
+    """
+
+    def __init__(self, path: str = "sessions.db", ttl: float = 1800.0, purge_every: int = 1000):
+        self.path = path
+        self.ttl = ttl
+        self.purge_every = purge_every
+        self._writes = 0
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_updated_at ON sessions (updated_at)')
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[ConversationState]:
+        row = self._conn().execute(
+            'SELECT state FROM sessions WHERE session_id = ? AND updated_at > ?',
+            (session_id, time.time() - self.ttl),
+        ).fetchone()
+        return ConversationState.from_dict(json.loads(row[0])) if row else None
+
+    def set(self, session_id: str, state: ConversationState) -> None:
+        conn = self._conn()
+        conn.execute(
+            'INSERT OR REPLACE INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)',
+            (session_id, json.dumps(state.to_dict()), time.time()),
+        )
+        self._writes += 1
+        if self._writes % self.purge_every == 0:
+            conn.execute('DELETE FROM sessions WHERE updated_at <= ?', (time.time() - self.ttl,))
+        conn.commit()
+
+    def delete(self, session_id: str) -> None:
+        conn = self._conn()
+        conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+        conn.commit()
+
+    def __len__(self) -> int:
+        row = self._conn().execute(
+            'SELECT COUNT(*) FROM sessions WHERE updated_at > ?', (time.time() - self.ttl,)
+        ).fetchone()
+        return row[0]
+
+
+def create_session_store() -> SessionStore:
+    """Build the store selected by SESSION_STORE (`memory` or `sqlite`)."""
+    ttl = float(os.getenv("SESSION_TTL", "1800"))
+    if os.getenv("SESSION_STORE", "memory") == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_DB_PATH", "sessions.db"), ttl=ttl)
+    return MemorySessionStore(max_size=int(os.getenv("SESSION_MAX_SIZE", "10000")), ttl=ttl)
@@ -0,0 +1,125 @@
+"""Stress test: concurrent bookings of the same slots must never overlap.
+
+Several processes, each with several threads and its own sessions, try to book
+random services into a small set of slots on one day in a scratch salon.db,
+through SalonChatBot's booking path. Afterwards every stored booking is checked
+against the next one on the same resource (SALON_RESOURCES chairs, default 1).
+With --legacy, the old insert-and-commit path runs instead, to show the
+overlaps it lets through.
+
+    python stress_booking.py [processes] [threads] [attempts per thread] [--legacy]
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+SLOTS = 20
+
+
+def book_many(workdir: str, threads: int, attempts: int, legacy: bool, seed: int, results) -> None:
+    os.chdir(workdir)
+    from database import SessionLocal
+    from models import Booking
+    from utils import salon_bot
+
+    day = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slots = [day + timedelta(minutes=30 * i) for i in range(SLOTS)]
+    keys = list(salon_bot.services)
+    booked = conflicts = 0
+    lock = threading.Lock()
+
+    def worker(n: int) -> None:
+        nonlocal booked, conflicts
+        rng = random.Random(seed * 1000 + n)
+        db = SessionLocal()
+        try:
+            for i in range(attempts):
+                key, slot = rng.choice(keys), rng.choice(slots)
+                if legacy:
+                    try:
+                        db.add(Booking(client_name=f"c{seed}-{n}-{i}", service=salon_bot.services[key]['name'],
+                                       slot_time=slot, phone=""))
+                        db.commit()
+                        ok = True
+                    except Exception:
+                        db.rollback()
+                        ok = False
+                else:
+                    ok = salon_bot._create_booking(f"c{seed}-{n}-{i}", key, slot, db) is not None
+                with lock:
+                    if ok:
+                        booked += 1
+                    else:
+                        conflicts += 1
+        finally:
+            db.close()
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put((booked, conflicts))
+
+
+def find_overlaps(workdir: str):
+    os.chdir(workdir)
+    from database import SessionLocal
+    from models import Booking
+    from utils import salon_bot
+
+    durations = salon_bot._durations_by_name()
+    db = SessionLocal()
+    bookings = db.query(Booking).order_by(Booking.resource_id, Booking.slot_time).all()
+    db.close()
+    overlaps = []
+    for earlier, later in zip(bookings, bookings[1:]):
+        if (earlier.resource_id == later.resource_id
+                and earlier.slot_time + timedelta(minutes=durations[earlier.service]) > later.slot_time):
+            overlaps.append((earlier.service, earlier.slot_time, later.service, later.slot_time))
+    return len(bookings), overlaps
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    processes = int(args[0]) if args else 4
+    threads = int(args[1]) if len(args) > 1 else 8
+    attempts = int(args[2]) if len(args) > 2 else 100
+    legacy = "--legacy" in sys.argv
+
+    workdir = tempfile.mkdtemp()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+    from database import upgrade_schema
+    upgrade_schema()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    start = time.perf_counter()
+    workers = [context.Process(target=book_many, args=(workdir, threads, attempts, legacy, p, results))
+               for p in range(processes)]
+    for process in workers:
+        process.start()
+    outcomes = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    stored, overlaps = find_overlaps(workdir)
+    attempted = processes * threads * attempts
+    print(f"{'legacy' if legacy else 'conflict-checked'} path: {attempted} attempts from "
+          f"{processes} processes x {threads} threads on {SLOTS} slots in {elapsed:.1f} s")
+    print(f"booked {sum(b for b, _ in outcomes)}, rejected {sum(c for _, c in outcomes)}, "
+          f"stored {stored}, overlapping pairs {len(overlaps)}")
+    for overlap in overlaps[:5]:
+        print("  overlap: {} at {} / {} at {}".format(*overlap))
+    sys.exit(1 if overlaps else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from availability import AvailabilityCache, ResourceCalendar, run_starts, slot_mask
+from models import Base, Booking
+from salon_calendar import BusinessCalendar
+
+MONDAY = date(2030, 5, 6)
+DURATIONS = {'Haircut & Styling': 60, 'Hair Wash & Blow Dry': 30}
+# Far enough ahead for MONDAY; the default horizon only matters for open_days
+BUSINESS = BusinessCalendar(horizon_days=100000)
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(MONDAY, time(hour, minute))
+
+
+def starts(calendar: ResourceCalendar, duration: int, after=None, count: int = 4):
+    found = []
+    for start, resource in calendar.free_starts([MONDAY], duration, after):
+        found.append((start.time(), resource))
+        if len(found) == count:
+            break
+    return found
+
+
+def new_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_slot_mask_and_run_starts():
+    assert slot_mask(at(10), at(11), MONDAY) == 0b11 << 20
+    # Off-grid times round outwards to whole slots
+    assert slot_mask(at(10, 15), at(10, 45), MONDAY) == 0b11 << 20
+    assert slot_mask(at(23, 30), at(23, 30) + timedelta(hours=2), MONDAY) == 1 << 47
+    assert run_starts(0b1110111, 3) == 0b0010001
+    assert run_starts(0b1110111, 4) == 0
+
+
+def test_overlapping_and_back_to_back_bookings():
+    calendar = ResourceCalendar(business=BUSINESS)
+    calendar.add(at(10), at(11))
+    # An hour fits up to 10:00 and again from 11:00, when the booking ends
+    assert starts(calendar, 60, after=at(9)) == [(time(9), 1), (time(11), 1), (time(11, 30), 1), (time(12), 1)]
+    assert starts(calendar, 30, after=at(9, 30), count=2) == [(time(9, 30), 1), (time(11), 1)]
+
+    calendar.add(at(11), at(12))
+    assert starts(calendar, 60, after=at(9, 30), count=2) == [(time(12), 1), (time(12, 30), 1)]
+    # Closing time counts as busy too: the last hour starts at 18:00
+    assert starts(calendar, 60, after=at(17, 30)) == [(time(17, 30), 1), (time(18), 1)]
+
+
+def test_second_resource_takes_a_start_the_first_cannot():
+    calendar = ResourceCalendar(resources=2, business=BUSINESS)
+    calendar.add(at(10), at(12), resource_id=1)
+    assert starts(calendar, 60, after=at(10), count=3) == [(time(10), 2), (time(10, 30), 2), (time(11), 2)]
+    assert starts(calendar, 60, after=at(12), count=1) == [(time(12), 1)]
+
+    calendar.add(at(10), at(11), resource_id=2)
+    assert starts(calendar, 60, after=at(10), count=2) == [(time(11), 2), (time(11, 30), 2)]
+    # Out-of-range resources are ignored
+    calendar.add(at(9), at(10), resource_id=3)
+    assert starts(calendar, 60, after=at(9), count=1) == [(time(9), 1)]
+
+
+def test_cache_writes_through_and_reloads():
+    db = new_session()
+    db.add(Booking(client_name='a', service='Haircut & Styling', slot_time=at(10), resource_id=1))
+    db.commit()
+    cache = AvailabilityCache(ttl=60, business=BUSINESS)
+
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(10), count=1) == [(time(11), 1)]
+    assert cache.stats()['misses'] == 1
+
+    # Made through this process: written through without a query
+    cache.add(at(11), 30)
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(10), count=1) == [(time(11, 30), 1)]
+    cache.remove(at(11), 30)
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(10), count=1) == [(time(11), 1)]
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+    # Made elsewhere: unseen until the day is invalidated and reloaded
+    db.add(Booking(client_name='b', service='Hair Wash & Blow Dry', slot_time=at(11), resource_id=1))
+    db.commit()
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(10), count=1) == [(time(11), 1)]
+    cache.invalidate(MONDAY)
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(10), count=1) == [(time(11, 30), 1)]
+    assert cache.stats()['misses'] == 2
+
+    cache.invalidate()
+    assert cache.stats()['days_cached'] == 0
+
+
+def test_cache_reloads_expired_days():
+    db = new_session()
+    cache = AvailabilityCache(ttl=0, business=BUSINESS)
+    cache.booked(db, [MONDAY], DURATIONS)
+    db.add(Booking(client_name='a', service='Haircut & Styling', slot_time=at(9), resource_id=1))
+    db.commit()
+    assert starts(cache.booked(db, [MONDAY], DURATIONS), 60, after=at(9), count=1) == [(time(10), 1)]
+    assert cache.stats()['hits'] == 0 and cache.stats()['misses'] == 2
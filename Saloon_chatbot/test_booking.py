@@ -0,0 +1,60 @@
+import threading
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from conversation import ConversationState
+from models import Base, Booking
+from utils import SalonChatBot
+
+DAY = datetime.combine(datetime.now().date() + timedelta(days=1), time(9))
+
+
+def new_sessionmaker(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'salon.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, _: conn.execute("PRAGMA busy_timeout=10000"))
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+def test_re_offer_keeps_the_taken_start_while_another_chair_is_free():
+    bot = SalonChatBot()
+    state = ConversationState()
+    taken = DAY + timedelta(hours=1)
+    reply = bot._offer_next_times(state, taken, [DAY, taken, taken + timedelta(minutes=30)])
+    assert state.available_time(0) == taken and state.available_time(1) == taken + timedelta(minutes=30)
+    assert "1. " + taken.strftime('%A %I:%M %p') in reply['reply']
+
+
+def test_same_slot_on_several_chairs_books_every_chair(tmp_path, monkeypatch):
+    monkeypatch.setenv("SALON_RESOURCES", "3")
+    bot = SalonChatBot()
+    Session = new_sessionmaker(tmp_path)
+    slots = [DAY + timedelta(hours=i) for i in range(8)]
+    # Every round, all three clients ask for the same start at once
+    start_together = threading.Barrier(3)
+    outcomes = []
+
+    def client(n: int) -> None:
+        db = Session()
+        try:
+            for slot in slots:
+                start_together.wait()
+                outcomes.append((slot, bot._create_booking(f"client{n}", 'hair_wash', slot, db) is not None))
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(ok for _, ok in outcomes)
+    db = Session()
+    stored = db.query(Booking.slot_time, Booking.resource_id).all()
+    assert sorted(stored) == sorted((slot, chair) for slot in slots for chair in (1, 2, 3))
+    # With every chair taken, a fourth client is turned away
+    assert bot._create_booking("late", 'hair_wash', slots[0], db) is None
+    db.close()
@@ -0,0 +1,40 @@
+from conversation import Stage
+from intents import IntentMatcher
+
+SERVICES = {
+    'haircut': {'name': 'Haircut & Styling', 'duration': 60, 'price': 30},
+    'hair_wash': {'name': 'Hair Wash & Blow Dry', 'duration': 30, 'price': 15},
+    'facial': {'name': 'Facial Treatment', 'duration': 90, 'price': 50},
+}
+matcher = IntentMatcher(SERVICES)
+
+
+def test_phrases_match_whole_words_and_plurals():
+    assert matcher.scan("I'm into haircutting").service is None
+    assert matcher.scan("do you do facials?").service == 'facial'
+    assert matcher.scan("do you do haircuts?").service == 'haircut'
+    assert matcher.scan("his hair").categories == frozenset()
+    assert matcher.scan("this is something else").categories == frozenset()
+    assert matcher.scan("nothing booked").categories == frozenset()
+    assert matcher.scan("a facial, please").service == 'facial'
+    assert matcher.scan("Haircut   &  STYLING").service == 'haircut'
+    assert matcher.scan("hair wash").service == 'hair_wash'
+
+
+def test_earliest_service_in_the_catalogue_wins():
+    assert matcher.scan("a facial and a haircut").service == 'haircut'
+    assert matcher.scan("hair wash then facial").service == 'hair_wash'
+
+
+def test_detect_by_stage():
+    assert matcher.detect("hey there") == 'greeting'
+    assert matcher.detect("what services do you have") == 'ask_services'
+    assert matcher.detect("facial treatment tomorrow") == 'select_service:facial'
+    assert matcher.detect("book 2", Stage.SERVICES) == 'select_service_by_number:2'
+    assert matcher.detect("I want facials") == 'select_service:facial'
+    assert matcher.detect("book appointments", Stage.SERVICES) == 'start_booking'
+    assert matcher.detect("book 7", Stage.SERVICES) == 'start_booking'
+    assert matcher.detect("book 2") == 'general'
+    assert matcher.detect("2", Stage.SHOW_TIMES) == 'confirm_booking'
+    assert matcher.detect("yes please") == 'confirm_booking'
+    assert matcher.detect("no thanks") == 'cancel'
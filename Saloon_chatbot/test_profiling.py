@@ -0,0 +1,41 @@
+import json
+import os
+import threading
+
+import pytest
+
+from profiling import ChatProfiler
+
+
+def test_concurrent_sampled_turns_profile_one_at_a_time(tmp_path):
+    profiler = ChatProfiler(sample_rate=1.0, slow_ms=0, directory=str(tmp_path))
+    inside = threading.Barrier(2)
+    errors = []
+
+    def turn(n: int) -> None:
+        try:
+            with profiler.profile("chat", turn=n):
+                inside.wait(timeout=5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=turn, args=(n,)) for n in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert profiler.sampled == profiler.dumped == 1
+    dump = next(name for name in os.listdir(tmp_path) if name.endswith(".json") and "speedscope" not in name)
+    assert json.loads((tmp_path / dump).read_text())["label"] == "chat"
+
+
+def test_a_failing_turn_releases_the_profiler(tmp_path):
+    profiler = ChatProfiler(sample_rate=1.0, slow_ms=1e9, directory=str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with profiler.profile("chat"):
+            raise RuntimeError("turn failed")
+    with profiler.profile("chat"):
+        pass
+    assert profiler.sampled == 2 and profiler.dumped == 0
@@ -0,0 +1,36 @@
+from datetime import date, datetime, time, timedelta
+
+from salon_calendar import BusinessCalendar, parse_hours
+
+MONDAY = date(2030, 5, 6)
+
+
+def test_parse_hours_ranges_split_shifts_and_closed_days():
+    hours = parse_hours("mon-fri=09:00-12:00,13:00-18:00; sat=10:00-14:00; sun=closed")
+    assert hours[0] == hours[4] == ((time(9), time(12)), (time(13), time(18)))
+    assert hours[5] == ((time(10), time(14)),)
+    assert hours[6] == ()
+
+
+def test_grid_follows_weekday_hours_and_closures():
+    calendar = BusinessCalendar(parse_hours("mon-sat=09:00-12:00,13:00-15:00;sun=closed"),
+                                closures=[MONDAY + timedelta(days=1)])
+    monday = calendar.slots(MONDAY)
+    assert monday[0] == datetime(2030, 5, 6, 9) and monday[-1] == datetime(2030, 5, 6, 14, 30)
+    assert datetime(2030, 5, 6, 12) not in monday
+    assert calendar.slots(MONDAY + timedelta(days=1)) == ()
+    assert calendar.slots(MONDAY - timedelta(days=1)) == ()
+    assert calendar.grid(MONDAY) is calendar.grid(MONDAY)
+
+    assert calendar.is_bookable(datetime(2030, 5, 6, 11), datetime(2030, 5, 6, 12))
+    assert not calendar.is_bookable(datetime(2030, 5, 6, 11, 30), datetime(2030, 5, 6, 12, 30))
+    assert calendar.next_opening(datetime(2030, 5, 6, 14, 30), timedelta(minutes=60)) == datetime(2030, 5, 8, 9)
+
+
+def test_open_days_stop_at_the_horizon():
+    calendar = BusinessCalendar(horizon_days=3)
+    today = date.today()
+    assert calendar.open_days() == [today + timedelta(days=i) for i in range(3)]
+    assert calendar.open_days(today + timedelta(days=1), count=1) == [today + timedelta(days=1)]
+    assert calendar.open_days(today + timedelta(days=5)) == []
+    assert all(slot > datetime.now() for slot in calendar.slots(today, after=datetime.now()))
@@ -1,11 +1,24 @@
+import os
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime
+from itertools import islice
 from typing import Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
 from models import Booking
+from availability import SLOT_MINUTES, AvailabilityCache, ResourceCalendar, busy_resources, conflict_query
+from salon_calendar import BusinessCalendar
+from session_store import SessionStore, create_session_store
+from conversation import ConversationState, Stage
+from intents import IntentMatcher
+from logs import get_logger
+from metrics import stage
+from replies import ReplyTemplates
+
+log = get_logger("bot")
 
 class SalonChatBot:
-    def __init__(self):
-        self.services = {
+    def __init__(self, session_store: Optional[SessionStore] = None):
+        self.set_services({
             'haircut': {'name': 'Haircut & Styling', 'duration': 60, 'price': 30},
             'hair_wash': {'name': 'Hair Wash & Blow Dry', 'duration': 30, 'price': 15},
             'facial': {'name': 'Facial Treatment', 'duration': 90, 'price': 50},
@@ -15,178 +28,263 @@ class SalonChatBot:
             'eyebrow': {'name': 'Eyebrow Threading', 'duration': 20, 'price': 12},
             'hair_color': {'name': 'Hair Coloring', 'duration': 120, 'price': 80},
             'highlights': {'name': 'Hair Highlights', 'duration': 150, 'price': 100}
-        }
-        self.conversations = {}
-
-    def get_conversation_state(self, session_id: str) -> Dict:
-        if session_id not in self.conversations:
-            self.conversations[session_id] = {
-                'stage': 'greeting',
-                'selected_service': None,
-                'available_times': [],
-                'client_name': 'Guest'
-            }
-        return self.conversations[session_id]
-
-    def detect_intent(self, message: str, session_id: Optional[str] = None) -> str:
-        message = message.lower().strip()
-        state = self.get_conversation_state(session_id) if session_id else None
-
-        # Step 1: If we're showing available times, prioritize confirming booking
-        if state and state.get('stage') == 'show_times':
-            if re.search(r'\b\d+\b', message):
-                return 'confirm_booking'
-
-        # Step 2: Handle greetings
-        if any(word in message for word in ['hi', 'hello', 'hey']):
-            return 'greeting'
-
-        # Step 3: Handle asking about services
-        if any(phrase in message for phrase in ['services', 'what do you offer']):
-            return 'ask_services'
-
-        # Step 4: Detect service by name
-        for key, info in self.services.items():
-            if key.replace('_', ' ') in message or info['name'].lower() in message:
-                return f'select_service:{key}'
-
-        # Step 5: Detect service by number — ONLY IF NOT in show_times stage
-        if state and state.get('stage') != 'show_times':
-            if any(word in message for word in ['book', 'appointment', 'schedule']):
-                match = re.match(r'book\s+(\d+)', message)
-                if match:
-                    num = int(match.group(1))
-                    if 1 <= num <= len(self.services):
-                        return f'select_service_by_number:{num}'
-                return 'start_booking'
-
-        # Step 6: Confirm or cancel
-        if any(word in message for word in ['confirm', 'yes', 'ok', 'sure']):
-            return 'confirm_booking'
-
-        if any(word in message for word in ['cancel', 'no']):
-            return 'cancel'
-
-        # Step 7: Fallback
-        return 'general'
-
-
-
-
-
-    def generate_available_times(self, duration: int, db) -> List[Dict]:
-        available = []
-        now = datetime.now()
-        for day_offset in range(2):  # Today and tomorrow
-            date = (now + timedelta(days=day_offset)).date()
-            start = datetime.combine(date, datetime.min.time().replace(hour=9))
-            end = datetime.combine(date, datetime.min.time().replace(hour=19))
-            current = start
-            while current < end:
-                existing = db.query(Booking).filter(Booking.slot_time == current).first()
-                if not existing:
-                    available.append({'datetime': current, 'display': current.strftime("%A %I:%M %p")})
-                current += timedelta(minutes=30)
-                if len(available) >= 10:
-                    break
-        return available
+        })
+        # Chairs/stylists that can each take one booking at a time, numbered from 1
+        self.resources = int(os.getenv("SALON_RESOURCES", "1"))
+        self.sessions = session_store or create_session_store()
+        # Opening hours, closures and booking horizon (SALON_HOURS / SALON_CLOSURES / SALON_HORIZON_DAYS)
+        self.business = BusinessCalendar.from_env()
+        self.availability = AvailabilityCache(ttl=float(os.getenv("AVAILABILITY_TTL", "60")),
+                                              resources=self.resources, business=self.business)
+
+    def set_services(self, services: Dict[str, Dict]) -> None:
+        """Replace the service catalogue; intent matching and the prebuilt reply text are rebuilt from it."""
+        self.services = services
+        self.intents = IntentMatcher(services)
+        self.replies = ReplyTemplates(services)
+        self._durations = {info['name']: info['duration'] for info in services.values()}
+
+    def get_conversation_state(self, session_id: str) -> ConversationState:
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = ConversationState()
+        return state
+
+    def detect_intent(self, message: str, state: Optional[ConversationState] = None) -> str:
+        with stage("intent"):
+            intent = self.intents.detect(message, state.stage if state else None)
+        log.debug("intent", extra={"intent": intent, "stage": state.stage.name if state else None})
+        return intent
+
+    def generate_available_times(self, duration: int, db, start: Optional[date] = None, days: int = 2,
+                                 limit: int = 10) -> List[datetime]:
+        """Up to `limit` free start times over the next `days` open days from `start` (default today)."""
+        with stage("availability"):
+            dates = self.business.open_days(start, days)
+            booked = self.availability.booked(db, dates, self._durations_by_name())
+            return self._free_times(booked, dates, duration, limit)
+
+    async def agenerate_available_times(self, duration: int, db, start: Optional[date] = None, days: int = 2,
+                                        limit: int = 10) -> List[datetime]:
+        with stage("availability"):
+            dates = self.business.open_days(start, days)
+            booked = await self.availability.abooked(db, dates, self._durations_by_name())
+            return self._free_times(booked, dates, duration, limit)
+
+    def _free_times(self, booked: ResourceCalendar, dates: List[date], duration: int, limit: int) -> List[datetime]:
+        # Slots earlier today are over and never offered
+        return [start for start, _ in islice(booked.free_starts(dates, duration, after=datetime.now()), limit)]
 
     def chat_response(self, message: str, session_id: str, client_name: str, db) -> Dict:
         state = self.get_conversation_state(session_id)
-        state['client_name'] = client_name
-        intent = self.detect_intent(message)
+        state.client_name = client_name
+        intent = self.detect_intent(message, state)
+        result = self._handle_intent(intent, message, state, client_name, db)
+        self._save_state(session_id, intent, state)
+        return result
+
+    async def achat_response(self, message: str, session_id: str, client_name: str, db) -> Dict:
+        state = self.get_conversation_state(session_id)
+        state.client_name = client_name
+        intent = self.detect_intent(message, state)
+        result = await self._ahandle_intent(intent, message, state, client_name, db)
+        self._save_state(session_id, intent, state)
+        return result
+
+    def _save_state(self, session_id: str, intent: str, state: ConversationState) -> None:
+        if intent == 'cancel':
+            self.sessions.delete(session_id)
+        else:
+            self.sessions.set(session_id, state)
 
+    def _handle_intent(self, intent: str, message: str, state: ConversationState, client_name: str, db) -> Dict:
+        service_key = self._service_for_intent(intent)
+        if service_key:
+            times = self.generate_available_times(self.services[service_key]['duration'], db)
+            return self._offer_times(state, service_key, times)
+
+        selected_time = self._time_to_book(intent, message, state)
+        if selected_time:
+            with stage("db_commit"):
+                booking = self._create_booking(client_name, state.selected_service, selected_time, db)
+            if booking is None:
+                self.availability.invalidate(selected_time.date())
+                times = self.generate_available_times(self.services[state.selected_service]['duration'], db)
+                return self._offer_next_times(state, selected_time, times)
+            state.stage = Stage.BOOKED
+            return {'reply': booking, 'booking_confirmed': True}
+
+        return self._reply(intent, state, client_name)
+
+    async def _ahandle_intent(self, intent: str, message: str, state: ConversationState, client_name: str, db) -> Dict:
+        service_key = self._service_for_intent(intent)
+        if service_key:
+            times = await self.agenerate_available_times(self.services[service_key]['duration'], db)
+            return self._offer_times(state, service_key, times)
+
+        selected_time = self._time_to_book(intent, message, state)
+        if selected_time:
+            with stage("db_commit"):
+                booking = await self._acreate_booking(client_name, state.selected_service, selected_time, db)
+            if booking is None:
+                self.availability.invalidate(selected_time.date())
+                times = await self.agenerate_available_times(self.services[state.selected_service]['duration'], db)
+                return self._offer_next_times(state, selected_time, times)
+            state.stage = Stage.BOOKED
+            return {'reply': booking, 'booking_confirmed': True}
+
+        return self._reply(intent, state, client_name)
+
+    def _service_for_intent(self, intent: str) -> Optional[str]:
+        if intent.startswith('select_service_by_number:'):
+            service_number = int(intent.split(':')[1])
+            service_keys = list(self.services.keys())
+            if 1 <= service_number <= len(service_keys):
+                return service_keys[service_number - 1]
+        elif intent.startswith('select_service:'):
+            return intent.split(':')[1]
+        return None
+
+    def _time_to_book(self, intent: str, message: str, state: ConversationState) -> Optional[datetime]:
+        if intent == 'confirm_booking' and state.stage == Stage.SHOW_TIMES and state.selected_service:
+            return self._extract_time_selection(message, state)
+        return None
+
+    def _offer_times(self, state: ConversationState, service_key: str, times: List[datetime]) -> Dict:
+        state.selected_service = service_key
+        state.set_available_times(times)
+        state.stage = Stage.SHOW_TIMES
+        if times:
+            return {'reply': self.replies.offer(service_key, times), 'booking_confirmed': False}
+        else:
+            return {'reply': "Sorry, no slots available right now. Try again later.", 'booking_confirmed': False}
+
+    def _offer_next_times(self, state: ConversationState, taken: datetime, times: List[datetime]) -> Dict:
+        """Reply when the chosen slot was booked by someone else after it was offered."""
+        # `times` is reloaded, so `taken` itself is only listed if some other resource is still free then
+        later = [t for t in times if t >= taken] or times
+        state.set_available_times(later)
+        if not later:
+            return {'reply': "Sorry, that slot was just taken and no other slots are available right now. Try again later.", 'booking_confirmed': False}
+        return {'reply': self.replies.next_times(taken, later), 'booking_confirmed': False}
+
+    def _reply(self, intent: str, state: ConversationState, client_name: str) -> Dict:
+        """Replies for every turn that needs no database access."""
         if intent == 'greeting':
-            state['stage'] = 'greeting'
+            state.stage = Stage.GREETING
             return {'reply': f"Hello {client_name}! Welcome to our salon. How can I help you today?", 'booking_confirmed': False}
 
         if intent == 'ask_services':
-            state['stage'] = 'services'
+            state.stage = Stage.SERVICES
             return {'reply': self._show_services(), 'booking_confirmed': False}
 
         if intent.startswith('select_service_by_number:'):
-            service_number = int(intent.split(':')[1])
-            service_keys = list(self.services.keys())
-            if 1 <= service_number <= len(service_keys):
-                service_key = service_keys[service_number - 1]
-                state['selected_service'] = service_key
-                service_info = self.services[service_key]
-                times = self.generate_available_times(service_info['duration'], db)
-                state['available_times'] = times
-                state['stage'] = 'show_times'
-
-                if times:
-                    reply = f"Great choice! {service_info['name']} takes {service_info['duration']} mins and costs ${service_info['price']}.\n"
-                    reply += self._show_available_times(times)
-                    return {'reply': reply, 'booking_confirmed': False}
-                else:
-                    return {'reply': "Sorry, no slots available right now. Try again later.", 'booking_confirmed': False}
-            else:
-                return {'reply': "Invalid service number. Please choose a valid service.", 'booking_confirmed': False}
-
-        if intent.startswith('select_service:'):
-            service_key = intent.split(':')[1]
-            state['selected_service'] = service_key
-            service_info = self.services[service_key]
-            times = self.generate_available_times(service_info['duration'], db)
-            state['available_times'] = times
-            state['stage'] = 'show_times'
-            if times:
-                reply = f"Great choice! {service_info['name']} takes {service_info['duration']} mins and costs ${service_info['price']}.\n"
-                reply += self._show_available_times(times)
-                return {'reply': reply, 'booking_confirmed': False}
-            else:
-                return {'reply': "Sorry, no slots available right now. Try again later.", 'booking_confirmed': False}
-
-        if intent == 'confirm_booking' and state['stage'] == 'show_times':
-            if not state['selected_service']:
-                response = "Please select a service first. Here are our popular services:\n\n" + self._show_services()
-                state['stage'] = 'services'
-                return {'reply': response, 'booking_confirmed': False}
-
-            selected_time = self._extract_time_selection(message, state['available_times'])
-            if selected_time:
-                booking = self._create_booking(client_name, state['selected_service'], selected_time, db)
-                state['stage'] = 'booked'
-                return {'reply': booking, 'booking_confirmed': True}
-            else:
-                return {'reply': "Please specify a valid time slot to book.", 'booking_confirmed': False}
+            return {'reply': "Invalid service number. Please choose a valid service.", 'booking_confirmed': False}
+
+        if intent == 'confirm_booking' and state.stage == Stage.SHOW_TIMES:
+            if not state.selected_service:
+                state.stage = Stage.SERVICES
+                return {'reply': self.replies.select_service_first, 'booking_confirmed': False}
+            return {'reply': "Please specify a valid time slot to book.", 'booking_confirmed': False}
 
         if intent == 'cancel':
-            self.conversations.pop(session_id, None)
             return {'reply': "Booking cancelled. Let me know if you need anything else.", 'booking_confirmed': False}
 
         # fallback
         return {'reply': "I'm here to help you book salon appointments! What would you like to do today?", 'booking_confirmed': False}
 
     def _show_services(self) -> str:
-        text = "Here are our services:\n"
-        for i, (k, v) in enumerate(self.services.items(), 1):
-            text += f"{i}. {v['name']} - ${v['price']} ({v['duration']} mins)\n"
-        text += "Which service would you like to book?"
-        return text
-
-    def _show_available_times(self, times: List[Dict]) -> str:
-        text = "Available slots:\n"
-        for i, t in enumerate(times[:8], 1):
-            text += f"{i}. {t['display']}\n"
-        text += "Please reply with the slot number to book."
-        return text
-
-    def _extract_time_selection(self, message: str, times: List[Dict]) -> Optional[datetime]:
+        return self.replies.services_menu
+
+    def _show_available_times(self, times: List[datetime]) -> str:
+        return self.replies.available_times(times)
+
+    def _extract_time_selection(self, message: str, state: ConversationState) -> Optional[datetime]:
         match = re.search(r'\b(\d+)\b', message)
         if match:
-            idx = int(match.group(1)) - 1
-            if 0 <= idx < len(times):
-                return times[idx]['datetime']
+            return state.available_time(int(match.group(1)) - 1)
+        return None
+
+    def _create_booking(self, client_name: str, service_key: str, time: datetime, db) -> Optional[str]:
+        """Book `time` on a free resource, or return None if every resource is now taken.
+
+        A resource is picked from an unlocked read, then the INSERT takes
+        SQLite's write lock, held until commit or rollback. The check after it
+        sees every committed booking, and moves the booking to another free
+        resource if a concurrent writer took the first pick for an overlapping
+        start. A writer that took the same resource at the same start trips
+        the unique (resource_id, slot_time) index instead; that rolls back and
+        the resource is picked again from fresh rows.
+        """
+        service_info = self.services[service_key]
+        duration = service_info['duration']
+        durations = self._durations_by_name()
+        # Each retry follows a commit that took one more resource at this start
+        for _ in range(self.resources):
+            resource_id = self._free_resource(db.execute(conflict_query(time, duration, durations)).all(), time,
+                                              durations)
+            if resource_id is None:
+                return None
+            booking = Booking(client_name=client_name, service=service_info['name'], slot_time=time, phone="",
+                              resource_id=resource_id)
+            db.add(booking)
+            try:
+                db.flush()
+            except IntegrityError:
+                db.rollback()
+                continue
+            rows = db.execute(conflict_query(time, duration, durations, booking.id)).all()
+            booking.resource_id = self._free_resource(rows, time, durations)
+            if booking.resource_id is None:
+                db.rollback()
+                return None
+            db.commit()
+            self.availability.add(time, duration, booking.resource_id)
+            return self.replies.confirmation(service_key, time)
         return None
 
-    def _create_booking(self, client_name: str, service_key: str, time: datetime, db) -> str:
+    async def _acreate_booking(self, client_name: str, service_key: str, time: datetime, db) -> Optional[str]:
         service_info = self.services[service_key]
-        booking = Booking(client_name=client_name, service=service_info['name'], slot_time=time, phone="")
-        db.add(booking)
+        duration = service_info['duration']
+        durations = self._durations_by_name()
+        for _ in range(self.resources):
+            rows = (await db.execute(conflict_query(time, duration, durations))).all()
+            resource_id = self._free_resource(rows, time, durations)
+            if resource_id is None:
+                return None
+            booking = Booking(client_name=client_name, service=service_info['name'], slot_time=time, phone="",
+                              resource_id=resource_id)
+            db.add(booking)
+            try:
+                await db.flush()
+            except IntegrityError:
+                await db.rollback()
+                continue
+            rows = (await db.execute(conflict_query(time, duration, durations, booking.id))).all()
+            booking.resource_id = self._free_resource(rows, time, durations)
+            if booking.resource_id is None:
+                await db.rollback()
+                return None
+            await db.commit()
+            self.availability.add(time, duration, booking.resource_id)
+            return self.replies.confirmation(service_key, time)
+        return None
+
+    def _free_resource(self, rows, time: datetime, durations: Dict[str, int]) -> Optional[int]:
+        busy = busy_resources(rows, time, durations)
+        return next((r for r in range(1, self.resources + 1) if r not in busy), None)
+
+    def delete_booking(self, booking_id: int, db) -> bool:
+        booking = db.query(Booking).filter(Booking.id == booking_id).first()
+        if not booking:
+            return False
+        slot_time, service, resource_id = booking.slot_time, booking.service, booking.resource_id
+        db.delete(booking)
         db.commit()
-        return (f"Booking confirmed for {service_info['name']} on {time.strftime('%A, %b %d %I:%M %p')}.\n"
-                f"Price: ${service_info['price']}. See you then!")
+        self.availability.remove(slot_time, self._durations_by_name().get(service, SLOT_MINUTES), resource_id)
+        return True
+
+    def _durations_by_name(self) -> Dict[str, int]:
+        return self._durations
 
 salon_bot = SalonChatBot()